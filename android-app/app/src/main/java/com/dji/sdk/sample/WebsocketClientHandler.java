@@ -117,16 +117,19 @@ public class WebsocketClientHandler {
                         Log.d(TAG, "Attempting to take off");
                     FlightManager flightManager = FlightManager.getFlightManager();
                         flightManager.onArm();
+                        sendCommandAck(jsonMessage, type);
                     } else if (type.equals("offer") || type.equals("candidate") || type.equals("answer")) {
                         webRTCClient.handleWebRTCMessage(jsonMessage);
                     } else if (type.equals("flight_take_off")) {
                         Log.d(TAG, "Attempting to take off");
                     FlightManager flightManager = FlightManager.getFlightManager();
                         flightManager.startWaypointMission();
+                        sendCommandAck(jsonMessage, type);
                     } else if (type.equals("flight_return_to_home")) {
                         Log.d(TAG, "Attempting to return to home");
                     FlightManager flightManager = FlightManager.getFlightManager();
                         flightManager.goingHome();
+                        sendCommandAck(jsonMessage, type);
                     } else {
                         Log.w(TAG, "Unhandled message type: " + type);
                     }
@@ -212,6 +215,25 @@ public class WebsocketClientHandler {
         }
     }
 
+    /**
+     * Acknowledges a flight command to the server, commands without a command_id are not acknowledged.
+     */
+    private void sendCommandAck(JSONObject command, String type) {
+        String commandId = command.optString("command_id", "");
+        if (commandId.isEmpty()) {
+            return;
+        }
+        try {
+            JSONObject ack = new JSONObject();
+            ack.put("msg_type", "Command_ack");
+            ack.put("command_id", commandId);
+            ack.put("command", type);
+            send(ack.toString());
+        } catch (JSONException e) {
+            Log.e(TAG, "Failed to build command ack: " + e.getMessage());
+        }
+    }
+
     public byte[] getLastBytesReceived() {
         return lastBytesReceived;
     }
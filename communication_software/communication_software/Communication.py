@@ -1,30 +1,35 @@
 import time
 import json
+from collections import deque
+from datetime import datetime
 import redis.exceptions
 import websockets
 from websockets import WebSocketServerProtocol
 from communication_software.ConvexHullScalable import Coordinate
-import threading
+from communication_software.DroneRegistry import DroneRegistry
+from communication_software.FramePublisher import FramePublisher
+from communication_software import RedisConnection
 import av
 import asyncio
 import redis
-import cv2
-import numpy as np
 
 from aiortc import RTCPeerConnection, RTCSessionDescription, RTCIceCandidate
 from aiortc.contrib.media import MediaRecorder
 from aiortc.sdp import candidate_from_sdp
 
 
-try:
-    r = redis.Redis(host="redis", port=6379, db=0, decode_responses=True)
-    r.ping()
-    print("Successfully connected to Redis (Communication Server)!")
-except redis.exceptions.ConnectionError as e:
-    print(f"Error connecting to Redis (Communication Server): {e}")
-    exit()
-
 COMMAND_CHANNEL = "drone_commands"
+COMMAND_ACK_CHANNEL = "drone_command_acks"  # Delivery status of commands that carry a command_id
+COMMAND_QUEUE_SIZE = 100  # Commands waiting for dispatch before the oldest is dropped
+COMMAND_LATENCY_SAMPLES = 1000
+REDIS_RECONNECT_MIN_DELAY = 0.5
+REDIS_RECONNECT_MAX_DELAY = 30.0
+# Every position update is stored in "position_droneN" and published on this channel
+POSITION_CHANNEL = "drone_positions"
+POSITION_TTL_SECONDS = 10
+# Planned position and heading of every drone slot, read by the stitcher to geolocate detections.
+# "drone_plan" holds {"version", "ts", "drones": {"N": {"lat", "lng", "alt", "heading"}}}
+PLAN_KEY = "drone_plan"
 
 
 from aiortc import RTCConfiguration, RTCIceServer
@@ -50,15 +55,28 @@ class Communication:
     def __init__(self) -> None:
         self.connections = {}  # Active WebSocket connections
         self.coordinates = {}  # Coordinates for each client
+        self.plan_indices = {}  # Connection id to the index of its coordinate in drone_coordinates
         self.drone_coordinates = []  # List of drone coordinates
         self.client_index = 0  # Tracks which coordinate to assign next
         self.streams = {}
         self.locks = {}
         self.frame = {}  # Dictionary to store locks for each peer_id
+        self.registry = DroneRegistry()  # Stable drone numbers for frames, positions and commands
+        self.planned_positions = {}  # Drone slot to the coordinate tuple it was sent, kept after disconnects
+        self.plan_version = 0
+        # Raises redis.exceptions.ConnectionError when Redis is not reachable
+        RedisConnection.check_connection(RedisConnection.create_client(), "Communication Server")
+        # Video frames are raw JPEG bytes, so they get their own client without response decoding
+        self.frame_publisher = FramePublisher(RedisConnection.create_client(decode_responses=False))
+        # Async client for Redis calls made from the event loop, connects lazily inside the running loop
+        self.async_redis = RedisConnection.create_async_client()
 
         self.loop = None
-        self.redis_listener_stop_event = threading.Event()
         self.redis_listener_task = None
+        self.command_dispatch_task = None
+        self.command_queue = None  # Created on the event loop by start_redis_listener
+        self.commands_dropped = 0
+        self.command_latencies_ms = deque(maxlen=COMMAND_LATENCY_SAMPLES)
         self.ongoing_streams = {}
         self.stream_obj = None  # Placeholder for stream display/output
         self.peer_connections = {}
@@ -85,11 +103,9 @@ class Communication:
                 print("FATAL: Could not acquire event loop.")
                 return  # Exit if loop cannot be found
 
-        if not self.redis_listener_task or not self.redis_listener_task.is_alive():
-            print(
-                "Warning: Redis listener thread not started or alive. Starting it now."
-            )
-            self.start_redis_listener_thread()  # Assumes self.loop is set
+        if not self.redis_listener_task or self.redis_listener_task.done():
+            print("Warning: Redis listener not started or alive. Starting it now.")
+            self.start_redis_listener()  # Assumes self.loop is set
 
         server = await websockets.serve(self.webs_server, ip, 14500)
         print(f"WebSocket server started on ws://{ip}:14500")
@@ -98,12 +114,8 @@ class Communication:
             await server.wait_closed()
         finally:
             print("WebSocket server stopping...")
-            self.redis_listener_stop_event.set()
-            if self.redis_listener_task and self.redis_listener_task.is_alive():
-                print("Waiting for Redis listener thread to finish...")
-                self.redis_listener_task.join(timeout=5)  # Wait briefly for cleanup
-                if self.redis_listener_task.is_alive():
-                    print("Warning: Redis listener thread did not stop gracefully.")
+            self.frame_publisher.shutdown()
+            await self.stop_redis_listener()
             print("WebSocket server stopped.")
 
     def transform_coordinates(self, coordinates: Coordinate, angle: int) -> tuple:
@@ -114,119 +126,80 @@ class Communication:
         new_angle = str(angle)
         return (lat, lng, alt, new_angle)
 
-    def redis_command_listener(self, redis_client, channel, stop_event):
-        """Listens for messages on the specified Redis channel in a blocking loop."""
-        print(f"[REDIS THREAD] Listener thread started for channel '{channel}'.")
-        pubsub = None
-        listener_redis_conn = None
-
-        # Ensure the event loop reference is available
-        if not self.loop:
-            print(
-                "[REDIS THREAD] FATAL: Event loop not available. Listener thread cannot proceed."
-            )
-            return  # Exit thread if loop isn't set
+    async def redis_command_listener(self, channel):
+        """Subscribes to the command channel and queues every command for dispatch.
 
-        while not stop_event.is_set():  # Loop until stop event is set
+        Runs on self.loop. Lost connections are retried with exponential backoff and
+        unexpected errors are logged without stopping the listener.
+        """
+        print(f"[REDIS] Command listener started for channel '{channel}'.")
+        delay = REDIS_RECONNECT_MIN_DELAY
+        while True:
+            pubsub = self.async_redis.pubsub(ignore_subscribe_messages=True)
             try:
-                listener_redis_conn = redis.Redis(
-                    host=redis_client.connection_pool.connection_kwargs.get(
-                        "host", "redis"
-                    ),  # Use 'redis' as default host
-                    port=redis_client.connection_pool.connection_kwargs.get(
-                        "port", 6379
-                    ),
-                    db=redis_client.connection_pool.connection_kwargs.get("db", 0),
-                    decode_responses=True,
-                    socket_connect_timeout=5,  # Add timeout
-                    socket_keepalive=True,  # Add keepalive
-                )
-                listener_redis_conn.ping()  # Verify connection
-                pubsub = listener_redis_conn.pubsub(ignore_subscribe_messages=True)
-                pubsub.subscribe(channel)
-                print(
-                    f"[REDIS THREAD] Subscribed successfully to '{channel}'. Waiting..."
-                )
-
-                for message in pubsub.listen():
-                    if stop_event.is_set():
-                        print(
-                            "[REDIS THREAD] Stop event detected, exiting listen loop."
-                        )
-                        break  # Exit inner listen loop
-
-                    if message and message.get("type") == "message":
-                        print(f"[REDIS THREAD] Received message: {message['data']}")
-                        coro = self.process_redis_command(message["data"])
-                        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+                await pubsub.subscribe(channel)
+                print(f"[REDIS] Subscribed successfully to '{channel}'. Waiting...")
+                delay = REDIS_RECONNECT_MIN_DELAY
 
-                        try:
-                            pass  # Fire-and-forget is usually fine here
-                        except Exception as e:
-                            print(
-                                f"[REDIS THREAD] Error submitting/executing command: {e}"
-                            )
-                    else:
-                        pass
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.enqueue_command(message["data"])
 
-                if not stop_event.is_set():
-                    print(
-                        "[REDIS THREAD] Pubsub listen loop finished unexpectedly. Will attempt reconnect."
-                    )
-                    # Force cleanup before retry delay
-                    if pubsub:
-                        pubsub.close()
-                    if listener_redis_conn:
-                        listener_redis_conn.close()
-                    pubsub = None
-                    listener_redis_conn = None
-                    time.sleep(5)  # Wait before attempting to reconnect
-                    continue  # Continue the outer while loop to retry connection
-
-            except redis.exceptions.ConnectionError as e:
-                print(f"[REDIS THREAD] Connection error: {e}. Retrying in 5 seconds...")
-                if pubsub:
-                    pubsub.close()  # Use close() for pubsub
-                if listener_redis_conn:
-                    listener_redis_conn.close()  # Use close() for connection
-                pubsub = None
-                listener_redis_conn = None
-                time.sleep(5)  # Wait before attempting to reconnect
-            except redis.exceptions.TimeoutError as e:
-                print(
-                    f"[REDIS THREAD] Redis command timeout: {e}. Retrying in 5 seconds..."
-                )
-                if pubsub:
-                    pubsub.close()
-                if listener_redis_conn:
-                    listener_redis_conn.close()
-                pubsub = None
-                listener_redis_conn = None
-                time.sleep(5)
+                print("[REDIS] Pubsub listen loop finished unexpectedly. Will attempt reconnect.")
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+                print(f"[REDIS] Connection error: {e}. Retrying in {delay:.1f} seconds...")
             except Exception as e:
-                # Log unexpected errors more informatively
                 import traceback
 
-                print(f"[REDIS THREAD] Unexpected error in listener loop: {e}")
+                print(f"[REDIS] Unexpected error in listener loop: {e}. Retrying in {delay:.1f} seconds...")
                 print(traceback.format_exc())
-                break  # Exit outer loop on unexpected errors for safety now
             finally:
-                if pubsub:
-                    try:
-                        pubsub.unsubscribe(channel)
-                    except:
-                        pass  # Ignore errors during cleanup
-                    try:
-                        pubsub.close()
-                    except:
-                        pass
-                if listener_redis_conn:
-                    try:
-                        listener_redis_conn.close()
-                    except:
-                        pass
-
-        print("[REDIS THREAD] Listener thread finished.")
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass  # Ignore errors during cleanup
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, REDIS_RECONNECT_MAX_DELAY)
+
+    def enqueue_command(self, message_data):
+        """Queues a command for the dispatcher, the oldest queued command is dropped when the queue is full."""
+        if self.command_queue.full():
+            dropped = self.command_queue.get_nowait()
+            self.commands_dropped += 1
+            print(f"[REDIS] WARNING: Command queue full, dropping oldest command: {dropped}")
+        self.command_queue.put_nowait(message_data)
+
+    async def dispatch_commands(self):
+        """Sends queued commands to the drones one at a time."""
+        while True:
+            message_data = await self.command_queue.get()
+            await self.process_redis_command(message_data)
+
+    def record_command_latency(self, timestamp) -> None:
+        """Stores the time from the command's timestamp until it was sent to the drone WebSocket.
+        Reported in aggregate by command_stats(), not per command."""
+        try:
+            if isinstance(timestamp, (int, float)):
+                sent_at = float(timestamp)
+            else:
+                sent_at = datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            return
+        latency_ms = (time.time() - sent_at) * 1000
+        self.command_latencies_ms.append(latency_ms)
+
+    def command_stats(self) -> dict:
+        latencies = sorted(self.command_latencies_ms)
+        if not latencies:
+            return {"count": 0, "dropped": self.commands_dropped}
+        return {
+            "count": len(latencies),
+            "dropped": self.commands_dropped,
+            "avg_ms": sum(latencies) / len(latencies),
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+            "max_ms": latencies[-1],
+        }
 
     async def process_redis_command(self, message_data):
         """Processes a command received from Redis (runs in the main event loop)."""
@@ -244,6 +217,7 @@ class Communication:
             command = data.get("command")
             payload = data.get("payload", {})  # Default to empty dict if missing
             timestamp = data.get("timestamp")
+            command_id = data.get("command_id")
 
             print(
                 f"[PROCESS CMD] Parsed: Drone='{target_drone_id_str}', Cmd='{command}', Payload={payload}, TS={timestamp}"
@@ -253,6 +227,7 @@ class Communication:
                 print(
                     f"[PROCESS CMD] ERROR: Missing 'target_drone_id' or 'command' in message: {data}"
                 )
+                await self.publish_command_status(command_id, "failed", reason="missing target_drone_id or command")
                 return
 
             try:
@@ -261,26 +236,26 @@ class Communication:
                 print(
                     f"[PROCESS CMD] ERROR: Invalid 'target_drone_id': {target_drone_id_str}. Must be an integer."
                 )
+                await self.publish_command_status(command_id, "failed", reason="invalid target_drone_id")
                 return
 
             response = {
                 "msg_type": command,
                 **payload,  # Merge payload into the response if needed, or handle separately
             }
+            if command_id is not None:
+                response["command_id"] = command_id  # Echoed back by the drone in its Command_ack
             response_json = json.dumps(response)
 
-            active_connections = list(
-                self.connections.items()
-            )  # Get list of (id, ws) pairs
             print(
-                f"[PROCESS CMD] Current active connections: {len(active_connections)}"
+                f"[PROCESS CMD] Current active connections: {len(self.connections)}"
             )
-            connection_index = target_drone_id - 1
+            connection_id = self.registry.connection_of(target_drone_id)
 
-            if 0 <= connection_index < len(active_connections):
-                connection_id, connection_ws = active_connections[connection_index]
+            if connection_id is not None:
+                connection_ws = self.connections.get(connection_id)
                 print(
-                    f"[PROCESS CMD] Target Index: {connection_index}, Connection ID: {connection_id}"
+                    f"[PROCESS CMD] Target Slot: {target_drone_id}, Connection ID: {connection_id}"
                 )
 
                 if connection_ws:
@@ -289,6 +264,8 @@ class Communication:
                             f"Sending message to WebSocket {connection_id}: {response_json}"
                         )
                         await connection_ws.send(response_json)
+                        self.record_command_latency(data.get("sent_at", timestamp))
+                        await self.publish_command_status(command_id, "delivered", drone_id=target_drone_id)
                         print(
                             f"[PROCESS CMD] Successfully sent command '{command}' to drone {target_drone_id} (WS: {connection_id})."
                         )
@@ -297,14 +274,23 @@ class Communication:
                             f"[PROCESS CMD] ERROR: WebSocket connection {connection_id} closed before sending."
                         )
                         self.cleanup_connection(connection_id)  # Clean up if closed
+                        await self.publish_command_status(
+                            command_id, "failed", drone_id=target_drone_id, reason="connection closed"
+                        )
                     except Exception as send_err:
                         print(
                             f"[PROCESS CMD] ERROR: Failed to send message to WebSocket {connection_id}: {send_err}"
                         )
+                        await self.publish_command_status(
+                            command_id, "failed", drone_id=target_drone_id, reason=f"send error: {send_err}"
+                        )
                 else:
                     print(
                         f"[PROCESS CMD] ERROR: WebSocket connection {connection_id} not open or not found."
                     )
+                    await self.publish_command_status(
+                        command_id, "failed", drone_id=target_drone_id, reason="connection not open"
+                    )
                     if (
                         connection_id in self.connections
                     ):  # Check if it still exists in dict
@@ -312,7 +298,10 @@ class Communication:
 
             else:
                 print(
-                    f"[PROCESS CMD] ERROR: Target drone ID {target_drone_id} (index {connection_index}) is out of range for available connections ({len(active_connections)})."
+                    f"[PROCESS CMD] ERROR: No drone connected in slot {target_drone_id} (connected slots: {sorted(self.registry.snapshot())})."
+                )
+                await self.publish_command_status(
+                    command_id, "failed", drone_id=target_drone_id, reason="drone not connected"
                 )
 
         except json.JSONDecodeError:
@@ -326,27 +315,87 @@ class Communication:
             print(f"[PROCESS CMD] ERROR: Unexpected error processing command: {e}")
             print(traceback.format_exc())
 
+    async def publish_command_status(self, command_id, status: str, **fields) -> None:
+        """Publishes a delivery status (delivered, acked or failed) for a command on the ack channel."""
+        if command_id is None:
+            return  # Sender did not ask for acknowledgements
+        message = {"command_id": command_id, "status": status, "timestamp": time.time(), **fields}
+        try:
+            await self.async_redis.publish(COMMAND_ACK_CHANNEL, json.dumps(message))
+        except redis.exceptions.RedisError as e:
+            print(f"[PROCESS CMD] ERROR: Failed to publish status '{status}' for command {command_id}: {e}")
+
+    async def publish_drone_plan(self) -> None:
+        """Stores the planned position of every drone slot in Redis under PLAN_KEY."""
+        self.plan_version += 1
+        plan = {
+            "version": self.plan_version,
+            "ts": time.time(),
+            "drones": {
+                str(slot): {"lat": float(lat), "lng": float(lng), "alt": float(alt), "heading": float(heading)}
+                for slot, (lat, lng, alt, heading) in self.planned_positions.items()
+            },
+        }
+        try:
+            await self.async_redis.set(PLAN_KEY, json.dumps(plan))
+        except redis.exceptions.RedisError as e:
+            print(f"Error publishing drone plan: {e}")
+
+    async def update_drone_plan(self, droneOrigins: list, angles: list) -> None:
+        """Replaces the drone coordinates with a new plan and sends every connected drone its new position.
+
+        Each drone keeps its place in the plan, so the drone given the first coordinate gets the new first coordinate.
+        Drones are matched by plan index, not by coordinate, so equal planned coordinates cannot swap or merge slots.
+        """
+        new_coordinates = [
+            self.transform_coordinates(coord, angle)
+            for coord, angle in zip(droneOrigins, angles)
+        ]
+        if new_coordinates == self.drone_coordinates:
+            return
+        self.drone_coordinates = new_coordinates
+        print(f"Updated drone coordinates: {self.drone_coordinates}")
+
+        for connection_id, index in list(self.plan_indices.items()):
+            if index >= len(new_coordinates):
+                continue
+            assigned_coord = new_coordinates[index]
+            self.coordinates[connection_id] = assigned_coord
+            drone_number = self.registry.slot_of(connection_id)
+            if drone_number is not None:
+                self.planned_positions[drone_number] = assigned_coord
+            await self.send_coords(connection_id)
+        await self.publish_drone_plan()
+
     async def webs_server(self, ws: WebSocketServerProtocol) -> None:
         """Handles WebSocket connections."""
         print("Client connected.")
         connection_id = str(id(ws))
         self.connections[connection_id] = ws
+        identity = ws.remote_address[0] if ws.remote_address else None
+        drone_number = self.registry.register(connection_id, identity)
+        print(f"Client {connection_id} ({identity}) registered as drone {drone_number}.")
         self.create_peer_connection(connection_id)
         await self.start_drone_stream(connection_id)
 
-        available_coords = [
-            coord
-            for coord in self.drone_coordinates
-            if coord not in self.coordinates.values()
+        taken = set(self.plan_indices.values())
+        available_indices = [
+            index
+            for index in range(len(self.drone_coordinates))
+            if index not in taken
         ]
-        assigned_coord = (
-            available_coords[0]
-            if available_coords
-            else self.drone_coordinates[self.client_index % len(self.drone_coordinates)]
+        index = (
+            available_indices[0]
+            if available_indices
+            else self.client_index % len(self.drone_coordinates)
         )
+        assigned_coord = self.drone_coordinates[index]
+        self.plan_indices[connection_id] = index
         self.coordinates[connection_id] = assigned_coord
         self.client_index += 1
         print(f"Assigned coordinate {assigned_coord} to client {connection_id}")
+        self.planned_positions[drone_number] = assigned_coord
+        await self.publish_drone_plan()
 
         try:
             while True:
@@ -372,7 +421,14 @@ class Communication:
             if msg_type == "Coordinate_request":
                 await self.send_coords(connection_id)
             elif msg_type == "Position":
-                self.incoming_position_handler(data, connection_id)
+                await self.incoming_position_handler(data, connection_id)
+            elif msg_type == "Command_ack":
+                await self.publish_command_status(
+                    data.get("command_id"),
+                    "acked",
+                    drone_id=self.registry.slot_of(connection_id),
+                    command=data.get("command"),
+                )
             elif msg_type == "Debug":
                 msg = data.get("msg", "")
                 print(f"Debug message: {msg}")
@@ -460,44 +516,54 @@ class Communication:
         """Cleans up connections and PeerConnections when a client disconnects."""
         self.connections.pop(connection_id, None)
         self.coordinates.pop(connection_id, None)
+        self.plan_indices.pop(connection_id, None)
+        self.registry.unregister(connection_id)
 
         print(f"Connection {connection_id} removed.")
 
-    def start_redis_listener_thread(self):
-        """Starts the Redis listener thread."""
+    def start_redis_listener(self):
+        """Starts the Redis command listener and dispatcher tasks on self.loop."""
         if not self.loop:
-            print("ERROR: Cannot start Redis listener thread, event loop is not set.")
+            print("ERROR: Cannot start Redis listener, event loop is not set.")
             return
 
-        if self.redis_listener_task and self.redis_listener_task.is_alive():
-            print("Redis listener thread already running.")
+        if self.redis_listener_task and not self.redis_listener_task.done():
+            print("Redis listener already running.")
             return
 
-        print("Starting Redis listener thread...")
-        self.redis_listener_stop_event.clear()  # Ensure stop event is clear
-        self.redis_listener_task = threading.Thread(
-            target=self.redis_command_listener,
-            # Pass the global 'r' redis client, channel name, and stop event
-            args=(
-                r,
-                COMMAND_CHANNEL,
-                self.redis_listener_stop_event,
-            ),  # Removed 'self'/'instance' from args
-            daemon=True,  # Thread will exit if main program exits
+        print("Starting Redis listener...")
+        self.command_queue = asyncio.Queue(maxsize=COMMAND_QUEUE_SIZE)
+        self.redis_listener_task = self.loop.create_task(
+            self.redis_command_listener(COMMAND_CHANNEL)
         )
-        self.redis_listener_task.start()
-        print("Started Redis listener thread.")
-
-    def incoming_position_handler(self, data, connection_id):
-        """Handles incoming position data."""
-        lat = data.get("latitude")
-        long = data.get("longitude")
-        altitude = data.get("altitude")
-        # print(f"Handling position: lat={lat}, long={long}, altitude={altitude}")
+        self.command_dispatch_task = self.loop.create_task(self.dispatch_commands())
+        print("Started Redis listener.")
+
+    async def stop_redis_listener(self):
+        """Cancels the Redis command listener and dispatcher tasks."""
+        tasks = [
+            task
+            for task in (self.redis_listener_task, self.command_dispatch_task)
+            if task and not task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"Redis listener stopped. Command stats: {self.command_stats()}")
+
+    async def incoming_position_handler(self, data, connection_id):
+        """Stores the latest position of a drone and publishes it to the telemetry channel."""
         try:
+            drone_number = self.registry.slot_of(connection_id)
+            if drone_number is None:
+                return
             json_data_string = json.dumps(data)
-            r.set(f"position_drone{connection_id}", json_data_string, ex=10)
-        except (TypeError, redis.exceptions.RedisError) as e:
+            update = json.dumps({"drone_id": drone_number, "ts": time.time(), **data})
+            async with self.async_redis.pipeline() as pipe:
+                pipe.set(f"position_drone{drone_number}", json_data_string, ex=POSITION_TTL_SECONDS)
+                pipe.publish(POSITION_CHANNEL, update)
+                await pipe.execute()
+        except (TypeError, ValueError, redis.exceptions.RedisError) as e:
             print(f"Error processing position data: {e}")
 
     ###WEBBRTC###
@@ -555,11 +621,8 @@ class Communication:
                     while True:
                         try:
                             frame = await track.recv()  # recieves yuv420p frame
-                            yuv_frame = frame.to_ndarray(
-                                format="yuv420p"
-                            )  # Convert to YUV420p
-
-                            await self.set_frame(connection_id, yuv_frame)
+                            # BGR conversion and scaling happen on the frame publisher's workers
+                            await self.set_frame(connection_id, frame)
 
                         except Exception as e:
                             print(
@@ -609,28 +672,12 @@ class Communication:
             print(f"[Stream Manager] Error: {e}")
 
     ##THIS IS THE FUNCTION THAT HANDLES THE VIDEO STREAM##
-    async def set_frame(self, connection_id: str, img: np.ndarray):
+    async def set_frame(self, connection_id: str, frame: av.VideoFrame):
+        """Hands a decoded frame to the frame publisher, conversion, encoding and Redis writes happen on its workers."""
         try:
-            # Convert the image to a buffer (JPEG format)
-            ret, buffer = cv2.imencode(".jpg", img)
-            if ret:
-                frame_str = buffer.tobytes().decode("latin1")
-
-                # Redis pipeline for storing the frame and setting TTL
-                drone_number = await self.get_connection_id_number(connection_id)
-                redis_key = f"frame_drone{drone_number}"
-                with r.pipeline() as pipe:
-                    pipe.set(redis_key, frame_str)  # Save the frame
-                    pipe.expire(redis_key, 60)  # Set expiration (60 seconds)
-                    pipe.execute()  # Execute both commands together
-
-            else:
-                print(f"Failed to encode frame for connection {connection_id}")
-
+            drone_number = self.registry.slot_of(connection_id)
+            if drone_number is None:
+                return  # Drone already disconnected
+            self.frame_publisher.submit(drone_number, frame)
         except Exception as e:
             print(f"Error in set_frame: {e}")
-
-    async def get_connection_id_number(self, connection_id):
-        key_list = list(self.connections.keys())
-        connection_id_number = key_list.index(connection_id) + 1
-        return connection_id_number
@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.spatial import ConvexHull
 
 # Exception classes
 
@@ -12,6 +11,8 @@ class ProximityError(Exception):
         super().__init__(message)
 
 class Coordinate:
+    __slots__ = ("lat", "lng", "alt")
+
     def __init__(self, lat, lng, alt=0):
         self.lat = lat
         self.lng = lng
@@ -23,6 +24,175 @@ class Coordinate:
     def __repr__(self): 
         return f"Coordinate(lat={self.lat}, lng={self.lng}, alt={self.alt})"
 
+# Trajectories
+
+TRAJECTORY_DTYPE = np.dtype([("lat", np.float64), ("lng", np.float64), ("alt", np.float64)])
+
+class Trajectory:
+    """Columnar trajectory of one test object, backed by a structured array with the fields lat, lng and alt."""
+    __slots__ = ("points",)
+
+    def __init__(self, points: np.ndarray):
+        if points.dtype != TRAJECTORY_DTYPE:
+            raise ValueError(f"Trajectory points must have dtype {TRAJECTORY_DTYPE}.")
+        self.points = points
+
+    @classmethod
+    def empty(cls, n_points: int) -> "Trajectory":
+        """Preallocates a trajectory of n_points to be filled in place."""
+        return cls(np.empty(n_points, dtype=TRAJECTORY_DTYPE))
+
+    @classmethod
+    def from_coordinates(cls, coords: list[Coordinate]) -> "Trajectory":
+        trajectory = cls.empty(len(coords))
+        for i, coord in enumerate(coords):
+            trajectory.points[i] = (coord.lat, coord.lng, coord.alt)
+        return trajectory
+
+    @property
+    def lat(self) -> np.ndarray:
+        return self.points["lat"]
+
+    @property
+    def lng(self) -> np.ndarray:
+        return self.points["lng"]
+
+    @property
+    def alt(self) -> np.ndarray:
+        return self.points["alt"]
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, index) -> Coordinate:
+        lat, lng, alt = self.points[index].tolist()
+        return Coordinate(lat, lng, alt)
+
+    def __iter__(self):
+        for lat, lng, alt in self.points.tolist():
+            yield Coordinate(lat, lng, alt)
+
+    def __repr__(self):
+        return f"Trajectory({len(self)} points)"
+
+def trajectory_lng_lat(coordslist) -> np.ndarray:
+    """
+    Stacks every trajectory into one (N, 2) array of [lng, lat] rows.
+
+    The output is allocated once and each Trajectory or structured array is copied into
+    it column by column. Lists of Coordinate are still accepted and go through Python.
+    """
+    trajectories = list(coordslist)
+    coords = np.empty((sum(len(t) for t in trajectories), 2))
+    start = 0
+    for trajectory in trajectories:
+        end = start + len(trajectory)
+        if isinstance(trajectory, Trajectory):
+            trajectory = trajectory.points
+        if isinstance(trajectory, np.ndarray):
+            coords[start:end, 0] = trajectory["lng"]
+            coords[start:end, 1] = trajectory["lat"]
+        else:
+            for i, coord in enumerate(trajectory, start):
+                coords[i] = (coord.lng, coord.lat)
+        start = end
+    return coords
+
+# Geometry helpers
+
+MAX_PROJECTION_PAIRS = 1_000_000  # (edge, vertex) pairs projected per chunk in min_area_rectangle_of_hull
+
+class Rectangle:
+    """Oriented rectangle given by its center, unit axes and half extents along each axis."""
+    def __init__(self):
+        self.center = np.array([0.0, 0.0])
+        self.axis = [np.array([0.0, 0.0]), np.array([0.0, 0.0])]
+        self.extent = [0.0, 0.0]
+        self.area = float('inf')
+
+def normalize(v: np.ndarray) -> np.ndarray:
+    """Normalizes a vector."""
+    if np.linalg.norm(v) == 0:
+        raise ValueError("Cannot normalize a zero vector.")
+    return v / np.linalg.norm(v)
+
+def perp(v: np.ndarray) -> np.ndarray:
+    """Returns a perpendicular vector."""
+    if v.shape != (2,):
+        raise ValueError("Input vector must be 2D.")
+    return np.array([-v[1], v[0]])
+
+def min_area_rectangle_of_hull(polygon) -> Rectangle:
+    """
+    Computes the oriented bounding box that encloses the convex hull of the trajectory points.
+
+    Every hull edge is tried as the direction of one rectangle side. The hull vertices
+    are projected onto the axes of all edges with array operations instead of a Python
+    loop per (edge, vertex) pair, giving the same result as checking edge by edge.
+
+    Args:
+        polygon (list | np.ndarray): Hull vertices in order.
+
+    Returns:
+        Rectangle: The rectangle with the smallest area, the first one on ties.
+    """
+    polygon = np.asarray(polygon, dtype=np.float64)
+
+    # Unit direction of every edge and its perpendicular
+    edges = np.roll(polygon, -1, axis=0) - polygon
+    # Per edge norms, rounded exactly like normalize() so the result matches the edge-by-edge version
+    lengths = np.array([np.linalg.norm(edge) for edge in edges])
+    if np.any(lengths == 0):
+        raise ValueError("Cannot normalize a zero vector.")
+    U0 = edges / lengths[:, None]
+    U1 = np.column_stack([-U0[:, 1], U0[:, 0]])
+
+    n = len(polygon)
+    min0, max0, max1 = np.empty(n), np.empty(n), np.empty(n)
+    # Edges are processed in chunks so the pair arrays stay around a million entries
+    chunk = max(1, MAX_PROJECTION_PAIRS // n)
+    for start in range(0, n, chunk):
+        stop = min(n, start + chunk)
+        # D[i, j] is vertex j relative to the origin of edge start + i
+        D = polygon[None, :, :] - polygon[start:stop, None, :]
+        # One 2-element dot product per (edge, vertex) pair, batched as (1, 2) @ (2, 1) products.
+        # These round exactly like np.dot on two vectors, unlike a (h, 2) @ (2, 1) product.
+        pairs = D.reshape(-1, 1, 2)
+        dot0 = (pairs @ np.repeat(U0[start:stop], n, axis=0)[:, :, None]).reshape(stop - start, n)
+        dot1 = (pairs @ np.repeat(U1[start:stop], n, axis=0)[:, :, None]).reshape(stop - start, n)
+
+        # The edge origin itself projects to 0, so the extremes always include 0
+        min0[start:stop] = np.minimum(dot0.min(axis=1), 0)
+        max0[start:stop] = np.maximum(dot0.max(axis=1), 0)
+        max1[start:stop] = np.maximum(dot1.max(axis=1), 0)
+    areas = (max0 - min0) * max1
+
+    best = int(np.argmin(areas))
+    min_rect = Rectangle()
+    min_rect.center = polygon[best] + ((min0[best] + max0[best]) / 2) * U0[best] + (max1[best] / 2) * U1[best]
+    min_rect.axis[0] = U0[best]
+    min_rect.axis[1] = U1[best]
+    min_rect.extent[0] = (max0[best] - min0[best]) / 2
+    min_rect.extent[1] = max1[best] / 2
+    min_rect.area = areas[best]
+    return min_rect
+
+def compute_convex_hull(points: np.ndarray) -> np.ndarray:
+    """Computes the convex hull of a set of points, returns its vertices in order."""
+    from scipy.spatial import ConvexHull  # Imported on first use, scipy.spatial is slow to import
+    hull = ConvexHull(points)
+    return points[hull.vertices]
+
+def are_colinear(points: np.ndarray, tol: float=1e-9) -> bool:
+    """Checks if a set of points are collinear."""
+    if len(points) < 3:
+        return True
+    x0, y0 = points[0]
+    x1, y1 = points[1]
+    rest = np.asarray(points[2:])
+    cp = (x1 - x0) * (rest[:, 1] - y0) - (y1 - y0) * (rest[:, 0] - x0)
+    return not np.any(np.abs(cp) > tol)
+
 # Main function to calculate drone locations
 
 def calculate_Height(area: float) -> float:
@@ -39,7 +209,7 @@ def calculate_Height(area: float) -> float:
         raise HeightError()
 
 def getDronesLoc(
-        coordslist: dict[str, list[Coordinate]], 
+        coordslist: dict[str, "Trajectory | list[Coordinate]"], 
         droneOrigin: Coordinate, 
         n_drones: int=2, 
         overlap: float=0.5
@@ -48,7 +218,8 @@ def getDronesLoc(
     Calculates the drone coverage area and returns the coordinates for the drones to fly to.
     
     Args:
-        coordslist (dict): Dictionary of trajectory coordinates for each vehicle.
+        coordslist (dict): Trajectory of each vehicle, as a Trajectory, a structured array
+            with TRAJECTORY_DTYPE or a list of Coordinate.
         droneOrigin (Coordinate): The origin coordinate of the test.
         n_drones (int): Number of drones to be used in the test.
         overlap (float): The overlap percentage between the drones.
@@ -57,106 +228,14 @@ def getDronesLoc(
         tuple: A tuple containing a list of coordinates for the drones to fly to and the angle of the rectangle.
     """
 
-    # Overlap has to be between 0 and 1
-    if not (0 <= overlap <= 1):
-        raise ValueError("Overlap must be between 0 and 1 (inclusive).")
-    
-    # Proximity error if more than 2 drones and overlap is greater than 0.9
-    if n_drones >= 2 and overlap >= 0.9:
-        raise ProximityError()
-    coords = []
-
-    # Flatten the list of coordinates into an array
-    for coordList in coordslist.values():
-        for coord in coordList:
-            coords.append([coord.lng, coord.lat])
-    coords = np.array(coords)
-
-    # Class to represent a rectangle
-    class Rectangle:
-        def __init__(self):
-            self.center = np.array([0.0, 0.0])
-            self.axis = [np.array([0.0, 0.0]), np.array([0.0, 0.0])]
-            self.extent = [0.0, 0.0]
-            self.area = float('inf')
-
-    # Helper functions
-    def normalize(v: np.ndarray) -> np.ndarray:
-        """Normalizes a vector."""
-        if np.linalg.norm(v) == 0:
-            raise ValueError("Cannot normalize a zero vector.")
-        return v / np.linalg.norm(v)
-
-    def perp(v: np.ndarray) -> np.ndarray:
-        """Returns a perpendicular vector."""
-        if v.shape != (2,):
-            raise ValueError("Input vector must be 2D.")
-        return np.array([-v[1], v[0]])
-
-    def dot(v1: np.ndarray, v2: np.ndarray) -> float:
-        """Returns the dot product of two vectors."""
-        if v1.shape != v2.shape:
-            raise ValueError("Vectors must have the same shape.")
-        return np.dot(v1, v2)
-
-    def min_area_rectangle_of_hull(polygon: list) -> Rectangle:
-        """Computes the oriented bounding box that encloses the convex hull of the trajectory points."""
-        # Initialize the minimum rectangle
-        min_rect = Rectangle()
-        n = len(polygon)
-
-        # Iterate through each edge of the polygon
-        for i0 in range(n):
-
-            # Get the next vertex in the polygon
-            i1 = (i0 + 1) % n
-
-            # Calculate the origin and the two axes of the rectangle
-            origin = polygon[i0]
-            U0 = normalize(polygon[i1] - origin)
-            U1 = perp(U0)
-
-            # Initialize min and max values for the rectangle
-            min0, max0 = 0, 0
-            max1 = 0
-
-            # Project all points onto the axes and find the min/max
-            for j in range(n):
-                D = polygon[j] - origin
-                dot0 = dot(U0, D)
-                min0 = min(min0, dot0)
-                max0 = max(max0, dot0)
-                dot1 = dot(U1, D)
-                max1 = max(max1, dot1)
-            area = (max0 - min0) * max1
-
-            # Update the minimum rectangle if the area is smaller
-            if area < min_rect.area:
-                min_rect.center = origin + ((min0 + max0) / 2) * U0 + (max1 / 2) * U1
-                min_rect.axis[0] = U0
-                min_rect.axis[1] = U1
-                min_rect.extent[0] = (max0 - min0) / 2
-                min_rect.extent[1] = max1 / 2
-                min_rect.area = area
-        return min_rect
-
-    def compute_convex_hull(points: np.ndarray) -> list:
-        """Computes the convex hull of a set of points."""
-        hull = ConvexHull(points)
-        return [points[i] for i in hull.vertices]
-
-    def are_colinear(points: np.ndarray, tol: float=1e-9) -> bool:
-        """Checks if a set of points are collinear."""
-        if len(points) < 3:
-            return True
-        x0, y0 = points[0]
-        x1, y1 = points[1]
-        for x, y in points[2:]:
-            cp = (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0)
-            if abs(cp) > tol:
-                return False
-        return True
+    # Flatten the trajectories into one array
+    coords = trajectory_lng_lat(coordslist.values())
+
+    rect = min_area_rectangle(coords)
+    return plan_drones(rect, droneOrigin, n_drones, overlap)
 
+def min_area_rectangle(coords: np.ndarray) -> Rectangle:
+    """Smallest rectangle around the points, collinear points get a rectangle half as wide as it is long."""
     if are_colinear(coords):
         rect = Rectangle()
         rect.center = np.mean(coords, axis=0)
@@ -174,6 +253,17 @@ def getDronesLoc(
         rect.area = 4 * rect.extent[0] * rect.extent[1]
     else:
         rect = min_area_rectangle_of_hull(compute_convex_hull(coords))
+    return rect
+
+def plan_drones(rect: Rectangle, droneOrigin: Coordinate, n_drones: int=2, overlap: float=0.5) -> tuple[list[Coordinate], float]:
+    """Splits the rectangle between the drones and returns their fly-to coordinates and the angle, see getDronesLoc."""
+    # Overlap has to be between 0 and 1
+    if not (0 <= overlap <= 1):
+        raise ValueError("Overlap must be between 0 and 1 (inclusive).")
+    
+    # Proximity error if more than 2 drones and overlap is greater than 0.9
+    if n_drones >= 2 and overlap >= 0.9:
+        raise ProximityError()
 
     axis = np.array(rect.axis)
     center = np.array(rect.center)
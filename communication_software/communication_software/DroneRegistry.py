@@ -0,0 +1,83 @@
+import threading
+from types import MappingProxyType
+
+
+class DroneRegistry:
+    """Bidirectional map between drone WebSocket connection ids and drone slots.
+
+    Slots are the 1-based drone numbers used in Redis keys (frame_droneN, position_droneN)
+    and as target_drone_id in commands. A slot stays with its connection until that
+    connection is removed, so other drones are never renumbered. A drone that reconnects
+    from the same identity (its IP address) gets its previous slot back if it is still free,
+    otherwise the lowest free slot is used.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()  # The frontend reads the registry from the FastAPI thread
+        self._slot_by_connection = {}
+        self._connection_by_slot = {}
+        self._slot_by_identity = {}  # Last slot used by each identity, kept across disconnects
+
+    def register(self, connection_id: str, identity: str = None) -> int:
+        """Assigns a slot to a new connection and returns it."""
+        with self._lock:
+            if connection_id in self._slot_by_connection:
+                return self._slot_by_connection[connection_id]
+
+            slot = self._slot_by_identity.get(identity)
+            if slot is None or slot in self._connection_by_slot:
+                slot = 1
+                while slot in self._connection_by_slot:
+                    slot += 1
+
+            self._slot_by_connection[connection_id] = slot
+            self._connection_by_slot[slot] = connection_id
+            if identity is not None:
+                self._slot_by_identity[identity] = slot
+            return slot
+
+    def unregister(self, connection_id: str):
+        """Frees the slot of a connection, returns the slot or None if it was not registered."""
+        with self._lock:
+            slot = self._slot_by_connection.pop(connection_id, None)
+            if slot is not None:
+                self._connection_by_slot.pop(slot, None)
+            return slot
+
+    def slot_of(self, connection_id: str):
+        """Returns the slot of a connection or None."""
+        return self._slot_by_connection.get(connection_id)
+
+    def connection_of(self, slot: int):
+        """Returns the connection id in a slot or None."""
+        return self._connection_by_slot.get(slot)
+
+    def __len__(self) -> int:
+        return len(self._slot_by_connection)
+
+    def snapshot(self) -> dict:
+        """Returns a copy of the slot to connection id map."""
+        with self._lock:
+            return dict(self._connection_by_slot)
+
+    def view(self) -> "DroneRegistryView":
+        return DroneRegistryView(self)
+
+
+class DroneRegistryView:
+    """Read-only access to a DroneRegistry, handed to the frontend."""
+
+    def __init__(self, registry: DroneRegistry) -> None:
+        self._registry = registry
+
+    def slot_of(self, connection_id: str):
+        return self._registry.slot_of(connection_id)
+
+    def connection_of(self, slot: int):
+        return self._registry.connection_of(slot)
+
+    def is_connected(self, slot: int) -> bool:
+        return self._registry.connection_of(slot) is not None
+
+    def slots(self) -> MappingProxyType:
+        return MappingProxyType(self._registry.snapshot())
@@ -0,0 +1,17 @@
+# Redis keys of the drone frames, shared by the publisher and the frontend.
+# Kept apart from FramePublisher so readers do not import PyAV and OpenCV.
+
+FRAME_KEY_PREFIX = "frame_drone"
+# Each frame key "frame_droneN" has a "frame_droneN:meta" key holding {"seq", "ts"},
+# and a notification with the same payload is published on "frame_droneN:updates"
+FRAME_META_SUFFIX = ":meta"
+FRAME_UPDATES_SUFFIX = ":updates"
+# The downscaled variant of every frame is stored under "frame_droneN_preview"
+PREVIEW_SUFFIX = "_preview"
+# Annotated frames of each drone, published by image stitching with DETECT_DRONE_STREAMS
+DETECTED_SUFFIX = "_detected"
+
+
+def frame_key(drone_number, suffix: str = "") -> str:
+    """Redis key of a drone's frames, suffix selects the variant, e.g. PREVIEW_SUFFIX."""
+    return f"{FRAME_KEY_PREFIX}{drone_number}{suffix}"
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import av
+import cv2
+import numpy as np
+
+from communication_software.FrameKeys import FRAME_META_SUFFIX, FRAME_UPDATES_SUFFIX, PREVIEW_SUFFIX, frame_key
+
+FRAME_TTL_SECONDS = 60
+STATS_LOG_INTERVAL = 10.0  # Seconds between encoder statistics printouts
+
+
+def parse_size(value: str):
+    """Parses "WIDTHxHEIGHT" into a tuple, an empty string means native resolution."""
+    if not value:
+        return None, None
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+class FrameVariant:
+    """One output of the conversion stage, stored under "frame_droneN<suffix>".
+
+    Conversion from the decoded YUV frame to BGR and the optional scaling are done
+    by a single swscale call in PyAV.
+    """
+
+    def __init__(self, suffix: str, width: int = None, height: int = None) -> None:
+        self.suffix = suffix
+        self.width = width
+        self.height = height
+
+    def convert(self, frame: av.VideoFrame) -> np.ndarray:
+        return frame.reformat(width=self.width, height=self.height, format="bgr24").to_ndarray()
+
+    def __repr__(self) -> str:
+        size = f"{self.width}x{self.height}" if self.width else "native"
+        return f"FrameVariant(frame_droneN{self.suffix}, {size})"
+
+
+def variants_from_env() -> list:
+    """Builds the analysis and preview variants from FRAME_ANALYSIS_SIZE and FRAME_PREVIEW_SIZE.
+
+    The analysis feed (used by the stitcher) defaults to the native resolution and the
+    preview feed (used by the dashboard) to 640x360.
+    """
+    return [
+        FrameVariant("", *parse_size(os.getenv("FRAME_ANALYSIS_SIZE", ""))),
+        FrameVariant(PREVIEW_SUFFIX, *parse_size(os.getenv("FRAME_PREVIEW_SIZE", "640x360"))),
+    ]
+
+
+class FrameStats:
+    """Encoder counters for one drone."""
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_encode_ms = 0.0
+        self.avg_encode_ms = 0.0
+
+    def record_encode(self, elapsed_ms: float) -> None:
+        self.last_encode_ms = elapsed_ms
+        # Exponential moving average, the first sample seeds it
+        if self.published == 0:
+            self.avg_encode_ms = elapsed_ms
+        else:
+            self.avg_encode_ms = 0.9 * self.avg_encode_ms + 0.1 * elapsed_ms
+        self.published += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "published": self.published,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_encode_ms": round(self.last_encode_ms, 2),
+            "avg_encode_ms": round(self.avg_encode_ms, 2),
+        }
+
+
+class FramePublisher:
+    """Converts drone frames to BGR, encodes them to JPEG and publishes them to Redis on a worker pool.
+
+    Every decoded frame is published once per configured FrameVariant. Every drone
+    has a single pending slot. While a frame for a drone is being encoded,
+    newer frames overwrite the slot, so the backlog never grows beyond one frame and
+    the event loop never waits for encoding or Redis.
+    """
+
+    def __init__(self, redis_client, variants: list = None, max_workers: int = None) -> None:
+        if max_workers is None:
+            max_workers = int(os.getenv("FRAME_ENCODE_WORKERS", "2"))
+        self.redis_client = redis_client
+        self.variants = variants if variants is not None else variants_from_env()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="frame-encoder")
+        self.lock = threading.Lock()
+        self.pending = {}  # Newest frame waiting for a worker, per drone number
+        self.busy = set()  # Drone numbers that currently have a worker
+        self.frame_sequence = {}  # Last published frame sequence number per drone number
+        self.stats = {}
+        self.last_stats_log = time.monotonic()
+
+    def submit(self, drone_number: int, frame: av.VideoFrame) -> None:
+        """Queues a frame for encoding, replacing any frame of the same drone that is still waiting."""
+        with self.lock:
+            stats = self.stats.setdefault(drone_number, FrameStats())
+            stats.submitted += 1
+            # The receive time is the frame's capture timestamp for downstream consumers
+            item = (frame, time.time())
+            if drone_number in self.busy:
+                if drone_number in self.pending:
+                    stats.dropped += 1
+                self.pending[drone_number] = item
+                return
+            self.busy.add(drone_number)
+        self.executor.submit(self._worker, drone_number, item)
+
+    def _worker(self, drone_number: int, item: tuple) -> None:
+        """Publishes frames for one drone until its pending slot is empty."""
+        while item is not None:
+            self.encode_and_publish(drone_number, *item)
+            with self.lock:
+                item = self.pending.pop(drone_number, None)
+                if item is None:
+                    self.busy.discard(drone_number)
+        self._maybe_log_stats()
+
+    def encode_and_publish(self, drone_number: int, frame: av.VideoFrame, timestamp: float) -> None:
+        stats = self.stats[drone_number]
+        try:
+            start = time.perf_counter()
+            encoded = {}  # Variants with the same size share one conversion and encode
+            jpegs = []
+            for variant in self.variants:
+                size = (variant.width, variant.height)
+                if size not in encoded:
+                    ret, buffer = cv2.imencode(".jpg", variant.convert(frame))
+                    if not ret:
+                        stats.failed += 1
+                        print(f"Failed to encode frame for drone {drone_number}")
+                        return
+                    encoded[size] = buffer.tobytes()
+                jpegs.append((frame_key(drone_number, variant.suffix), encoded[size]))
+            stats.record_encode((time.perf_counter() - start) * 1000)
+
+            seq = self.frame_sequence.get(drone_number, 0) + 1
+            self.frame_sequence[drone_number] = seq
+            meta = json.dumps({"seq": seq, "ts": timestamp})
+
+            # Frames and metadata are written atomically, then consumers are woken up.
+            # The JPEGs are stored as-is so consumers can forward them without re-encoding.
+            with self.redis_client.pipeline() as pipe:
+                for redis_key, jpeg in jpegs:
+                    pipe.set(redis_key, jpeg, ex=FRAME_TTL_SECONDS)
+                    pipe.set(redis_key + FRAME_META_SUFFIX, meta, ex=FRAME_TTL_SECONDS)
+                    pipe.publish(redis_key + FRAME_UPDATES_SUFFIX, meta)
+                pipe.execute()
+        except Exception as e:
+            stats.failed += 1
+            print(f"Error publishing frame for drone {drone_number}: {e}")
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {drone_number: stats.as_dict() for drone_number, stats in self.stats.items()}
+
+    def _maybe_log_stats(self) -> None:
+        now = time.monotonic()
+        if now - self.last_stats_log < STATS_LOG_INTERVAL:
+            return
+        self.last_stats_log = now
+        for drone_number, stats in self.get_stats().items():
+            print(f"[FramePublisher] Drone {drone_number}: {stats}")
+
+    def shutdown(self) -> None:
+        with self.lock:
+            self.pending.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,103 @@
+import json
+import os
+import time
+
+import numpy as np
+import redis.exceptions
+
+# Latest GNSS fix of every ATOS object, stored in this key and published on this channel.
+# {"ts", "version", "objects": {"id": {"lat", "lng", "alt", "stamp", "received", "fixes"}}}
+OBJECT_POSITIONS_KEY = "object_positions"
+OBJECT_POSITIONS_CHANNEL = "object_positions"
+OBJECT_POSITIONS_TTL_SECONDS = 10
+GNSS_PUBLISH_RATE = float(os.getenv("GNSS_PUBLISH_RATE", "5.0"))  # Snapshots per second
+
+FIX_DTYPE = np.dtype([
+    ("lat", np.float64),
+    ("lng", np.float64),
+    ("alt", np.float64),
+    ("stamp", np.float64),     # Time of the fix from the message header
+    ("received", np.float64),  # Wall clock time the fix was received
+    ("fixes", np.int64),       # Number of fixes received for the object
+])
+
+
+def json_number(value):
+    """NaN is not valid JSON, a missing value (e.g. the altitude of a 2D fix) is sent as null."""
+    return None if value != value else value
+
+
+class GnssAggregator:
+    """
+    Latest GNSS fix of each ATOS object, one row per object in a preallocated array.
+
+    The subscriber callbacks only overwrite their object's row. Readers pick up the
+    rows that changed since their last read with changed_since(), and publish() sends
+    one snapshot of all objects to Redis at most rate times per second.
+    """
+
+    def __init__(self, object_ids, rate: float=GNSS_PUBLISH_RATE) -> None:
+        self.object_ids = list(object_ids)
+        self.index = {object_id: i for i, object_id in enumerate(self.object_ids)}
+        self.fixes = np.zeros(len(self.object_ids), dtype=FIX_DTYPE)
+        self.fixes[["lat", "lng", "alt", "stamp", "received"]] = np.nan
+        self.version = 0
+        self.published_version = 0
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_publish = 0.0
+        self.publish_errors = 0
+
+    def update(self, object_id, lat: float, lng: float, alt: float, stamp: float) -> None:
+        """Stores a fix, fixes from unknown objects are ignored."""
+        i = self.index.get(object_id)
+        if i is None:
+            return
+        row = self.fixes[i]
+        self.fixes[i] = (lat, lng, alt, stamp, time.time(), row["fixes"] + 1)
+        self.version += 1
+
+    def changed_since(self, counts: np.ndarray) -> np.ndarray:
+        """Rows whose fix count differs from counts, which is updated in place for the next call."""
+        changed = self.fixes["fixes"] != counts
+        counts[:] = self.fixes["fixes"]
+        return self.fixes[changed]
+
+    def snapshot(self) -> dict:
+        return {
+            "ts": time.time(),
+            "version": self.version,
+            "objects": {
+                str(object_id): {field: json_number(row[field].item()) for field in FIX_DTYPE.names}
+                for object_id, row in zip(self.object_ids, self.fixes)
+                if row["fixes"] > 0
+            },
+        }
+
+    async def publish(self, redis_client, now: float=None) -> bool:
+        """Stores and publishes a snapshot if there are new fixes and the last one is 1 / rate seconds old."""
+        now = time.monotonic() if now is None else now
+        if self.version == self.published_version or now < self.next_publish:
+            return False
+        self.next_publish = now + self.interval
+        version = self.version
+        snapshot = json.dumps(self.snapshot())
+        try:
+            async with redis_client.pipeline() as pipe:
+                pipe.set(OBJECT_POSITIONS_KEY, snapshot, ex=OBJECT_POSITIONS_TTL_SECONDS)
+                pipe.publish(OBJECT_POSITIONS_CHANNEL, snapshot)
+                await pipe.execute()
+        except redis.exceptions.RedisError as e:
+            self.publish_errors += 1
+            print(f"[GNSS] Error publishing object positions: {e}")
+            return False  # Retried after the interval even without new fixes
+        self.published_version = version
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "objects": len(self.object_ids),
+            "fixes": int(self.fixes["fixes"].sum()),
+            "version": self.version,
+            "published_version": self.published_version,
+            "publish_errors": self.publish_errors,
+        }
@@ -0,0 +1,153 @@
+import os
+import time
+
+import numpy as np
+
+from communication_software.ConvexHullScalable import (Coordinate, are_colinear, compute_convex_hull,
+                                                       min_area_rectangle, plan_drones, trajectory_lng_lat)
+
+EARTH_RADIUS = 6371000
+PLAN_MIN_INTERVAL = float(os.getenv("PLAN_MIN_INTERVAL", "2.0"))  # Seconds between two re-plans
+PLAN_POLL_INTERVAL = float(os.getenv("PLAN_POLL_INTERVAL", "0.1"))  # Seconds between reads of the live positions
+HULL_TOLERANCE = 1e-6  # Meters a point may lie outside the hull and still count as inside
+
+
+def segment_ends(points: np.ndarray) -> np.ndarray:
+    """The two extreme points of a collinear point set, or its only point if all points are equal."""
+    if len(points) == 0:
+        return points
+    first = points[np.argmax(np.linalg.norm(points - points[0], axis=1))]
+    second = points[np.argmax(np.linalg.norm(points - first, axis=1))]
+    if np.array_equal(first, second):
+        return first[None, :]
+    return np.vstack([first, second])
+
+
+def on_segment(points: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Whether each point lies within HULL_TOLERANCE of the segment between the ends."""
+    if len(ends) == 0:
+        return np.zeros(len(points), dtype=bool)
+    start = ends[0]
+    direction = ends[-1] - start
+    relative = points - start
+    length_sq = direction @ direction
+    if length_sq == 0:
+        return np.linalg.norm(relative, axis=1) <= HULL_TOLERANCE
+    t = np.clip(relative @ direction / length_sq, 0, 1)
+    distance = np.linalg.norm(relative - t[:, None] * direction, axis=1)
+    return distance <= HULL_TOLERANCE
+
+
+class IncrementalPlanner:
+    """
+    Keeps the drone plan up to date while the ATOS objects move.
+
+    Only the convex hull of every point seen so far is stored, in the local frame used
+    by getDronesLoc ([y, x] in meters from the origin, y north and x east). A live
+    position inside the hull cannot change the minimum-area rectangle, so it only
+    costs one vectorized containment check. A position outside grows the hull, and
+    update() re-plans at most once every min_interval seconds.
+    """
+
+    def __init__(self, points: np.ndarray, droneOrigin: Coordinate, n_drones: int=2, overlap: float=0.5,
+                 min_interval: float=PLAN_MIN_INTERVAL, plan: tuple=None, is_hull: bool=False) -> None:
+        """
+        Args:
+            points (np.ndarray): Points in the planning frame, see from_trajectories.
+            droneOrigin (Coordinate): The origin coordinate of the test.
+            n_drones (int): Number of drones to be used in the test.
+            overlap (float): The overlap percentage between the drones.
+            min_interval (float): Minimum number of seconds between two re-plans.
+            plan (tuple): The plan for the points if it is already known, e.g. from the plan cache.
+            is_hull (bool): The points already are the counterclockwise hull vertices.
+        """
+        self.origin = droneOrigin
+        self.n_drones = n_drones
+        self.overlap = overlap
+        self.min_interval = min_interval
+        self.lng_scale = EARTH_RADIUS * np.cos(np.radians(droneOrigin.lat)) * np.pi / 180
+        self.lat_scale = EARTH_RADIUS * np.pi / 180
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        # The first plan uses every point, so it matches getDronesLoc also for collinear trajectories
+        self.plan = plan if plan is not None else plan_drones(min_area_rectangle(points), droneOrigin,
+                                                               n_drones, overlap)
+        if is_hull:
+            self.degenerate = are_colinear(points)
+            self.points = points
+        else:
+            self._set_points(points)
+        self.dirty = False
+        self.last_plan_time = time.monotonic()
+
+        self.positions = 0
+        self.outside = 0
+        self.replans = 0
+
+    @classmethod
+    def from_trajectories(cls, trajectories: dict, droneOrigin: Coordinate, **kwargs) -> "IncrementalPlanner":
+        """Plans from the ATOS trajectories, the initial plan is the same as getDronesLoc's."""
+        return cls(trajectory_lng_lat(trajectories.values()), droneOrigin, **kwargs)
+
+    def _set_points(self, points: np.ndarray) -> None:
+        # Collinear point sets have no hull, they are reduced to the two ends of their segment
+        self.degenerate = are_colinear(points)
+        self.points = segment_ends(points) if self.degenerate else compute_convex_hull(points)
+
+    def to_local(self, lats, lngs) -> np.ndarray:
+        """Converts GNSS positions to the planning frame, rows of [north, east] meters from the origin."""
+        north = (np.asarray(lats, dtype=np.float64) - self.origin.lat) * self.lat_scale
+        east = (np.asarray(lngs, dtype=np.float64) - self.origin.lng) * self.lng_scale
+        return np.column_stack([north, east])
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """Whether each point lies inside the current hull, whose vertices are counterclockwise.
+        For a collinear point set, whether each point lies on its segment."""
+        if self.degenerate:
+            return on_segment(points, self.points)
+        edges = np.roll(self.points, -1, axis=0) - self.points
+        relative = points[:, None, :] - self.points[None, :, :]
+        cross = edges[None, :, 0] * relative[:, :, 1] - edges[None, :, 1] * relative[:, :, 0]
+        return np.all(cross >= -HULL_TOLERANCE, axis=1)
+
+    def add_positions(self, lats, lngs) -> int:
+        """
+        Adds live GNSS positions of the test objects.
+
+        Returns:
+            int: The number of positions that fell outside the hull.
+        """
+        points = self.to_local(lats, lngs)
+        points = points[np.all(np.isfinite(points), axis=1)]
+        outside = points[~self.contains(points)]
+        self.positions += len(points)
+        if len(outside):
+            self._set_points(np.vstack([self.points, outside]))
+            self.outside += len(outside)
+            self.dirty = True
+        return len(outside)
+
+    def update(self, now: float=None):
+        """
+        Re-plans if the hull has grown and the last plan is at least min_interval old.
+
+        Returns:
+            tuple | None: (fly-to coordinates, angle) like getDronesLoc, or None if the plan is unchanged.
+        """
+        now = time.monotonic() if now is None else now
+        if not self.dirty or now - self.last_plan_time < self.min_interval:
+            return None
+        # Cleared first, so a plan that raises (e.g. HeightError) is only retried once the hull grows again
+        self.dirty = False
+        self.last_plan_time = now
+        self.plan = plan_drones(min_area_rectangle(self.points), self.origin, self.n_drones, self.overlap)
+        self.replans += 1
+        return self.plan
+
+    def stats(self) -> dict:
+        return {
+            "positions": self.positions,
+            "outside": self.outside,
+            "replans": self.replans,
+            "hull_vertices": len(self.points),
+        }
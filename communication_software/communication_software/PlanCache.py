@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import redis.asyncio
+import redis.exceptions
+
+from communication_software import RedisConnection
+from communication_software.ConvexHullScalable import Coordinate, Trajectory
+
+# Plans are stored as "plan_cache:<sha256 of the scenario>" with
+# {"flyTo": [[lat, lng, alt], ...], "angle", "hull": [[north, east], ...]}
+PLAN_CACHE_PREFIX = "plan_cache:"
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Part of every key, bump it when the planning changes so old plans are not reused
+PLAN_CACHE_VERSION = 1
+
+
+def scenario_key(trajectories: dict, droneOrigin: Coordinate, n_drones: int, overlap: float) -> str:
+    """
+    Content hash of a test scenario.
+
+    Args:
+        trajectories (dict): Trajectory of each object, as accepted by getDronesLoc.
+        droneOrigin (Coordinate): The origin coordinate of the test.
+        n_drones (int): Number of drones to be used in the test.
+        overlap (float): The overlap percentage between the drones.
+
+    Returns:
+        str: The Redis key of the scenario's plan.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "version": PLAN_CACHE_VERSION,
+        "origin": [float(droneOrigin.lat), float(droneOrigin.lng), float(droneOrigin.alt)],
+        "n_drones": int(n_drones),
+        "overlap": float(overlap),
+    }).encode())
+    for object_id in sorted(trajectories, key=str):
+        trajectory = trajectories[object_id]
+        if isinstance(trajectory, Trajectory):
+            points = trajectory.points
+        elif isinstance(trajectory, np.ndarray):
+            points = trajectory
+        else:
+            points = Trajectory.from_coordinates(trajectory).points
+        digest.update(f"{object_id}:{len(points)}:".encode())
+        digest.update(np.ascontiguousarray(points).tobytes())
+    return PLAN_CACHE_PREFIX + digest.hexdigest()
+
+
+def delete_plans(redis_client: redis.Redis, key: str = None) -> int:
+    """Deletes one cached plan, or every cached plan if no key is given. Returns the number deleted.
+    Redis errors are raised."""
+    keys = [key] if key is not None else list(redis_client.scan_iter(match=PLAN_CACHE_PREFIX + "*"))
+    return redis_client.delete(*keys) if keys else 0
+
+
+async def delete_plans_async(redis_client: redis.asyncio.Redis, key: str = None) -> int:
+    """delete_plans for an asyncio client, e.g. from the frontend's event loop."""
+    keys = [key] if key is not None else [k async for k in redis_client.scan_iter(match=PLAN_CACHE_PREFIX + "*")]
+    return await redis_client.delete(*keys) if keys else 0
+
+
+class PlanCache:
+    """Fly-to coordinates, angle and hull of already planned scenarios, kept in Redis.
+
+    Redis errors are printed and treated as a cache miss, so planning works without Redis.
+    """
+
+    def __init__(self, redis_client: redis.Redis = None, ttl: int = PLAN_CACHE_TTL_SECONDS) -> None:
+        self.redis = redis_client if redis_client is not None else RedisConnection.create_client()
+        self.ttl = ttl
+
+    def get(self, key: str):
+        """
+        Returns:
+            tuple | None: ((fly-to coordinates, angle), hull) or None if the scenario is not cached.
+        """
+        try:
+            entry = self.redis.get(key)
+        except redis.exceptions.RedisError as e:
+            print(f"[PLAN CACHE] Could not read cached plan: {e}")
+            return None
+        if entry is None:
+            return None
+        entry = json.loads(entry)
+        flyToList = [Coordinate(lat, lng, alt) for lat, lng, alt in entry["flyTo"]]
+        return (flyToList, entry["angle"]), np.array(entry["hull"], dtype=np.float64).reshape(-1, 2)
+
+    def put(self, key: str, plan: tuple, hull: np.ndarray) -> None:
+        flyToList, angle = plan
+        entry = {
+            "flyTo": [[float(c.lat), float(c.lng), c.alt] for c in flyToList],
+            "angle": float(angle),
+            "hull": np.asarray(hull, dtype=np.float64).tolist(),
+        }
+        try:
+            self.redis.set(key, json.dumps(entry), ex=self.ttl)
+        except redis.exceptions.RedisError as e:
+            print(f"[PLAN CACHE] Could not store plan: {e}")
+
+    def invalidate(self, key: str = None) -> int:
+        """Deletes one cached plan, or every cached plan if no key is given. Returns the number deleted."""
+        try:
+            return delete_plans(self.redis, key)
+        except redis.exceptions.RedisError as e:
+            print(f"[PLAN CACHE] Could not invalidate cached plans: {e}")
+            return 0
@@ -1,14 +1,19 @@
 from atos_interfaces.srv import *
+import os
+from functools import partial
 import rclpy
 from rclpy.node import Node
 import time
 from std_msgs.msg import Empty
 from sensor_msgs.msg import NavSatFix
 # from communication_software.CoordinateHandler import *
-from communication_software.ConvexHullScalable import Coordinate
+from communication_software.ConvexHullScalable import Coordinate, Trajectory, getDronesLoc
+from communication_software.GnssAggregator import GnssAggregator
 #from  CoordinateHandler import *
 import numpy as np
 
+SERVICE_TIMEOUT = float(os.getenv("ATOS_SERVICE_TIMEOUT", "10.0"))  # Deadline in seconds for a batch of service calls
+
 class AtosCommunication(Node):
     """A ROS client node that provides methods for publishing messages to atos/ROS topics 
     and provides a way of getting the origin coordinates from ATOS 
@@ -58,10 +63,16 @@ class AtosCommunication(Node):
         }
 
         self.object_coordinates = {}
+        self.gnss = None  # Latest fix of every object, created by start_coordinate_subscriber
+        self.coordinate_subscribers = []
+
+        # Clients whose service has answered wait_for_service, so later calls skip the wait
+        self.ready_clients = set()
 
         # Make sure that ATOS is running before the instance can be used
         while not self.get_object_control_state_client.wait_for_service(timeout_sec=1.0):
             self.get_logger().warn('ATOS is not running, waiting ...')
+        self.ready_clients.add(self.get_object_control_state_client)
         self.get_logger().info('ATOS is running, waiting 10s to make sure that everything has started')
         # time.sleep(10)
 
@@ -70,21 +81,29 @@ class AtosCommunication(Node):
         """
         self.destroy_node()
 
-    def coordinate_callback(self, msg, id):
-        self.object_coordinates[id] = Coordinate(msg.latitude, msg.longitude, 0)
-        print(str(id) + "     " + str(msg))
+    def coordinate_callback(self, msg, object_id):
+        stamp = msg.header.stamp.sec + msg.header.stamp.nanosec * 1e-9
+        self.gnss.update(object_id, msg.latitude, msg.longitude, msg.altitude, stamp)
 
     def start_coordinate_subscriber(self):
+        """Subscribes to the GNSS fix of every object. The latest fixes are kept in self.gnss.
+        The subscribers are only rebuilt when the object ids have changed since the last call.
+        """
         if len(self.object_coordinates) == 0:
             self.get_object_ids()
-
-        coordinate_subscribers = []
-
-        for id in self.object_coordinates.keys():
-            topic = '/atos/object_' + str(id) + '/gnss_fix'
-
-            coordinate_subscribers.append(
-                self.create_subscription(NavSatFix, topic, lambda msg: self.coordinate_callback(msg, id), self.QOS))
+        object_ids = list(self.object_coordinates.keys())
+        if self.gnss is not None and self.gnss.object_ids == object_ids:
+            return
+
+        for subscriber in self.coordinate_subscribers:
+            self.destroy_subscription(subscriber)
+        self.coordinate_subscribers = []
+        self.gnss = GnssAggregator(object_ids)
+        for object_id in object_ids:
+            topic = '/atos/object_' + str(object_id) + '/gnss_fix'
+            # partial binds this object's id, a lambda in the loop would see the last id for every topic
+            self.coordinate_subscribers.append(
+                self.create_subscription(NavSatFix, topic, partial(self.coordinate_callback, object_id=object_id), self.QOS))
 
     def publish_init(self):
         """Method for publishing an init message to ATOS
@@ -128,29 +147,71 @@ class AtosCommunication(Node):
         self.abort_pub.publish(Empty())
         self.get_logger().info('Publishing Abort signal')
 
-    def get_test_origin_callback(self):
-        """Help method for getting the test origin. This method does the ROS2 service call.
+    def wait_for_service(self, client, timeout=SERVICE_TIMEOUT):
+        """Waits at most timeout seconds for the service of a client. Readiness is cached
+        until a call to the service fails.
 
         Returns:
-            Coordinate | None: Returns a coordinate if successful or None if some problem occurred
+            bool: True if the service is available
         """
-        while not self.get_test_origin_client.wait_for_service(timeout_sec=1.0):
-            self.get_logger().warn('service not available, waiting again...')
+        if client in self.ready_clients:
+            return True
+        if not client.wait_for_service(timeout_sec=timeout):
+            self.get_logger().warn(f'Service {client.srv_name} not available after {timeout}s')
+            return False
+        self.ready_clients.add(client)
+        return True
+
+    def call_all(self, client, requests, timeout=SERVICE_TIMEOUT):
+        """Sends all requests to a service at once and spins until every response has
+        arrived or the deadline has passed, so the total time is that of the slowest call.
 
-        get_test_origin_request = GetTestOrigin.Request()
+        Returns:
+            list: The response to each request, None for calls that failed or timed out
+        """
+        deadline = time.monotonic() + timeout
+        if not self.wait_for_service(client, timeout):
+            return [None] * len(requests)
+
+        futures = [client.call_async(request) for request in requests]
+        for future in futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            rclpy.spin_until_future_complete(self, future, timeout_sec=remaining)
+
+        responses = []
+        for future in futures:
+            if not future.done():
+                future.cancel()
+                self.ready_clients.discard(client)
+                self.get_logger().error(f'Service call to {client.srv_name} timed out after {timeout}s')
+                responses.append(None)
+                continue
+            try:
+                responses.append(future.result())
+            except Exception as e:
+                self.ready_clients.discard(client)
+                self.get_logger().error('Service call failed %r' % (e,))
+                responses.append(None)
+        return responses
+
+    def call(self, client, request, timeout=SERVICE_TIMEOUT):
+        """Does a single service call with a deadline, returns the response or None."""
+        return self.call_all(client, [request], timeout)[0]
 
-        future = self.get_test_origin_client.call_async(get_test_origin_request)
+    def get_test_origin_callback(self):
+        """Help method for getting the test origin. This method does the ROS2 service call.
 
-        # TODO: add timeout for the following line, could spin forever
-        rclpy.spin_until_future_complete(self, future)
-        try:
-            response = future.result()
-        except Exception as e:
-            self.get_logger().error('Service call failed %r' % (e,))
+        Returns:
+            Coordinate | None: Returns a coordinate if successful or None if some problem occurred
+        """
+        response = self.call(self.get_test_origin_client, GetTestOrigin.Request())
+        if response is None:
             return None
 
         if not response.success:
-            self.get_logger().error('et origin service call failed for object %u', id)
+            self.get_logger().error('Get origin service call failed')
             return None
         else:
             self.test_origin = Coordinate(response.origin.position.latitude,
@@ -164,49 +225,45 @@ class AtosCommunication(Node):
         Returns:
             Coordinate | None: Returns a coordinate if successful or None if some problem occurred
         """
-        while not self.get_id_client.wait_for_service(timeout_sec=1.0):
-            self.get_logger().warn('service not available, waiting again...')
-
-        object_ids_req = GetObjectIds.Request()
-        print("Requested object ids received: ",object_ids_req)
-        future = self.get_id_client.call_async(object_ids_req)
-
-        # TODO: add timeout for the following line, could spin forever
-        rclpy.spin_until_future_complete(self, future)
-        try:
-            response = future.result()
-        except Exception as e:
-            self.get_logger().error('Service call failed %r' % (e,))
+        response = self.call(self.get_id_client, GetObjectIds.Request())
+        if response is None:
             return None
 
         if not response.success:
-            self.get_logger().error('get origin service call failed for object %u', id)
+            self.get_logger().error('Get object ids service call failed')
             return None
         else:
-            for object_id in response.ids:
-                self.object_coordinates[object_id] = None
+            # Objects that are no longer in the test are forgotten
+            self.object_coordinates = {object_id: None for object_id in response.ids}
             return list(self.object_coordinates.keys())
 
     def get_object_traj(self, object_id):
-        object_traj_req = GetObjectTrajectory.Request(id=object_id)
-        future = self.get_traj.call_async(object_traj_req)
-        rclpy.spin_until_future_complete(self, future)
-        try:
-            response = future.result()
-        except Exception as e:
-            self.get_logger().error('Service call failed %r' % (e,))
-            return None
+        """Gets the trajectory of one object, see get_object_trajs for several objects.
 
-        if not response.success:
-            self.get_logger().error('et origin service call failed for object %u', id)
-            return None
-        else:
-            trajectories = []
-            for point in response.trajectory.points:
-                trajectories.append(Coordinate(point.pose.position.x,
-                                       point.pose.position.y,
-                                       point.pose.position.z))
-            return trajectories
+        Returns:
+            Trajectory | None: The trajectory, or None if the call failed
+        """
+        return self.get_object_trajs([object_id]).get(object_id)
+
+    def get_object_trajs(self, object_ids, timeout=SERVICE_TIMEOUT):
+        """Gets the trajectories of several objects. All requests are sent at once and
+        gathered with a single deadline.
+
+        Returns:
+            dict: Trajectory of each object id. Objects whose call failed or timed out are left out
+        """
+        requests = [GetObjectTrajectory.Request(id=object_id) for object_id in object_ids]
+        responses = self.call_all(self.get_traj, requests, timeout)
+
+        trajectories = {}
+        for object_id, response in zip(object_ids, responses):
+            if response is None:
+                continue
+            if not response.success:
+                self.get_logger().error(f'Get trajectory service call failed for object {object_id}')
+                continue
+            trajectories[object_id] = trajectory_from_points(response.trajectory.points)
+        return trajectories
 
     def get_object_control_state_callback(self):
         """Method for getting the ATOS state. This changes the instance variable state
@@ -215,20 +272,9 @@ class AtosCommunication(Node):
         Returns:
             str | None: Returns the new state. If there was a problem, None will be returned
         """
-        while not self.get_object_control_state_client.wait_for_service(timeout_sec=1.0):
-            self.get_logger().warn('service not available, waiting again...')
-            self.lost_connection = True
-        self.lost_connection = False
-
-        self.OBC_state_req = GetObjectControlState.Request()
-
-        future = self.get_object_control_state_client.call_async(self.OBC_state_req)
-        # TODO: add timeout for the following line, could spin forever
-        rclpy.spin_until_future_complete(self, future)
-        try:
-            response = future.result()
-        except Exception as e:
-            self.get_logger().error('Service call failed %r' % (e,))
+        response = self.call(self.get_object_control_state_client, GetObjectControlState.Request())
+        self.lost_connection = response is None
+        if response is None:
             return None
         self.state = self.OBC_STATES[response.state]
         return self.state
@@ -257,6 +303,19 @@ class AtosCommunication(Node):
         return origin
 
 
+def trajectory_from_points(points) -> Trajectory:
+    """Fills a preallocated Trajectory straight from the ROS trajectory points,
+    one column at a time, without creating a Coordinate per point.
+    The local x and y of each pose are stored as lat and lng, as before.
+    """
+    n_points = len(points)
+    trajectory = Trajectory.empty(n_points)
+    trajectory.lat[:] = np.fromiter((point.pose.position.x for point in points), np.float64, n_points)
+    trajectory.lng[:] = np.fromiter((point.pose.position.y for point in points), np.float64, n_points)
+    trajectory.alt[:] = np.fromiter((point.pose.position.z for point in points), np.float64, n_points)
+    return trajectory
+
+
 def main():
     """Only for testing.
     """
@@ -278,13 +337,11 @@ def main():
 
     #Gets the trajectories for all of the objects
     ids = atos_communicator.get_object_ids()
-    trajectoryList = {}
-    for id in ids:
-        coordlist = atos_communicator.get_object_traj(id)
-        trajectoryList[id] = coordlist
+    trajectoryList = atos_communicator.get_object_trajs(ids)
 
-    droneOrigin, angle = getNewDroneOrigin(trajectoryList,origo)
-    print(droneOrigin.lat,droneOrigin.lng,droneOrigin.alt)
+    flyToList, angle = getDronesLoc(trajectoryList, origo)
+    for flyTo in flyToList:
+        print(flyTo.lat, flyTo.lng, flyTo.alt)
     print(angle)
 
     #Updates the coordinates of all objects forever
@@ -0,0 +1,29 @@
+import os
+
+import redis
+import redis.asyncio
+import redis.exceptions
+
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = 0
+
+
+def create_client(decode_responses: bool = True) -> redis.Redis:
+    """Creates a Redis client. No connection is made until the first command."""
+    return redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=decode_responses)
+
+
+def create_async_client(decode_responses: bool = True) -> redis.asyncio.Redis:
+    """Creates an asyncio Redis client. It connects inside the event loop that first uses it."""
+    return redis.asyncio.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=decode_responses)
+
+
+def check_connection(client: redis.Redis, name: str) -> None:
+    """Pings Redis, raises redis.exceptions.ConnectionError if it cannot be reached."""
+    try:
+        client.ping()
+        print(f"Successfully connected to Redis ({name})!")
+    except redis.exceptions.ConnectionError as e:
+        print(f"Error connecting to Redis ({name}): {e}")
+        raise
@@ -1,35 +1,56 @@
 import asyncio
+import contextlib
 import json
 import random
+import time
+import uuid
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 import cv2
 import numpy as np
 from datetime import datetime
+from functools import lru_cache
 from itertools import islice
-import redis
 import redis.exceptions
-from communication_software.Communication import Communication
+from communication_software import RedisConnection
+from communication_software.DroneRegistry import DroneRegistryView
+from communication_software.FrameKeys import (DETECTED_SUFFIX, FRAME_META_SUFFIX, FRAME_UPDATES_SUFFIX, PREVIEW_SUFFIX,
+                                              frame_key)
+from communication_software.GnssAggregator import OBJECT_POSITIONS_KEY
+from communication_software.PlanCache import delete_plans_async
 
 
 
-try:
-    r = redis.Redis(host='redis', port=6379, db=0, decode_responses=True)
-    r.ping() # Check if the connection is successful
-    print("Successfully connected to Redis!")
-except redis.exceptions.ConnectionError as e:
-    print(f"Error connecting to Redis: {e}")
-    exit() # Exit if we can't connect
-
 app = FastAPI()
 
 
+@lru_cache(maxsize=None)
+def redis_client(decode_responses: bool = True):
+    """Async Redis client for the FastAPI event loop, created on first use.
+
+    Frames are stored as raw JPEG bytes and are read with decode_responses=False.
+    """
+    return RedisConnection.create_async_client(decode_responses=decode_responses)
+
+
+@app.on_event("startup")
+async def check_redis() -> None:
+    """Fails the server start if Redis cannot be reached."""
+    try:
+        await redis_client().ping()
+        print("Successfully connected to Redis!")
+    except redis.exceptions.ConnectionError as e:
+        print(f"Error connecting to Redis: {e}")
+        raise
+
+drone_registry = None  # Read-only view of the communication server's drone slots, set by run_server
+
+
 # ATOS Simulation
 class ATOSController:
     def __init__(self):
         self.test_active = False
-        self.communication = Communication()
         self.anomalies = False
         self.drone_data = {
             1: {
@@ -52,93 +73,144 @@ class ATOSController:
 atos = ATOSController()
 
 
+POSITION_CHANNEL = "drone_positions"
+TELEMETRY_BATCH_SIZE = 100  # Max position updates merged into one push
+TELEMETRY_QUEUE_SIZE = 2  # Pushes queued per dashboard before the oldest is merged into the newest
+POSITION_FIELDS = {
+    "lat": "latitude",
+    "lng": "longitude",
+    "alt": "altitude",
+    "speed": "speed",
+    "battery": "batteryPercent",
+}
+
+
+class TelemetryHub:
+    """Subscribes once to drone position updates and pushes them to every connected dashboard.
+
+    Updates that arrive together are merged per drone and sent as one batch, so the
+    dashboards follow the real telemetry rate without polling Redis. Each dashboard gets
+    a small bounded queue of changed drone ids, drained by its own websocket handler.
+    A dashboard that cannot keep up has its oldest push merged into the newest one, so
+    it still gets the latest state of every drone without building a backlog.
+    """
+
+    def __init__(self, queue_size: int = TELEMETRY_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.task = None
+        self.pushes_merged = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registers a dashboard, its first push is the last known state of every drone."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if atos.drone_data:
+            queue.put_nowait(set(atos.drone_data))
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def batch(self, drone_ids) -> dict:
+        return {
+            "drones": [{"drone_id": drone_id, **atos.drone_data[drone_id]} for drone_id in drone_ids],
+            "anomaly": atos.anomalies,
+        }
+
+    def apply_update(self, raw: str):
+        """Merges one position message into atos.drone_data, returns the drone id or None if invalid."""
+        try:
+            data_dict = json.loads(raw)
+            drone_id = int(data_dict["drone_id"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"Error decoding position update: {e}. Data: '{raw}'")
+            return None
+
+        values = {field: data_dict.get(key) for field, key in POSITION_FIELDS.items()}
+        if any(value is None for value in values.values()):
+            print(f"Warning: Missing position, battery or speed data fields for drone {drone_id}. Found: {data_dict}")
+            return None
+
+        atos.drone_data.setdefault(drone_id, {}).update(values)
+        return drone_id
+
+    def publish(self, drone_ids: set) -> None:
+        """Queues the changed drone ids for every dashboard, merging into the oldest push when full."""
+        for queue in self.subscribers:
+            if queue.full():
+                drone_ids = drone_ids | queue.get_nowait()
+                self.pushes_merged += 1
+            queue.put_nowait(drone_ids)
+
+    async def send(self, websocket: WebSocket, queue: asyncio.Queue) -> None:
+        """Sends queued pushes to one dashboard, with the drone state at the time of sending."""
+        while True:
+            drone_ids = await queue.get()
+            await websocket.send_json(self.batch(sorted(drone_ids)))
+
+    async def run(self) -> None:
+        print("[TELEMETRY] Listening for drone position updates.")
+        while self.subscribers:
+            pubsub = redis_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(POSITION_CHANNEL)
+                while self.subscribers:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    # Drain whatever else has already arrived so it goes out in the same push
+                    changed = {self.apply_update(message["data"])}
+                    for _ in range(TELEMETRY_BATCH_SIZE - 1):
+                        message = await pubsub.get_message(timeout=0)
+                        if message is None:
+                            break
+                        changed.add(self.apply_update(message["data"]))
+                    changed.discard(None)
+                    if changed:
+                        self.publish(changed)
+            except redis.exceptions.RedisError as e:
+                print(f"[TELEMETRY] Redis error: {e}. Resubscribing...")
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+        print("[TELEMETRY] No drone clients left, stopped listening.")
+
+
+telemetry_hub = TelemetryHub()
+
+
 # WebSocket Endpoints
 @app.websocket("/api/v1/ws/drone")
 async def drone_websocket(websocket: WebSocket):
     await websocket.accept()
     print("Drone client connected")
+    queue = telemetry_hub.subscribe()
+    # Updates are sent from the telemetry queue, the receiver only notices the client leaving
+    sender = asyncio.create_task(telemetry_hub.send(websocket, queue))
+    receiver = asyncio.create_task(receive_until_disconnect(websocket))
     try:
-        while True:
-            processed_data_for_cycle = {} 
-            drone_id=0
-            redis_key_list = r.scan_iter(match="position_drone*")
-            # print(f"redis keys: {redis_key_list}")
-            for redis_key in redis_key_list:
-                drone_id+=1
-                json_data_string = None
-                try:
-                    json_data_string = r.get(redis_key)
-
-                    if json_data_string:
-                        try:
-                            data_dict = json.loads(json_data_string)
-                        except json.JSONDecodeError as e:
-                            print(f"Error decoding JSON for {redis_key}: {e}. Data: '{json_data_string}'")
-                            # Optionally use last known good data if available
-                            if drone_id in atos.drone_data:
-                                processed_data_for_cycle[drone_id] = atos.drone_data[drone_id]
-                            continue # Skip update for this drone this cycle
-
-                        # 3. Safely get values
-                        lat = data_dict.get("latitude")
-                        lng = data_dict.get("longitude")
-                        alt = data_dict.get("altitude")
-                        speed = data_dict.get("speed")
-                        batteryPercent = data_dict.get("batteryPercent")
-
-                        if lat is None or lng is None or alt is None or speed is None or batteryPercent is None:
-                            print(f"Warning: Missing position, battery or speed data fields in {redis_key}. Found: {data_dict}")
-                            if drone_id in atos.drone_data:
-                                processed_data_for_cycle[drone_id] = atos.drone_data[drone_id]
-                            continue 
-
-                        if drone_id not in atos.drone_data:
-                            atos.drone_data[drone_id] = {"battery": 0} 
-                        elif "battery" not in atos.drone_data[drone_id]:
-                             atos.drone_data[drone_id]["battery"] = 0 
-
-                        atos.drone_data[drone_id].update(
-                            {
-                                "lat": lat,
-                                "lng": lng,
-                                "alt": alt,
-                                "speed": speed,
-                                "battery": batteryPercent 
-                            }
-                        )
-                        processed_data_for_cycle[drone_id] = atos.drone_data[drone_id]
-
-                    else:
-                        print(f"No data found in Redis for key: {redis_key}")
-                        if drone_id in atos.drone_data:
-                            processed_data_for_cycle[drone_id] = atos.drone_data[drone_id]
-
-                except redis.exceptions.RedisError as e:
-                    print(f"Redis error while getting/processing {redis_key}: {e}")
-                    if drone_id in atos.drone_data:
-                       processed_data_for_cycle[drone_id] = atos.drone_data[drone_id]
-                except Exception as e:
-                    print(f"An unexpected error occurred processing drone {drone_id}: {e}")
-                    if drone_id in atos.drone_data:
-                        processed_data_for_cycle[drone_id] = atos.drone_data[drone_id]
-
-                await websocket.send_json(
-                    {
-                        "drone_id": drone_id,
-                        **atos.drone_data[drone_id],
-                        "anomaly": atos.anomalies,
-                    }
-                )
-                # print(f"Sent data to client: {processed_data_for_cycle}") # Optional: Verbose logging
-            await asyncio.sleep(0.5) 
-
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
     except WebSocketDisconnect:
         print("Drone client disconnected")
     except Exception as e:
-        print(f"Unexpected error in drone_websocket main loop: {e}")
+        print(f"Unexpected error in drone_websocket: {e!r}")
     finally:
+        telemetry_hub.unsubscribe(queue)
+        sender.cancel()
+        receiver.cancel()
+        with contextlib.suppress(Exception):
+            await websocket.close()
         print("Closing drone websocket connection.")
-        # FastAPI handles closing the connection, but you can add specific cleanup here if needed.
+
+
+async def receive_until_disconnect(websocket: WebSocket) -> None:
+    while True:
+        await websocket.receive_text()
 
 @app.websocket("/api/v1/ws/atos")
 async def atos_websocket(websocket: WebSocket):
@@ -164,11 +236,100 @@ async def atos_websocket(websocket: WebSocket):
         print("ATOS client disconnected")
 
 COMMAND_CHANNEL = "drone_commands"
+COMMAND_ACK_CHANNEL = "drone_command_acks"
+COMMAND_ACK_TIMEOUT = 5.0  # Seconds to wait for delivery and drone acknowledgement
+# Commands the Android client answers with a Command_ack, the others are done once delivered
+ACKED_COMMANDS = frozenset({"flight_arm", "flight_take_off", "flight_return_to_home"})
+
+
+class CommandAckTracker:
+    """Subscribes once to the command ack channel and routes each status to the command waiting for it."""
+
+    def __init__(self) -> None:
+        self.waiting = {}  # command_id -> asyncio.Queue of status messages
+        self.subscribed = asyncio.Event()
+        self.task = None
+
+    async def track(self, command_id: str) -> asyncio.Queue:
+        """Registers a command and returns once statuses for it can be received."""
+        queue = asyncio.Queue()
+        self.waiting[command_id] = queue
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        await asyncio.wait_for(self.subscribed.wait(), COMMAND_ACK_TIMEOUT)
+        return queue
+
+    def forget(self, command_id: str) -> None:
+        self.waiting.pop(command_id, None)
+
+    async def run(self) -> None:
+        while True:
+            pubsub = redis_client().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(COMMAND_ACK_CHANNEL)
+                self.subscribed.set()
+                async for message in pubsub.listen():
+                    try:
+                        status = json.loads(message["data"])
+                    except json.JSONDecodeError:
+                        print(f"Malformed command status: {message['data']}")
+                        continue
+                    queue = self.waiting.get(status.get("command_id"))
+                    if queue is not None:
+                        queue.put_nowait(status)
+            except redis.exceptions.RedisError as e:
+                print(f"Redis error in command ack listener: {e}. Resubscribing...")
+            finally:
+                self.subscribed.clear()
+                await pubsub.aclose()
+            await asyncio.sleep(1.0)
+
+
+ack_tracker = CommandAckTracker()
+
+
+async def relay_command_status(websocket: WebSocket, command: dict, queue: asyncio.Queue, publish_ms: float):
+    """Forwards delivered/acked/failed statuses of one command to the flight manager, with latencies.
+    Commands the drone does not acknowledge end at delivered instead of timing out waiting for an ack."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + COMMAND_ACK_TIMEOUT
+    final_states = ("acked", "failed") if command["command"] in ACKED_COMMANDS else ("delivered", "failed")
+    result = {
+        "drone_id": command["target_drone_id"],
+        "command_sent": command["command"],
+        "command_id": command["command_id"],
+        "publish_ms": publish_ms,
+    }
+    try:
+        while True:
+            status = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+            state = status.get("status")
+            latency_ms = round((status.get("timestamp", time.time()) - command["sent_at"]) * 1000, 3)
+            if state == "delivered":
+                result["deliver_ms"] = latency_ms
+                if command["command"] not in ACKED_COMMANDS:
+                    result["message"] = "Not acknowledged by the drone"
+            elif state == "acked":
+                result["ack_ms"] = latency_ms
+            elif "reason" in status:
+                result["message"] = status["reason"]
+            await websocket.send_json({**result, "status": state})
+            if state in final_states:
+                return
+    except asyncio.TimeoutError:
+        waiting_for = "ack" if "deliver_ms" in result else "delivery"
+        await websocket.send_json({**result, "status": "timeout", "message": f"No {waiting_for} within {COMMAND_ACK_TIMEOUT}s"})
+    except Exception as e:
+        print(f"Error relaying status for command {command['command_id']}: {e}")
+    finally:
+        ack_tracker.forget(command["command_id"])
+
 
 @app.websocket("/api/v1/ws/flightmanager")
 async def flightmanager_websocket(websocket: WebSocket):
     await websocket.accept()
     print("Flight Manager WebSocket connected")
+    relay_tasks = set()
     try:
         while True:
             data = await websocket.receive_json()
@@ -181,36 +342,66 @@ async def flightmanager_websocket(websocket: WebSocket):
                 await websocket.send_json({"status": "error", "message": "Missing drone_id or command"})
                 continue
 
+            if drone_registry is not None and not drone_registry.is_connected(drone_id):
+                print(f"Warning: command '{command}' for drone {drone_id}, which is not connected")
+
             message_to_publish = {
                 "target_drone_id": drone_id,
                 "command": command,
                 "payload": payload,
-                "timestamp": datetime.now().isoformat()
+                "command_id": uuid.uuid4().hex,
+                "timestamp": datetime.now().isoformat(),
             }
-            message_str = json.dumps(message_to_publish)
 
             try:
+                # Subscribe for statuses before publishing so a fast delivery cannot be missed
+                status_queue = await ack_tracker.track(message_to_publish["command_id"])
+                message_to_publish["sent_at"] = time.time()
+                message_str = json.dumps(message_to_publish)
                 print(f"Publishing command to Redis channel '{COMMAND_CHANNEL}': {message_str}")
-                await asyncio.to_thread(r.publish, COMMAND_CHANNEL, message_str) 
+                receivers = await redis_client().publish(COMMAND_CHANNEL, message_str)
+                publish_ms = round((time.time() - message_to_publish["sent_at"]) * 1000, 3)
+                if receivers == 0:
+                    ack_tracker.forget(message_to_publish["command_id"])
+                    await websocket.send_json(
+                        {
+                            "drone_id": drone_id,
+                            "command_sent": command,
+                            "command_id": message_to_publish["command_id"],
+                            "status": "error",
+                            "message": "No communication server is listening for commands"
+                        }
+                    )
+                    continue
+
                 print(f"Successfully published command for drone {drone_id}")
                 await websocket.send_json(
                     {
                         "drone_id": drone_id,
                         "command_sent": command,
-                        "status": "published" 
+                        "command_id": message_to_publish["command_id"],
+                        "status": "published",
+                        "publish_ms": publish_ms,
                     }
                 )
-            except redis.exceptions.RedisError as e:
-                print(f"Redis error publishing command: {e}")
+                task = asyncio.create_task(
+                    relay_command_status(websocket, message_to_publish, status_queue, publish_ms)
+                )
+                relay_tasks.add(task)
+                task.add_done_callback(relay_tasks.discard)
+            except (redis.exceptions.RedisError, asyncio.TimeoutError) as e:
+                ack_tracker.forget(message_to_publish["command_id"])
+                print(f"Redis error publishing command: {e!r}")
                 await websocket.send_json(
                     {
                         "drone_id": drone_id,
                         "command_sent": command,
                         "status": "error",
-                        "message": f"Redis publish error: {e}"
+                        "message": f"Redis publish error: {e!r}"
                     }
                 )
             except Exception as e:
+                 ack_tracker.forget(message_to_publish["command_id"])
                  print(f"Unexpected error publishing command: {e}")
                  await websocket.send_json(
                     {
@@ -226,20 +417,29 @@ async def flightmanager_websocket(websocket: WebSocket):
     except Exception as e:
         print(f"Error in flightmanager_websocket: {e}")
     finally:
+        for task in relay_tasks:
+            task.cancel()
         print("Closing flightmanager websocket")
 
 
 @app.get("/api/v1/video_feed/drone1")
 async def drone1_feed():
     return StreamingResponse(
-        stream_drone_frames(1),
+        stream_drone_frames(1, PREVIEW_SUFFIX),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
 @app.get("/api/v1/video_feed/drone2")
 async def drone2_feed():
     return StreamingResponse(
-        stream_drone_frames(2),
+        stream_drone_frames(2, PREVIEW_SUFFIX),
+        media_type="multipart/x-mixed-replace; boundary=frame"
+    )
+
+@app.get("/api/v1/video_feed/drone{drone_id}/detected")
+async def drone_detected_feed(drone_id: int):
+    return StreamingResponse(
+        stream_drone_frames(drone_id, DETECTED_SUFFIX),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
@@ -250,14 +450,46 @@ async def merged_feed():
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
+@app.get("/api/v1/video_feed/stats")
+async def video_feed_stats():
+    return {redis_key: b.stats() for redis_key, b in broadcasters.items()}
+
+@app.get("/api/v1/drones")
+def connected_drones():
+    if drone_registry is None:
+        return {"drones": []}
+    return {"drones": [
+        {"drone_id": slot, "connection_id": connection_id}
+        for slot, connection_id in sorted(drone_registry.slots().items())
+    ]}
+
+@app.get("/api/v1/objects")
+async def object_positions():
+    """Latest batched GNSS snapshot of the ATOS objects, empty if none was published recently."""
+    snapshot = await redis_client().get(OBJECT_POSITIONS_KEY)
+    if snapshot is None:
+        return {"objects": {}}
+    return json.loads(snapshot)
+
+@app.delete("/api/v1/plan_cache")
+async def clear_plan_cache():
+    """Deletes every cached scenario plan, the next test run plans from the trajectories again."""
+    try:
+        deleted = await delete_plans_async(redis_client())
+    except redis.exceptions.RedisError as e:
+        print(f"Redis error clearing the plan cache: {e!r}")
+        return JSONResponse(status_code=503, content={"status": "error", "message": f"Redis error: {e!r}"})
+    return {"deleted": deleted}
+
 @app.get("/api/v1/health")
 def health_check():
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
 
 
-def run_server(atos_communicator):
-    global ATOScommunicator
+def run_server(atos_communicator, registry_view: DroneRegistryView = None):
+    global ATOScommunicator, drone_registry
     ATOScommunicator = atos_communicator
+    drone_registry = registry_view
     uvicorn.run(
         "communication_software.frontendWebsocket:app",
         host="0.0.0.0",
@@ -266,46 +498,142 @@ def run_server(atos_communicator):
     )
         
         
+FRAME_PART_HEADER = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
+FRAME_QUEUE_SIZE = 2  # Frames buffered per viewer before the oldest is dropped
+FRAME_IDLE_TIMEOUT = 1.0  # Re-check the frame key when no notification arrived for this long
+
+
+@lru_cache(maxsize=None)
+def placeholder_jpeg(drone_id, text: str, color: tuple) -> bytes:
+    """Renders and encodes a placeholder frame once, later calls reuse the bytes."""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(frame, text.format(drone_id=drone_id),
+                (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+    ret, buffer = cv2.imencode(".jpg", frame)
+    return buffer.tobytes() if ret else b""
+
+
+def multipart_frame(jpeg: bytes) -> bytes:
+    """Wraps an already encoded JPEG in a multipart/x-mixed-replace part."""
+    return FRAME_PART_HEADER + jpeg + b"\r\n"
+
+
+class FrameBroadcaster:
+    """Fetches the frames of one feed once and fans them out to every connected viewer.
+
+    The broadcaster sleeps on the feed's update channel and only reads Redis when a
+    frame with a new sequence number has been published. Each viewer gets a small
+    bounded queue. A viewer that cannot keep up loses its oldest queued frame instead
+    of building a backlog.
+    """
+
+    def __init__(self, drone_id, suffix: str = "", queue_size: int = FRAME_QUEUE_SIZE) -> None:
+        self.drone_id = drone_id
+        self.redis_key = frame_key(drone_id, suffix)
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.task = None
+        self.last_seq = None
+        self.last_part = None
+        self.frames_fetched = 0
+        self.frames_dropped = 0
+        self.duplicates_skipped = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registers a viewer and starts the fetch loop if it is not running."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.last_part is not None:
+            # Show the latest frame right away instead of waiting for the next one
+            queue.put_nowait(self.last_part)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def publish(self, part: bytes) -> None:
+        """Puts a multipart frame in every viewer queue, dropping stale frames for slow viewers."""
+        self.last_part = part
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.frames_dropped += 1
+            queue.put_nowait(part)
+
+    async def fetch(self) -> None:
+        """Reads the current frame and publishes it if its sequence number is new."""
+        jpeg, meta = await redis_client(decode_responses=False).mget(self.redis_key, self.redis_key + FRAME_META_SUFFIX)
+        if not jpeg:
+            if self.last_seq is None and self.last_part is not None:
+                return  # Placeholder already shown
+            self.last_seq = None
+            # No frame found in Redis, so send the cached dummy frame.
+            self.publish(multipart_frame(
+                placeholder_jpeg(self.drone_id, "Drone {drone_id} not connected", (255, 255, 255))))
+            return
+
+        seq = json.loads(meta)["seq"] if meta else None
+        if seq is not None and seq == self.last_seq:
+            return  # Already forwarded, e.g. after an idle timeout or a coalesced notification
+        self.last_seq = seq
+        self.frames_fetched += 1
+        self.publish(multipart_frame(jpeg))
+
+    async def run(self) -> None:
+        """Forwards new frames while anyone is watching, then exits."""
+        print(f"[VIDEO] Broadcaster for {self.redis_key} started.")
+        while self.subscribers:
+            pubsub = redis_client(decode_responses=False).pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.redis_key + FRAME_UPDATES_SUFFIX)
+                await self.fetch()
+                while self.subscribers:
+                    # Wakes up on every published frame, the timeout only catches expired feeds
+                    message = await pubsub.get_message(timeout=FRAME_IDLE_TIMEOUT)
+                    if message is not None and json.loads(message["data"])["seq"] == self.last_seq:
+                        self.duplicates_skipped += 1
+                        continue
+                    await self.fetch()
+            except redis.exceptions.RedisError as e:
+                print(f"[VIDEO] Redis error while reading {self.redis_key}: {e}. Retrying...")
+                await asyncio.sleep(FRAME_IDLE_TIMEOUT)
+            finally:
+                await pubsub.aclose()
+        print(f"[VIDEO] Broadcaster for {self.redis_key} stopped, no viewers left.")
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "last_seq": self.last_seq,
+            "frames_fetched": self.frames_fetched,
+            "duplicates_skipped": self.duplicates_skipped,
+            "frames_dropped": self.frames_dropped,
+            "running": self.task is not None and not self.task.done(),
+        }
+
+
+broadcasters = {}
+
+
+def get_broadcaster(drone_id, suffix: str = "") -> FrameBroadcaster:
+    redis_key = frame_key(drone_id, suffix)
+    if redis_key not in broadcasters:
+        broadcasters[redis_key] = FrameBroadcaster(drone_id, suffix)
+    return broadcasters[redis_key]
+
+
 # Video Frames Generation Based on Drone ID
-async def stream_drone_frames(drone_id: int):
-    
-    redis_key = f"frame_drone{drone_id}" 
-    while True:
-        # RTC or capture process is storing a frame in Redis.
-        frame_data = await asyncio.to_thread(r.get, redis_key)
-        if frame_data:
-            # Might need to adjust this if you're using base64 or another format.
-            frame_array = np.frombuffer(frame_data.encode("latin1"), dtype=np.uint8)
-            frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
-            if frame is None:
-                # If decoding fails, fall back to a dummy image.
-                frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(frame, f"Drone {drone_id}: invalid frame",
-                            (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-        else:
-            # No frame found in Redis, so generate a dummy frame.
-            frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(
-                frame,
-                f"Drone {drone_id} not connected",
-                (50, 50),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (255, 255, 255),
-                2,
-            )
-        # Encode frame as JPEG
-        ret, buffer = cv2.imencode(".jpg", frame)
-        if not ret:
-            # If encoding fails, continue to try on the next iteration.
-            await asyncio.sleep(0.033)
-            continue
-
-        yield (
-            b"--frame\r\n"
-            b"Content-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n"
-        )
-        await asyncio.sleep(0.033)  # Approximately 30 frames per second
+async def stream_drone_frames(drone_id: int, suffix: str = ""):
+    broadcaster = get_broadcaster(drone_id, suffix)
+    queue = broadcaster.subscribe()
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        # Runs when the viewer disconnects and the response is cancelled
+        broadcaster.unsubscribe(queue)
 
 
 
@@ -3,20 +3,70 @@ from communication_software.Communication import Communication
 import asyncio
 import time
 import threading
+import traceback
 from communication_software.frontendWebsocket import run_server
-from communication_software.ConvexHullScalable import getDronesLoc, Coordinate
+from communication_software.ConvexHullScalable import Coordinate, HeightError
+from communication_software.IncrementalPlanner import IncrementalPlanner, PLAN_POLL_INTERVAL
+from communication_software.PlanCache import PlanCache, scenario_key
 import communication_software.Interface as Interface
 from communication_software.ROS import AtosCommunication
 import rclpy
+import numpy as np
+import redis.exceptions
+
+N_DRONES = 2
+OVERLAP = 0.5
 
 # --- NEW async wrapper function ---
-async def run_comm_server(communication: Communication, ip: str, droneOrigins: list, angles: list):
+async def run_comm_server(communication: Communication, ip: str, droneOrigins: list, angles: list,
+                          atos_communicator=None, planner: IncrementalPlanner = None):
     loop = asyncio.get_running_loop()
     communication.loop = loop  
 
-    communication.start_redis_listener_thread()
+    communication.start_redis_listener()
 
-    await communication.send_coordinates_websocket(ip=ip, droneOrigins=droneOrigins, angles=angles)
+    positions_task = None
+    if planner is not None:
+        positions_task = loop.create_task(run_live_positions(communication, atos_communicator, planner))
+        positions_task.add_done_callback(log_task_exception)
+    try:
+        await communication.send_coordinates_websocket(ip=ip, droneOrigins=droneOrigins, angles=angles)
+    finally:
+        if positions_task:
+            positions_task.cancel()
+
+def log_task_exception(task: asyncio.Task) -> None:
+    """Prints the exception that ended a background task, it would otherwise be lost."""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background task {task.get_coro().__name__} stopped with an error: {task.exception()!r}")
+        print("".join(traceback.format_exception(task.exception())))
+
+async def run_live_positions(communication: Communication, atos_communicator, planner: IncrementalPlanner):
+    """Collects the GNSS fixes of the ATOS objects, publishes them to Redis in batches,
+    feeds them to the planner and sends new plans to the drones."""
+    gnss = atos_communicator.gnss
+    counts = np.zeros(len(gnss.object_ids), dtype=np.int64)  # Fix count of each object at the last read
+    while True:
+        # Handle the pending GNSS fixes, the node is not spun anywhere else while the server runs
+        for _ in range(len(gnss.object_ids) + 1):
+            rclpy.spin_once(atos_communicator, timeout_sec=0)
+
+        await gnss.publish(communication.async_redis)
+        fresh = gnss.changed_since(counts)
+        if len(fresh):
+            planner.add_positions(fresh["lat"], fresh["lng"])
+
+        try:
+            plan = planner.update()
+        except HeightError as e:
+            print(f"Keeping the current plan, the new area is too large: {e}")
+            plan = None
+        if plan is not None:
+            flyToList, angle = plan
+            print(f"Objects left the planned area, new plan: {[(c.lat, c.lng, c.alt) for c in flyToList]}, angle: {angle}")
+            await communication.update_drone_plan(flyToList, [angle] * len(flyToList))
+
+        await asyncio.sleep(PLAN_POLL_INTERVAL)
 
 def main() -> None:
     Interface.print_welcome()
@@ -25,6 +75,9 @@ def main() -> None:
         rclpy.init()
 
     ATOScommunicator = AtosCommunication()
+    plan_cache = PlanCache()
+    if is_env_true("PLAN_CACHE_CLEAR"):
+        print(f"Cleared {plan_cache.invalidate()} cached plans")
     try:
         while True:
             if Interface.print_menu():
@@ -36,32 +89,42 @@ def main() -> None:
                 origo = Coordinate(lat= 57.685596, lng= 11.978925, alt= 0) 
 
                 ids = ATOScommunicator.get_object_ids()
-                trajectoryList = {}
-                for id in ids:
-                    coordlist = ATOScommunicator.get_object_traj(id)
-                    trajectoryList[id] = coordlist
+                if not ids:
+                    print("Could not get any object ids from ATOS")
+                    continue
+                # All trajectory requests are sent at once, objects that do not answer in time are left out
+                trajectoryList = ATOScommunicator.get_object_trajs(ids)
+                if not trajectoryList:
+                    print("Could not get any trajectories from ATOS")
+                    continue
+
+                # The planner starts from the cached plan of an unchanged scenario and follows the live object positions
+                planner = plan_scenario(plan_cache, trajectoryList, origo)
+                flyToList, angle = planner.plan
 
-                #Create the handler for the communication. sendCoordinatesWebSocket starts a server that will run until it is stopped
-                flyToList, angle = getDronesLoc(trajectoryList,origo)
-                    
                 for i, flyTo in enumerate(flyToList):
                     print(f"Drone {i} going to: (lat, lng, alt) {flyTo.lat, flyTo.lng, flyTo.alt}, \n angle: {angle}, link: https://www.google.com/maps/place/{flyTo.lat},{flyTo.lng}")
                 
                 droneOrigins = tuple([coord for coord in flyToList])
                 angles = angle,angle
+
+                ATOScommunicator.start_coordinate_subscriber()
                 
-                start_server(ATOScommunicator)
+                #Create the handler for the communication. sendCoordinatesWebSocket starts a server that will run until it is stopped
+                try:
+                    communication = Communication()
+                except redis.exceptions.ConnectionError:
+                    continue  # Redis is not reachable, the error has been printed
 
-                communication = Communication()
+                start_server(ATOScommunicator, communication)
 
                 try:
                     print("Communication server starting, press ctrl + c to exit")
-                    asyncio.run(run_comm_server(communication, ip=ip, droneOrigins=droneOrigins, angles=angles))
+                    asyncio.run(run_comm_server(communication, ip=ip, droneOrigins=droneOrigins, angles=angles,
+                                                atos_communicator=ATOScommunicator, planner=planner))
                 except KeyboardInterrupt:
+                    # asyncio.run cancels the Redis listener tasks when it is interrupted
                     print("\nCommunication server interrupted!")
-                    if communication.redis_listener_task and communication.redis_listener_task.is_alive():
-                         communication.redis_listener_stop_event.set()
-                         communication.redis_listener_task.join(timeout=2)
                     continue 
                 except OSError as e:
                     print(f"OS Error starting server: {e}")
@@ -82,8 +145,24 @@ def main() -> None:
             rclpy.shutdown()
         print("Shutdown complete.")
 
-def start_server(atos_communicator):
-    server_thread = threading.Thread(target=run_server, args=(atos_communicator,), daemon=True)
+def plan_scenario(plan_cache: PlanCache, trajectoryList: dict, origo: Coordinate) -> IncrementalPlanner:
+    """Plans the drone positions, reusing the cached plan when the scenario has been planned before."""
+    start = time.perf_counter()
+    key = scenario_key(trajectoryList, origo, N_DRONES, OVERLAP)
+    cached = plan_cache.get(key)
+    if cached is not None:
+        plan, hull = cached
+        planner = IncrementalPlanner(hull, origo, N_DRONES, OVERLAP, plan=plan, is_hull=True)
+        print(f"Using cached plan {key} ({1000 * (time.perf_counter() - start):.1f} ms)")
+        return planner
+
+    planner = IncrementalPlanner.from_trajectories(trajectoryList, origo, n_drones=N_DRONES, overlap=OVERLAP)
+    plan_cache.put(key, planner.plan, planner.points)
+    print(f"Planned scenario {key} ({1000 * (time.perf_counter() - start):.1f} ms)")
+    return planner
+
+def start_server(atos_communicator, communication):
+    server_thread = threading.Thread(target=run_server, args=(atos_communicator, communication.registry.view()), daemon=True)
     server_thread.start()
     print("FastAPI server started in a separate thread!")
 
@@ -102,14 +181,21 @@ def is_debug_mode():
     Retrieves the DEBUG_MODE environment variable and returns it as a boolean.
     Handles various string representations of boolean values.
     """
-    debug_mode_str = os.getenv("DEBUG_MODE", "false").lower() # default to "false" if not set
+    return is_env_true("DEBUG_MODE")
+
+def is_env_true(name):
+    """
+    Retrieves an environment variable and returns it as a boolean.
+    Handles various string representations of boolean values.
+    """
+    value_str = os.getenv(name, "false").lower() # default to "false" if not set
 
-    if debug_mode_str in ("true", "1", "t", "y", "yes"):
+    if value_str in ("true", "1", "t", "y", "yes"):
         return True
-    elif debug_mode_str in ("false", "0", "f", "n", "no", ""):
+    elif value_str in ("false", "0", "f", "n", "no", ""):
         return False
     else:
-        print(f"Warning: Invalid DEBUG_MODE value: {debug_mode_str}.  Treating as false.")
+        print(f"Warning: Invalid {name} value: {value_str}.  Treating as false.")
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+rclpy = pytest.importorskip('rclpy')
+atos_srv = pytest.importorskip('atos_interfaces.srv')
+
+from rclpy.callback_groups import ReentrantCallbackGroup  # noqa: E402
+from rclpy.executors import MultiThreadedExecutor  # noqa: E402
+from rclpy.node import Node  # noqa: E402
+
+from communication_software.ROS import AtosCommunication  # noqa: E402
+
+DELAY = 0.5  # Seconds the stub takes to answer each trajectory request
+OBJECT_IDS = [1, 2, 3, 4]
+
+
+def sequence_element_type(msg, field):
+    """Message class of the elements of a sequence field."""
+    fields = list(type(msg).get_fields_and_field_types())
+    element = msg.SLOT_TYPES[fields.index(field)].value_type
+    return getattr(importlib.import_module('.'.join(element.namespaces)), element.name)
+
+
+class StubAtos(Node):
+    """Answers the ATOS services used by AtosCommunication, slowly."""
+
+    def __init__(self, silent_ids=()):
+        super().__init__('stub_atos')
+        self.silent_ids = set(silent_ids)
+        group = ReentrantCallbackGroup()
+        self.create_service(atos_srv.GetObjectControlState, '/atos/get_object_control_state',
+                            self.control_state, callback_group=group)
+        self.create_service(atos_srv.GetObjectIds, '/atos/get_object_ids', self.object_ids,
+                            callback_group=group)
+        self.create_service(atos_srv.GetObjectTrajectory, '/atos/get_object_trajectory',
+                            self.trajectory, callback_group=group)
+
+    def control_state(self, request, response):
+        response.state = 2
+        return response
+
+    def object_ids(self, request, response):
+        response.success = True
+        response.ids = OBJECT_IDS
+        return response
+
+    def trajectory(self, request, response):
+        time.sleep(4 * DELAY if request.id in self.silent_ids else DELAY)
+        point_type = sequence_element_type(response.trajectory, 'points')
+        points = []
+        for i in range(3):
+            point = point_type()
+            point.pose.position.x = float(request.id)
+            point.pose.position.y = float(i)
+            points.append(point)
+        response.trajectory.points = points
+        response.success = True
+        return response
+
+
+@pytest.fixture
+def atos(request):
+    rclpy.init()
+    stub = StubAtos(**getattr(request, 'param', {}))
+    executor = MultiThreadedExecutor(num_threads=len(OBJECT_IDS) + 2)
+    executor.add_node(stub)
+    thread = threading.Thread(target=executor.spin, daemon=True)
+    thread.start()
+    communicator = AtosCommunication()
+    yield communicator
+    communicator.destroy_node()
+    executor.shutdown()
+    stub.destroy_node()
+    rclpy.shutdown()
+
+
+def test_trajectories_are_fetched_concurrently(atos):
+    ids = atos.get_object_ids()
+    assert ids == OBJECT_IDS
+
+    start = time.monotonic()
+    trajectories = atos.get_object_trajs(ids)
+    elapsed = time.monotonic() - start
+
+    assert sorted(trajectories) == OBJECT_IDS
+    assert list(trajectories[3].lat) == [3.0, 3.0, 3.0]
+    assert list(trajectories[3].lng) == [0.0, 1.0, 2.0]
+    # Serial calls would take len(OBJECT_IDS) * DELAY
+    assert elapsed < 2 * DELAY
+
+
+@pytest.mark.parametrize('atos', [{'silent_ids': [2]}], indirect=True)
+def test_slow_objects_are_dropped_at_the_deadline(atos):
+    start = time.monotonic()
+    trajectories = atos.get_object_trajs(OBJECT_IDS, timeout=2 * DELAY)
+    elapsed = time.monotonic() - start
+
+    assert sorted(trajectories) == [1, 3, 4]
+    assert elapsed < 3 * DELAY
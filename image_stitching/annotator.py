@@ -1,13 +1,131 @@
+import time
+
 import supervision as sv
 
+MAX_LABEL_INTERVAL = 8
+
 class Annotator():
-    def __init__(self) -> None:
+    """
+    Long-lived renderer for detections on the stitched frame.
+
+    The supervision annotators are created once. Label strings are cached per tracker
+    id and only formatted again when the rounded value they show changes.
+
+    Modes:
+        "full": boxes on every frame, GPS and position labels every labelInterval frames.
+        "boxes": boxes only.
+
+    With budgetMs set, the label interval doubles (up to MAX_LABEL_INTERVAL) while the
+    average annotation time is above the budget, and goes back towards labelInterval
+    once it is below half of it.
+    """
+
+    def __init__(self, mode="full", labelInterval=1, budgetMs=None) -> None:
         self.boxAnnotator = sv.BoxAnnotator(thickness=5)
-        self.labelAnnotator = sv.LabelAnnotator(text_scale=1, 
+        self.labelAnnotator = sv.LabelAnnotator(text_scale=1,
                                                 text_position=sv.Position.TOP_LEFT)
         self.positionAnnotator = sv.LabelAnnotator(text_scale=0.5,
                                                    text_position=sv.Position.BOTTOM_LEFT)
-    
+        self.mode = mode
+        self.baseLabelInterval = max(1, labelInterval)
+        self.labelInterval = self.baseLabelInterval
+        self.budgetMs = budgetMs
+        self.frameIndex = 0
+        self.gpsLabelCache = {}  # Tracker id to ((lat, lng) as shown, label)
+        self.positionLabelCache = {}  # Tracker id to ((x, y), label)
+
+        self.frames = 0
+        self.labeledFrames = 0
+        self.lastMs = 0.0
+        self.avgMs = 0.0
+        self.maxMs = 0.0
+
+    def annotate(self, frame, detections, latitudes, longitudes):
+        """
+        Draw tracked detections and their GPS positions according to the mode.
+
+        Args:
+            frame (np.ndarray): Frame to draw on, it is modified in place.
+            detections (sv.Detections): Detections with tracker ids.
+            latitudes (np.ndarray): Latitude of each detection.
+            longitudes (np.ndarray): Longitude of each detection.
+
+        Returns:
+            np.ndarray: The annotated frame.
+        """
+        start = time.perf_counter()
+        frame = self.boxAnnotator.annotate(scene=frame, detections=detections)
+
+        drawLabels = self.mode == "full" and self.frameIndex % self.labelInterval == 0
+        if drawLabels:
+            labels = self.gpsLabels(detections.tracker_id, latitudes, longitudes)
+            positionLabels = self.positionLabels(detections.tracker_id, detections.xyxy)
+            frame = self.labelAnnotator.annotate(scene=frame, detections=detections, labels=labels)
+            frame = self.positionAnnotator.annotate(scene=frame, detections=detections, labels=positionLabels)
+            self.labeledFrames += 1
+        self.frameIndex += 1
+
+        self._record((time.perf_counter() - start) * 1000)
+        return frame
+
+    def gpsLabels(self, trackerIds, latitudes, longitudes):
+        """GPS label of each detection, rounded to 6 decimals, reused while the rounded value is unchanged."""
+        labels = []
+        for trackerId, lat, lng in zip(trackerIds, latitudes, longitudes):
+            shown = (round(float(lat), 6), round(float(lng), 6))
+            cached = self.gpsLabelCache.get(trackerId)
+            if cached is None or cached[0] != shown:
+                cached = (shown, f"ID: {trackerId} GPS: {shown[0]}, {shown[1]}")
+                self.gpsLabelCache[trackerId] = cached
+            labels.append(cached[1])
+        self._pruneCache(self.gpsLabelCache, trackerIds)
+        return labels
+
+    def positionLabels(self, trackerIds, boxes):
+        """Pixel position label of each detection, reused while the box corner is unchanged."""
+        labels = []
+        for trackerId, box in zip(trackerIds, boxes):
+            shown = (int(box[0]), int(box[1]))
+            cached = self.positionLabelCache.get(trackerId)
+            if cached is None or cached[0] != shown:
+                cached = (shown, f"({shown[0]}, {shown[1]})")
+                self.positionLabelCache[trackerId] = cached
+            labels.append(cached[1])
+        self._pruneCache(self.positionLabelCache, trackerIds)
+        return labels
+
+    def _pruneCache(self, cache, trackerIds):
+        # Drop labels of lost tracks once the cache is much larger than the current frame needs
+        if len(cache) > 4 * len(trackerIds) + 100:
+            current = set(trackerIds)
+            for trackerId in [key for key in cache if key not in current]:
+                del cache[trackerId]
+
+    def _record(self, elapsedMs):
+        self.lastMs = elapsedMs
+        self.maxMs = max(self.maxMs, elapsedMs)
+        self.avgMs = elapsedMs if self.frames == 0 else 0.9 * self.avgMs + 0.1 * elapsedMs
+        self.frames += 1
+        if self.budgetMs is None:
+            return
+        if self.avgMs > self.budgetMs and self.labelInterval < MAX_LABEL_INTERVAL:
+            self.labelInterval *= 2
+            self.avgMs = self.budgetMs  # Give the new interval time to show its effect
+        elif self.avgMs < self.budgetMs / 2 and self.labelInterval > self.baseLabelInterval:
+            self.labelInterval = max(self.baseLabelInterval, self.labelInterval // 2)
+            self.avgMs = self.budgetMs / 2
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "label_interval": self.labelInterval,
+            "frames": self.frames,
+            "labeled_frames": self.labeledFrames,
+            "last_ms": round(self.lastMs, 2),
+            "avg_ms": round(self.avgMs, 2),
+            "max_ms": round(self.maxMs, 2),
+        }
+
     def annotateFrame(self, frame, detections, labels, positionLabels):
         frame = self.boxAnnotator.annotate(
             scene=frame,
@@ -1,41 +1,105 @@
 import numpy as np
 import math
 
-def pixelToGps(pixel, cameraLocation, altitude,
-               orientation=0, fov=83.0, resolution=(1920, 1080)):
-    """
-    Converts a pixel position to GPS coordinates, based on camera location, altitude, and FoV.
+EARTH_RADIUS = 6378137  # in meters
+METERS_PER_DEG_LAT = 111111
+
+class CameraModel:
     """
-    EARTH_RADIUS = 6378137  # in meters
-    lat, lon = cameraLocation
-    width, height = resolution
-    x, y = pixel
+    Pixel to ground mapping of a downward facing drone camera.
 
-    # Calculate the field of view in vertical direction based on image aspect ratio
-    fovWidth, fovHeight = fov, fov * (height / width)
+    Everything that only depends on the camera (ground size of a pixel, rotation matrix,
+    meters to degrees factors) is computed once, so mapping a batch of pixels is a few
+    array operations. Batch methods take an (N, 2) array, or any array with a last axis
+    of size 2, and return an array of the same shape.
+    """
 
-    # Calculate the ground distance covered by the image
-    groundHeight = 2 * (np.tan(np.radians(fovHeight / 2)) * altitude)
-    groundWidth = 2 * (np.tan(np.radians(fovWidth / 2)) * altitude)
+    def __init__(self, cameraLocation, altitude, orientation=0, fov=83.0, resolution=(1920, 1080)):
+        """
+        Args:
+            cameraLocation (tuple): (lat, lon) of the camera.
+            altitude (float): Height above the ground in meters.
+            orientation (float): Heading of the top of the image in degrees, clockwise from north.
+            fov (float): Horizontal field of view in degrees.
+            resolution (tuple): (width, height) of the image in pixels.
+        """
+        self.lat, self.lon = cameraLocation
+        width, height = resolution
+
+        # Calculate the field of view in vertical direction based on image aspect ratio
+        fovWidth, fovHeight = fov, fov * (height / width)
+
+        # Ground distance covered by each pixel
+        groundWidth = 2 * (np.tan(np.radians(fovWidth / 2)) * altitude)
+        groundHeight = 2 * (np.tan(np.radians(fovHeight / 2)) * altitude)
+        self.pixelScale = np.array([groundWidth / width, groundHeight / height])
+        self.center = np.array([width / 2, height / 2])
+
+        # Row vector form of the orientation rotation: [x, y] @ rotation
+        orientationRad = np.radians(orientation)
+        cos, sin = np.cos(orientationRad), np.sin(orientationRad)
+        self.rotation = np.array([[cos, -sin], [sin, cos]])
+
+        # Meters east/north to degrees lon/lat
+        self.degreesPerMeter = np.array([
+            (180 / np.pi) / (EARTH_RADIUS * np.cos(np.radians(self.lat))),
+            (180 / np.pi) / EARTH_RADIUS,
+        ])
+
+    def offsetsFromDrone(self, pixels):
+        """
+        (x, y) meter offsets of pixels from the point below the camera, in image axes.
+
+        Args:
+            pixels (np.ndarray): (N, 2) pixel coordinates.
+
+        Returns:
+            np.ndarray: (N, 2) offsets, x to the right and y to the top of the image.
+        """
+        pixels = np.asarray(pixels, dtype=np.float64)
+        offsets = (pixels - self.center) * self.pixelScale
+        offsets[..., 1] *= -1  # Invert Y axis
+        return offsets
+
+    def pixelsToGps(self, pixels):
+        """
+        GPS coordinates of pixels.
+
+        Args:
+            pixels (np.ndarray): (N, 2) pixel coordinates.
+
+        Returns:
+            np.ndarray: (N, 2) array of (lat, lon).
+        """
+        eastNorth = (self.offsetsFromDrone(pixels) @ self.rotation) * self.degreesPerMeter
+        return np.stack([self.lat + eastNorth[..., 1], self.lon + eastNorth[..., 0]], axis=-1)
+
+def gpsDeltasToMeters(originCoord, coords):
+    '''
+    Calculates the (x,y) meter offsets of many gps coordinates from one origin
 
-    # Calculate the ground distance covered by each pixel
-    pixelWidth = groundWidth / width
-    pixelHeight = groundHeight / height
+    coords is an (N,2) array of (lat, lon), returns an (N,2) array of (east, north) meters
+    '''
+    coords = np.asarray(coords, dtype=np.float64)
+    deltaLat = coords[..., 0] - originCoord[0]
+    deltaLon = coords[..., 1] - originCoord[1]
 
-    # Calculate offsets for the given pixel from the image center
-    xOffset = pixelWidth * (x - width / 2)
-    yOffset = pixelHeight * (height / 2 - y)  # Invert Y axis
+    # Convert differences to meters (approximation)
+    deltaLatMeters = deltaLat * METERS_PER_DEG_LAT
+    deltaLonMeters = deltaLon * METERS_PER_DEG_LAT * np.cos(np.radians((originCoord[0] + coords[..., 0]) / 2))
 
-    # Rotate the offsets by the orientation
-    orientationRad = np.radians(orientation)
-    xOffsetRotated = xOffset * np.cos(orientationRad) + yOffset * np.sin(orientationRad)
-    yOffsetRotated = -xOffset * np.sin(orientationRad) + yOffset * np.cos(orientationRad)
+    return np.stack([deltaLonMeters, deltaLatMeters], axis=-1)
 
-    # Calculate new coordinates
-    deltaLat = (yOffsetRotated / EARTH_RADIUS) * (180 / np.pi)
-    deltaLon = (xOffsetRotated / (EARTH_RADIUS * np.cos(np.radians(lat)))) * (180 / np.pi)
+def pixelToGps(pixel, cameraLocation, altitude,
+               orientation=0, fov=83.0, resolution=(1920, 1080)):
+    """
+    Converts a pixel position to GPS coordinates, based on camera location, altitude, and FoV.
 
-    return lat + deltaLat, lon + deltaLon
+    For many pixels with the same camera, use CameraModel.pixelsToGps.
+    """
+    camera = CameraModel(cameraLocation, altitude, orientation, fov, resolution)
+    gps = camera.pixelsToGps(np.stack(np.broadcast_arrays(*pixel), axis=-1))
+    return gps[..., 0][()], gps[..., 1][()]
 
 def gpsDeltaToMeters(originCoord, coord):
     '''
@@ -44,7 +108,7 @@ def gpsDeltaToMeters(originCoord, coord):
 
     Useful for testing gps calculation accuracy
     '''
-    metersPerDegLat = 111111
+    metersPerDegLat = METERS_PER_DEG_LAT
 
     delatLat = coord[0] - originCoord[0]
     deltaLon = coord[1] - originCoord[1]
@@ -56,24 +120,6 @@ def gpsDeltaToMeters(originCoord, coord):
     return deltaLonMeters, deltaLatMeters
 
 def offsetFromDrone(pixel, resolution, altitude, fov):
-    resolutionWidth, resolutionHeight = resolution
-    x, y = pixel
-
-    fovWidth, fovHeight = fov, fov * (resolutionHeight / resolutionWidth)
-
-    groundHeight = 2 * (np.tan(np.radians(fovHeight / 2)) * altitude)
-    groundWidth = 2 * (np.tan(np.radians(fovWidth / 2)) * altitude)
-
-    pixelWidth = groundWidth / resolutionWidth
-    pixelHeight = groundHeight / resolutionHeight
-
-    centerX = resolutionWidth / 2
-    centerY = resolutionHeight / 2
-
-    pixelOffsetX = x - centerX
-    pixelOffsetY = centerY - y
-
-    xOffset = pixelOffsetX * pixelWidth
-    yOffset = pixelOffsetY * pixelHeight
-
-    return xOffset, yOffset
\ No newline at end of file
+    camera = CameraModel((0.0, 0.0), altitude, fov=fov, resolution=resolution)
+    offsets = camera.offsetsFromDrone(np.stack(np.broadcast_arrays(*pixel), axis=-1))
+    return offsets[..., 0][()], offsets[..., 1][()]
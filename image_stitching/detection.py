@@ -0,0 +1,429 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import supervision as sv
+
+STREAM_ACTIVE_WINDOW = 1.0  # Seconds since its last frame during which a stream counts as active for batching
+PROCESS_POLL_INTERVAL = 1.0  # Seconds between checks that the inference process is still alive
+
+
+def load_model(model_path: str):
+    """Load the YOLO model for CPU inference."""
+    from ultralytics import YOLO
+    return YOLO(model_path)
+
+
+def predict_batch(model, frames: list, imgsz: int, conf: float) -> list:
+    """
+    Run YOLO on a batch of frames.
+
+    Args:
+        model: Loaded YOLO model.
+        frames (list): BGR frames, they may have different sizes.
+        imgsz (int): Inference input size.
+        conf (float): Confidence threshold.
+
+    Returns:
+        list: (xyxy, confidence, class_id) arrays per frame.
+    """
+    results = model.predict(frames, imgsz=imgsz, conf=conf, device="cpu", verbose=False)
+    return [
+        (result.boxes.xyxy.cpu().numpy(),
+         result.boxes.conf.cpu().numpy(),
+         result.boxes.cls.cpu().numpy().astype(int))
+        for result in results
+    ]
+
+
+def inference_process(model_path: str, conf: float, requests, results) -> None:
+    """
+    Entry point of the out of process backend, answers (frames, imgsz) batches until it receives None.
+    Sends "ready" once the model is loaded, or the error if it cannot be loaded.
+    """
+    try:
+        model = load_model(model_path)
+    except Exception as e:
+        results.put(RuntimeError(f"Could not load the YOLO model {model_path}: {e!r}"))
+        return
+    results.put("ready")
+    while True:
+        batch = requests.get()
+        if batch is None:
+            break
+        frames, imgsz = batch
+        try:
+            results.put(predict_batch(model, frames, imgsz, conf))
+        except Exception as e:
+            results.put(e)
+
+
+class DetectionRequest:
+    def __init__(self, stream: str, frame: np.ndarray, imgsz: int) -> None:
+        self.stream = stream
+        self.frame = frame
+        self.imgsz = imgsz
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class DetectionService:
+    """
+    Shared YOLO inference for several video streams.
+
+    Frames submitted from any stream (for example "drone1", "drone2" and "merged") are
+    collected into batches of up to max_batch frames. A batch waits at most max_wait
+    seconds for frames of the other streams that submitted within STREAM_ACTIVE_WINDOW,
+    and not at all when its stream is the only active one. Every stream has its own ByteTrack tracker, so tracker ids of
+    one stream are never affected by another.
+
+    Inference runs on the CPU. With out_of_process the model lives in a child process,
+    so inference never competes with stitching and encoding for the GIL.
+
+    Example:
+        service = DetectionService()
+        service.start()
+        detections = service.detect("merged", frame)
+    """
+
+    def __init__(self, model_path: str = "models/best.pt", imgsz: int = 1280, conf: float = 0.10,
+                 max_batch: int = 4, max_wait: float = 0.01, out_of_process: bool = False) -> None:
+        """
+        Args:
+            model_path (str): Path of the YOLO weights.
+            imgsz (int): Inference input size.
+            conf (float): Confidence threshold.
+            max_batch (int): Largest number of frames inferred together.
+            max_wait (float): Seconds to wait for more frames once a batch has been started.
+            out_of_process (bool): Run the model in a child process.
+        """
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.conf = conf
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.out_of_process = out_of_process
+        self.requests = queue.Queue()
+        self.trackers = {}  # Stream name to its ByteTrack tracker
+        self.thread = threading.Thread(target=self._run, name="detection", daemon=True)
+        self.model = None  # Loaded by the worker before the first inference
+        self.last_submit = {}  # Stream name to the time of its last frame
+        self.process = None
+        self.process_ready = False
+        self.process_error = None  # Set when the child process failed, later batches fail immediately
+        self.process_requests = None
+        self.process_results = None
+
+        self.batches = 0
+        self.frames = 0
+        self.errors = 0
+        self.last_batch_size = 0
+        self.avg_batch_size = 0.0
+        self.avg_inference_ms = 0.0  # Per frame
+        self.avg_queue_wait_ms = 0.0
+
+    def start(self) -> None:
+        """
+        Start batching. The model is loaded before the first inference, in the worker
+        thread or in the child process, so starting the service returns immediately.
+        """
+        if self.out_of_process:
+            context = multiprocessing.get_context("spawn")
+            self.process_requests = context.Queue(maxsize=1)
+            self.process_results = context.Queue()
+            self.process = context.Process(
+                target=inference_process,
+                args=(self.model_path, self.conf, self.process_requests, self.process_results),
+                name="detection-inference", daemon=True)
+            self.process.start()
+        print(f"[INFO] Detection service running on CPU (imgsz={self.imgsz}, max_batch={self.max_batch}, "
+              f"out_of_process={self.out_of_process})")
+        self.thread.start()
+
+    def submit(self, stream: str, frame: np.ndarray, imgsz: int = None) -> Future:
+        """
+        Queue a frame for detection.
+
+        Args:
+            stream (str): Name of the stream the frame belongs to.
+            frame (np.ndarray): BGR frame.
+            imgsz (int): Inference input size for this frame, defaults to the service's.
+
+        Returns:
+            Future: Resolves to the tracked sv.Detections of the frame.
+        """
+        request = DetectionRequest(stream, frame, imgsz or self.imgsz)
+        self.last_submit[stream] = request.enqueued
+        self.requests.put(request)
+        return request.future
+
+    def detect(self, stream: str, frame: np.ndarray, imgsz: int = None) -> sv.Detections:
+        """Detect and track objects in a frame, waiting for the result."""
+        return self.submit(stream, frame, imgsz).result()
+
+    def _active_streams(self, now: float) -> set:
+        return {stream for stream, last in list(self.last_submit.items()) if now - last < STREAM_ACTIVE_WINDOW}
+
+    def _next_batch(self) -> list:
+        batch = [self.requests.get()]
+        if batch[0] is None:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            # Only wait while another active stream may still add its frame to this batch
+            waiting_for = self._active_streams(time.perf_counter()) - {request.stream for request in batch}
+            timeout = max(0.0, deadline - time.perf_counter()) if waiting_for else 0.0
+            try:
+                request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self.requests.put(None)  # Finish this batch, stop on the next call
+                break
+            batch.append(request)
+        return batch
+
+    def _infer(self, frames: list, imgsz: int) -> list:
+        if not self.out_of_process:
+            if self.model is None:
+                self.model = load_model(self.model_path)
+            return predict_batch(self.model, frames, imgsz, self.conf)
+        if self.process_error is not None:
+            raise self.process_error
+        if not self.process_ready:
+            ready = self._process_result()  # Wait until the child has loaded the model
+            if isinstance(ready, Exception):
+                self.process_error = ready
+                raise ready
+            self.process_ready = True
+        self.process_requests.put((frames, imgsz))
+        result = self._process_result()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _process_result(self):
+        """Next message from the child process, raises if the process has exited without sending one."""
+        while True:
+            try:
+                return self.process_results.get(timeout=PROCESS_POLL_INTERVAL)
+            except queue.Empty:
+                if self.process.is_alive():
+                    continue
+            try:
+                return self.process_results.get_nowait()  # Sent just before the child exited
+            except queue.Empty:
+                self.process_error = RuntimeError(
+                    f"Detection process exited with code {self.process.exitcode}")
+                raise self.process_error
+
+    def _run(self) -> None:
+        while True:
+            requests = self._next_batch()
+            if not requests:
+                break
+            # One model call per input size, frames of the same size are batched together
+            for imgsz in dict.fromkeys(request.imgsz for request in requests):
+                self._process([request for request in requests if request.imgsz == imgsz], imgsz)
+
+    def _process(self, batch: list, imgsz: int) -> None:
+        start = time.perf_counter()
+        try:
+            outputs = self._infer([request.frame for request in batch], imgsz)
+        except Exception as e:
+            self.errors += 1
+            print(f"[ERROR] Detection failed for a batch of {len(batch)} frames: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+        self._record(batch, start, elapsed)
+
+        for request, (xyxy, confidence, class_id) in zip(batch, outputs):
+            detections = sv.Detections(xyxy=xyxy.reshape(-1, 4), confidence=confidence, class_id=class_id)
+            tracker = self.trackers.setdefault(request.stream, sv.ByteTrack())
+            request.future.set_result(tracker.update_with_detections(detections))
+
+    def _record(self, batch: list, start: float, elapsed: float) -> None:
+        queue_wait = sum(start - request.enqueued for request in batch) / len(batch)
+        # Exponential moving averages, the first batch seeds them
+        weight = 0.1 if self.batches else 1.0
+        self.avg_batch_size += weight * (len(batch) - self.avg_batch_size)
+        self.avg_inference_ms += weight * (1000 * elapsed / len(batch) - self.avg_inference_ms)
+        self.avg_queue_wait_ms += weight * (1000 * queue_wait - self.avg_queue_wait_ms)
+        self.last_batch_size = len(batch)
+        self.batches += 1
+        self.frames += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "errors": self.errors,
+            "queued": self.requests.qsize(),
+            "last_batch_size": self.last_batch_size,
+            "avg_batch_size": round(self.avg_batch_size, 2),
+            "avg_inference_ms_per_frame": round(self.avg_inference_ms, 2),
+            "avg_queue_wait_ms": round(self.avg_queue_wait_ms, 2),
+        }
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish the queued frames and stop the worker and the child process."""
+        self.requests.put(None)
+        self.thread.join(timeout)
+        if self.process is not None:
+            try:
+                self.process_requests.put(None, timeout=timeout)
+            except queue.Full:
+                pass  # The child is not reading any more
+            self.process.join(timeout)
+
+
+# (imgsz, stride) from best quality to cheapest. Detection runs on every stride-th frame.
+ADAPTIVE_LEVELS = ((1280, 1), (960, 1), (640, 1), (640, 2), (480, 2), (480, 3), (320, 4))
+
+
+class AdaptiveDetector:
+    """
+    Detection for one stream that holds a target output frame rate on the CPU.
+
+    The inference latency is measured on every detected frame. When the cost per output
+    frame (latency / stride) is above the frame budget, the next cheaper level in
+    ADAPTIVE_LEVELS is used; when it is well below, the next better level. Levels change
+    at most once per adjust_interval seconds so one slow frame does not cause flapping.
+
+    On skipped frames the last tracked boxes are moved with the velocity each tracker
+    id had between its last two detections, so boxes keep following the objects.
+    """
+
+    def __init__(self, service: DetectionService, stream: str, target_fps: float = 10.0,
+                 levels: tuple = ADAPTIVE_LEVELS, adjust_interval: float = 2.0) -> None:
+        """
+        Args:
+            service (DetectionService): Started detection service.
+            stream (str): Stream name used for the service and its tracker.
+            target_fps (float): Output frame rate to hold, 0 always uses the first level.
+            levels (tuple): (imgsz, stride) levels, best quality first.
+            adjust_interval (float): Smallest number of seconds between level changes.
+        """
+        self.service = service
+        self.stream = stream
+        self.target_fps = target_fps
+        self.levels = levels
+        self.adjust_interval = adjust_interval
+        self.level = 0
+        self.last_adjust = time.monotonic()
+        self.avg_latency = None  # Seconds, at the current level
+        self.frame_index = 0
+        self.last_detections = None
+        self.last_time = None
+        self.velocities = {}  # Tracker id to xyxy change per second
+        self.detected = 0
+        self.propagated = 0
+        self.output_fps = 0.0
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def detect(self, frame: np.ndarray) -> sv.Detections:
+        """
+        Detections for a frame, inferred or propagated from the last inference.
+
+        Args:
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            sv.Detections: Tracked detections.
+        """
+        now = time.monotonic()
+        imgsz, stride = self.levels[self.level]
+        if self.infers_next():
+            start = time.perf_counter()
+            detections = self.service.detect(self.stream, frame, imgsz)
+            self._adjust(time.perf_counter() - start, stride)
+            self._update_velocities(detections, now)
+            self.detected += 1
+        else:
+            detections = self._propagate(now)
+            self.propagated += 1
+        self.frame_index += 1
+        self._count_frame(now)
+        return detections
+
+    def infers_next(self) -> bool:
+        """Whether the next frame is inferred at the current level's imgsz, otherwise its boxes are propagated."""
+        return self.last_detections is None or self.frame_index % self.levels[self.level][1] == 0
+
+    def _adjust(self, latency: float, stride: int) -> None:
+        if self.detected == 0:
+            return  # The first inference includes loading the model
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+        now = time.monotonic()
+        if not self.target_fps or now - self.last_adjust < self.adjust_interval:
+            return
+
+        cost = self.avg_latency / stride  # Inference seconds per output frame
+        budget = 1.0 / self.target_fps
+        if cost > budget and self.level + 1 < len(self.levels):
+            self._set_level(self.level + 1, now)
+        elif self.level > 0:
+            # Estimate the better level's cost, inference time grows with the input area
+            better_imgsz, better_stride = self.levels[self.level - 1]
+            imgsz = self.levels[self.level][0]
+            better_cost = self.avg_latency * (better_imgsz / imgsz) ** 2 / better_stride
+            if better_cost < 0.8 * budget:
+                self._set_level(self.level - 1, now)
+
+    def _set_level(self, level: int, now: float) -> None:
+        imgsz, stride = self.levels[level]
+        print(f"[INFO] Detection level for '{self.stream}': {self.level} -> {level} (imgsz={imgsz}, every {stride} frames)")
+        self.level = level
+        self.last_adjust = now
+        self.avg_latency = None  # Re-measure at the new level
+
+    def _update_velocities(self, detections: sv.Detections, now: float) -> None:
+        previous = self.last_detections
+        velocities = {}
+        if previous is not None and previous.tracker_id is not None and detections.tracker_id is not None and now > self.last_time:
+            last_boxes = dict(zip(previous.tracker_id, previous.xyxy))
+            for tracker_id, box in zip(detections.tracker_id, detections.xyxy):
+                if tracker_id in last_boxes:
+                    velocities[tracker_id] = (box - last_boxes[tracker_id]) / (now - self.last_time)
+        self.velocities = velocities
+        self.last_detections = detections
+        self.last_time = now
+
+    def _propagate(self, now: float) -> sv.Detections:
+        detections = self.last_detections
+        if detections.tracker_id is None or not self.velocities:
+            return detections
+        elapsed = now - self.last_time
+        shift = np.array([self.velocities.get(tracker_id, np.zeros(4)) for tracker_id in detections.tracker_id])
+        return sv.Detections(xyxy=detections.xyxy + shift.reshape(-1, 4) * elapsed,
+                             confidence=detections.confidence, class_id=detections.class_id,
+                             tracker_id=detections.tracker_id)
+
+    def _count_frame(self, now: float) -> None:
+        self.window_count += 1
+        if now - self.window_start >= 1.0:
+            self.output_fps = self.window_count / (now - self.window_start)
+            self.window_start = now
+            self.window_count = 0
+
+    def stats(self) -> dict:
+        imgsz, stride = self.levels[self.level]
+        return {
+            "level": self.level,
+            "imgsz": imgsz,
+            "stride": stride,
+            "target_fps": self.target_fps,
+            "output_fps": round(self.output_fps, 1),
+            "avg_latency_ms": round(1000 * self.avg_latency, 2) if self.avg_latency is not None else None,
+            "detected": self.detected,
+            "propagated": self.propagated,
+        }
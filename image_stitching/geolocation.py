@@ -0,0 +1,163 @@
+import json
+import time
+
+import numpy as np
+
+import coordinateMapping
+
+# Written by the communication server, {"version", "ts", "drones": {"N": {"lat", "lng", "alt", "heading"}}}
+PLAN_KEY = "drone_plan"
+
+
+class PlanWatcher:
+    """
+    Keep the planned camera pose of the left and right drone up to date from Redis.
+
+    The plan key is read at most once per refresh_interval. Drones missing from the plan
+    keep their last known pose, or the default pose until a plan arrives.
+    """
+
+    def __init__(self, redis_client, drone_ids: tuple, default_poses: tuple, refresh_interval: float = 2.0) -> None:
+        """
+        Args:
+            redis_client: Synchronous Redis client.
+            drone_ids (tuple): Slots of the left and right drone.
+            default_poses (tuple): (lat, lng, alt, heading) per drone, used until a plan is loaded.
+            refresh_interval (float): Seconds between reads of the plan key.
+        """
+        self.redis_client = redis_client
+        self.drone_ids = drone_ids
+        self.poses = tuple(default_poses)
+        self.refresh_interval = refresh_interval
+        self.version = None
+        self.last_refresh = None
+
+    def current(self) -> tuple:
+        """
+        Returns:
+            tuple: (lat, lng, alt, heading) of the left and right drone.
+        """
+        now = time.monotonic()
+        if self.last_refresh is not None and now - self.last_refresh < self.refresh_interval:
+            return self.poses
+        self.last_refresh = now
+        try:
+            raw = self.redis_client.get(PLAN_KEY)
+            plan = json.loads(raw) if raw else None
+        except Exception as e:
+            print(f"[WARNING] Could not read drone plan: {e}")
+            return self.poses
+        if not plan or plan.get("version") == self.version:
+            return self.poses
+
+        self.version = plan.get("version")
+        drones = plan.get("drones", {})
+        poses = []
+        for drone_id, pose in zip(self.drone_ids, self.poses):
+            planned = drones.get(str(drone_id))
+            if planned:
+                pose = (planned["lat"], planned["lng"], planned["alt"], planned.get("heading", 0.0))
+            poses.append(pose)
+        self.poses = tuple(poses)
+        print(f"[INFO] Loaded drone plan version {self.version}: {self.poses}")
+        return self.poses
+
+
+def camera_gps(pose: tuple, xs: np.ndarray, ys: np.ndarray, resolution: tuple, fov: float = 83.0) -> tuple:
+    """
+    GPS coordinates of pixels of one drone camera.
+
+    Args:
+        pose (tuple): (lat, lng, alt, heading) of the drone.
+        xs (np.ndarray): Pixel columns.
+        ys (np.ndarray): Pixel rows.
+        resolution (tuple): (width, height) of the camera frame.
+        fov (float): Horizontal field of view of the camera in degrees.
+
+    Returns:
+        tuple: Arrays of latitudes and longitudes.
+    """
+    lat, lng, alt, heading = pose
+    camera = coordinateMapping.CameraModel((lat, lng), alt, orientation=heading, fov=fov, resolution=resolution)
+    gps = camera.pixelsToGps(np.stack([xs, ys], axis=-1))
+    return gps[..., 0], gps[..., 1]
+
+
+class GroundGrid:
+    """GPS coordinates of every pixel of a stitched frame."""
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray) -> None:
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+
+    def lookup(self, xs: np.ndarray, ys: np.ndarray) -> tuple:
+        """
+        GPS coordinates of stitched frame pixels.
+
+        Args:
+            xs (np.ndarray): Pixel columns.
+            ys (np.ndarray): Pixel rows.
+
+        Returns:
+            tuple: Arrays of latitudes and longitudes.
+        """
+        height, width = self.latitudes.shape
+        cols = np.clip(np.asarray(xs, dtype=int), 0, width - 1)
+        rows = np.clip(np.asarray(ys, dtype=int), 0, height - 1)
+        return self.latitudes[rows, cols], self.longitudes[rows, cols]
+
+
+class GroundLookup:
+    """
+    Per-pixel GPS coordinates of the stitched frame.
+
+    The grid is built with the vectorized pixel to GPS mapping, once for every change of
+    the drone poses or the stitcher geometry. Each output pixel is mapped through the
+    camera it was taken from, pixels in the overlap are blended with the stitcher's own
+    weights. Geolocating a detection is then a lookup in the grid.
+
+    Every rebuild creates a new GroundGrid, so a grid handed to another pipeline stage
+    stays consistent with the frame it was sent with.
+    """
+
+    def __init__(self, fov: float = 83.0) -> None:
+        """
+        Args:
+            fov (float): Horizontal field of view of the drone cameras in degrees.
+        """
+        self.fov = fov
+        self.key = None
+        self.grid = None
+        self.rebuilds = 0
+        self.last_build_ms = 0.0
+
+    def update(self, stitcher, poses: tuple) -> GroundGrid:
+        """
+        Rebuild the grid if the stitcher geometry or the poses changed since the last call.
+
+        Args:
+            stitcher: OverlapStitcher or HomographyStitcher that produced the last frame.
+            poses (tuple): (lat, lng, alt, heading) of the left and right drone.
+
+        Returns:
+            GroundGrid: Grid matching the last stitched frame.
+        """
+        key = (stitcher.geometry_key(), poses)
+        if key == self.key:
+            return self.grid
+        start = time.perf_counter()
+        sources = stitcher.pixel_sources()
+        left_lat, left_lng = camera_gps(poses[0], sources["left_x"], sources["left_y"],
+                                        sources["left_resolution"], self.fov)
+        right_lat, right_lng = camera_gps(poses[1], sources["right_x"], sources["right_y"],
+                                          sources["right_resolution"], self.fov)
+        weight = sources["right_weight"]
+        self.grid = GroundGrid(left_lat * (1 - weight) + right_lat * weight,
+                               left_lng * (1 - weight) + right_lng * weight)
+        self.key = key
+        self.rebuilds += 1
+        self.last_build_ms = (time.perf_counter() - start) * 1000
+        return self.grid
+
+    def stats(self) -> dict:
+        return {"rebuilds": self.rebuilds, "last_build_ms": round(self.last_build_ms, 2)}
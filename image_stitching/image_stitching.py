@@ -1,303 +1,319 @@
 import numpy as np
 import cv2
-import imutils
-import threading
-from queue import Queue
-from ultralytics import YOLO
-import supervision.detection.core as sv
 from annotator import Annotator
-import coordinateMapping
+from stitcher import OverlapStitcher, HomographyStitcher
+from pipeline import Pipeline
+from synchronizer import FramePairSynchronizer
+from geolocation import PlanWatcher, GroundLookup, camera_gps
+from detection import DetectionService, AdaptiveDetector
 import redis
+import redis.asyncio
+import itertools
+from functools import lru_cache
+import json
+import time
 import asyncio
 import os
-import torch
-
-
-if torch.cuda.is_available():
-    print(f"[INFO] PyTorch CUDA detected. Available devices: {torch.cuda.device_count()}")
-else:
-    print("[INFO] PyTorch CUDA not detected. YOLO will use CPU.")
-
-# Global YOLO model
-model = YOLO("models/best.pt")
 
 redis_url = os.environ.get("REDIS_URL", "localhost")
-# Redis connection (create a Redis client if it doesn't exist)
-r = redis.StrictRedis(host=redis_url, port=6379, db=0, decode_responses=True)
+
+# Frame keys have a "<key>:meta" companion holding {"seq", "ts"} and the same payload
+# is published on "<key>:updates" whenever a new frame is stored
+FRAME_META_SUFFIX = ":meta"
+FRAME_UPDATES_SUFFIX = ":updates"
+MERGED_FRAME_KEY = "frame_drone_merged"
+# Annotated frames of each drone are stored under "frame_droneN_detected"
+DETECTED_SUFFIX = "_detected"
+FRAME_IDLE_TIMEOUT = 1.0  # Seconds without notifications before the frame key is re-checked
+# Largest capture time difference between a left and right frame that are stitched together
+SYNC_TOLERANCE = float(os.environ.get("SYNC_TOLERANCE_MS", "50")) / 1000
+# "overlap" assumes a fixed horizontal overlap, "homography" aligns the frames on matched features
+STITCH_MODE = os.environ.get("STITCH_MODE", "overlap")
+# Frames between scheduled homography estimates in homography mode
+STITCH_REESTIMATE_INTERVAL = int(os.environ.get("STITCH_REESTIMATE_INTERVAL", "300"))
+# YOLO runs on the CPU in a shared detection service
+DETECT_IMGSZ = int(os.environ.get("DETECT_IMGSZ", "1280"))
+DETECT_MAX_BATCH = int(os.environ.get("DETECT_MAX_BATCH", "4"))
+DETECT_MAX_WAIT = float(os.environ.get("DETECT_MAX_WAIT_MS", "10")) / 1000
+DETECT_OUT_OF_PROCESS = os.environ.get("DETECT_OUT_OF_PROCESS", "false").lower() in ("true", "1", "yes")
+# Also detect on each drone's own frame, batched with the merged frame, and publish it annotated
+DETECT_DRONE_STREAMS = os.environ.get("DETECT_DRONE_STREAMS", "false").lower() in ("true", "1", "yes")
+# Merged output frame rate to hold by lowering the input size and skipping detections, 0 detects every frame at DETECT_IMGSZ
+DETECT_TARGET_FPS = float(os.environ.get("DETECT_TARGET_FPS", "0"))
+# "full" draws boxes and labels, "boxes" only boxes. Labels are drawn every ANNOTATE_LABEL_INTERVAL frames
+ANNOTATE_MODE = os.environ.get("ANNOTATE_MODE", "full")
+ANNOTATE_LABEL_INTERVAL = int(os.environ.get("ANNOTATE_LABEL_INTERVAL", "1"))
+# Average annotation time above which labels are drawn less often, unset disables the limit
+ANNOTATE_BUDGET_MS = float(os.environ["ANNOTATE_BUDGET_MS"]) if os.environ.get("ANNOTATE_BUDGET_MS") else None
+frame_sequences = {}  # Redis key to the sequence numbers of its published frames
 
 ## ---- HELPER FUNCTIONS ----
 
-async def consume_async_generator(gen, queue, stop_event):
+@lru_cache(maxsize=None)
+def redis_client() -> redis.StrictRedis:
     """
-    Consume an asynchronous generator and push frames into a queue.
-
-    Args:
-        gen (AsyncGenerator): The async generator yielding frames.
-        queue (Queue): Queue to store the frames.
-        stop_event (threading.Event): Event to stop the loop.
+    Redis client used from the pipeline threads, created on first use.
+    Frames are stored as raw JPEG bytes, so responses are not decoded.
     """
-    async for frame in gen:
-        if stop_event.is_set():
-            break
-        queue.put(frame)
-    queue.put(None)  # Signal the end of the stream
+    return redis.StrictRedis(host=redis_url, port=6379, db=0)
 
-def detect_objects(frame: np.ndarray) -> sv.Detections:
-    """
-    Run YOLO for object detection on a frame.
+@lru_cache(maxsize=None)
+def async_redis_client() -> redis.asyncio.StrictRedis:
+    """Async Redis client for waiting on frame notifications, created on first use."""
+    return redis.asyncio.StrictRedis(host=redis_url, port=6379, db=0)
 
-    Args:
-        frame (np.ndarray): Input image frame.
-
-    Returns:
-        sv.Detections: Detected objects.
+def set_frame(img: np.ndarray, redis_key: str = MERGED_FRAME_KEY)-> None:  # Receives a frame and sends it to Redis
     """
-    results = model.track(frame, persist=True, conf=0.10, imgsz=1280)
-    detections = sv.Detections.from_ultralytics(results[0])
-    return detections
-
-def get_weighted_gps(pixel_x: int, frame_width: int, left_gps: tuple[float, float], right_gps: tuple[float, float]) -> tuple[float, float]:
-    """
-    Calculate a weighted GPS position based on object position in the image.
-
-    Args:
-        pixel_x (int): X coordinate of the object in pixels.
-        frame_width (int): Width of the image frame.
-        left_gps (tuple): GPS coordinate of the left camera.
-        right_gps (tuple): GPS coordinate of the right camera.
-
-    Returns:
-        tuple: Weighted GPS position (latitude, longitude).
-    """
-    alpha = pixel_x / frame_width
-    gps_lat = left_gps[0] * (1 - alpha) + right_gps[0] * alpha
-    gps_lon = left_gps[1] * (1 - alpha) + right_gps[1] * alpha
-    return (gps_lat, gps_lon)
-
-async def set_frame(img: np.ndarray)-> None:  # Receives a frame and sends it to Redis
-    """
-    Store a frame in Redis as JPEG.
+    Store a frame in Redis as JPEG. Called from the publish stage's worker thread.
 
     Args:
         img (np.ndarray): Image to store.
+        redis_key (str): Key of the feed, the merged frame by default.
     """
     try:
         # Convert to JPEG buffer
         ret, buffer = cv2.imencode(".jpg", img)
         if ret:
-            frame_str = buffer.tobytes().decode("latin1")
-            # Redis pipeline to save frames and set TTL
-            redis_key = f"frame_drone_merged"
-            with r.pipeline() as pipe:
-                pipe.set(redis_key, frame_str)  # Save image
-                pipe.expire(redis_key, 60)  # Set expiration (60 seconds)
-                pipe.execute()  # Execute both commands together
+            # Save the JPEG bytes directly with a 60 second TTL and notify the viewers
+            sequence = frame_sequences.setdefault(redis_key, itertools.count(1))
+            meta = json.dumps({"seq": next(sequence), "ts": time.time()})
+            with redis_client().pipeline() as pipe:
+                pipe.set(redis_key, buffer.tobytes(), ex=60)
+                pipe.set(redis_key + FRAME_META_SUFFIX, meta, ex=60)
+                pipe.publish(redis_key + FRAME_UPDATES_SUFFIX, meta)
+                pipe.execute()
         else:
             print(f"Misslyckades att koda sammansatta frames")
     except Exception as e:
         print(f"Fel i set_frame: {e}")
 
+def encode_placeholder(text: str, color: tuple) -> bytes:
+    """
+    Render a dummy frame with a message and encode it as JPEG.
+
+    Args:
+        text (str): Message to draw on the frame.
+        color (tuple): BGR text color.
+
+    Returns:
+        bytes: JPEG encoded frame.
+    """
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(frame, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+    ret, buffer = cv2.imencode(".jpg", frame)
+    return buffer.tobytes() if ret else b""
+
 ### MERGE STREAMS ###
 async def stream_drone_frames(drone_id: int):
     """
-    Read frames from Redis, decode and yield raw JPEG bytes.
+    Wait for new JPEG frames in Redis and yield each one exactly once, with its capture time.
+
+    The generator sleeps on the frame's update channel, so it follows the real camera
+    rate. Frames whose sequence number has already been yielded are skipped. When no
+    frame has arrived for FRAME_IDLE_TIMEOUT and the key has expired, a placeholder
+    is yielded so the consumer keeps running.
 
     Args:
         drone_id (int): Identifier for the drone.
 
     Yields:
-        bytes: JPEG encoded frame.
+        tuple: JPEG encoded frame and its capture timestamp in seconds, None for the placeholder.
     """
     redis_key = f"frame_drone{drone_id}"
-    dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8) # Pre-create dummy frame
+    # Pre-encode the dummy frame once, it is yielded whenever the drone is missing
+    not_connected = encode_placeholder(f"Drone {drone_id} not connected", (255, 255, 255))
+    last_seq = None
 
     while True:
-        frame_to_encode = None
-        # Retrieve a frame from Redis
-        # Ensure r.get runs in a thread as it can block
-        frame_data = await asyncio.to_thread(r.get, redis_key)
-
-        if frame_data:
-            try:
-                # Directly use bytes if decode_responses=False in Redis client
-                # If decode_responses=True, you stored latin1 string, so encode back
-                # Assuming decode_responses=True based on your original code:
-                frame_bytes = frame_data.encode("latin1")
-
-                # If you change Redis client to decode_responses=False:
-                # frame_bytes = frame_data # frame_data would already be bytes
-
-                frame_array = np.frombuffer(frame_bytes, dtype=np.uint8)
-                frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
-
-                if frame is not None:
-                    frame_to_encode = frame
-                else:
-                    # If decoding fails, prepare a dummy image for encoding
-                    print(f"[WARNING] Failed to decode frame from Redis for drone {drone_id}")
-                    dummy_frame_copy = dummy_frame.copy() # Use a copy
-                    cv2.putText(dummy_frame_copy, f"Drone {drone_id}: invalid frame data",
-                                (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    frame_to_encode = dummy_frame_copy
-
-            except Exception as e:
-                 print(f"[ERROR] Error processing frame data from Redis for drone {drone_id}: {e}")
-                 dummy_frame_copy = dummy_frame.copy()
-                 cv2.putText(dummy_frame_copy, f"Drone {drone_id}: error reading",
-                            (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                 frame_to_encode = dummy_frame_copy
+        pubsub = async_redis_client().pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(redis_key + FRAME_UPDATES_SUFFIX)
+            while True:
+                message = await pubsub.get_message(timeout=FRAME_IDLE_TIMEOUT)
+                if message is not None and json.loads(message["data"])["seq"] == last_seq:
+                    continue  # Duplicate notification
+
+                frame_bytes, meta = await async_redis_client().mget(redis_key, redis_key + FRAME_META_SUFFIX)
+                if not frame_bytes:
+                    last_seq = None
+                    yield not_connected, None
+                    continue
+
+                meta = json.loads(meta) if meta else {}
+                seq = meta.get("seq")
+                if seq is not None and seq == last_seq:
+                    continue  # Nothing new since the last yielded frame
+                last_seq = seq
+                # The stored value is already a JPEG, no need to decode and re-encode it here
+                yield frame_bytes, meta.get("ts", time.time())
+        except redis.exceptions.RedisError as e:
+            print(f"[ERROR] Error reading frames from Redis for drone {drone_id}: {e}")
+            await asyncio.sleep(FRAME_IDLE_TIMEOUT)
+        finally:
+            await pubsub.aclose()
+def decode_pair(pair: tuple[bytes, bytes]):
+    """
+    Decode a pair of JPEG frames.
 
-        else:
-            # If no frame exists in Redis, prepare a dummy image for encoding
-            dummy_frame_copy = dummy_frame.copy()
-            cv2.putText(
-                dummy_frame_copy,
-                f"Drone {drone_id} not connected",
-                (50, 50),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (255, 255, 255),
-                2,
-            )
-            frame_to_encode = dummy_frame_copy
-
-        # Convert selected frame (real or dummy) to JPEG bytes
-        ret, buffer = cv2.imencode(".jpg", frame_to_encode)
-        if not ret:
-            # If encoding fails, log and skip (yield None or wait?)
-            # Yielding None might be better handled by the consumer
-            print(f"[ERROR] Failed to encode frame to JPEG for drone {drone_id}")
-            await asyncio.sleep(0.033) # wait a bit before the next attempt
-            continue # Skip this iteration
-
-        # *** FIX: Yield ONLY the raw JPEG bytes ***
-        yield buffer.tobytes()
-
-        await asyncio.sleep(0.033)  # Approximately 30fps
-async def merge_stream(drone_ids: tuple[int, int]) -> None:
+    Args:
+        pair (tuple): Left and right JPEG bytes.
+
+    Returns:
+        tuple | None: Left and right BGR frames, or None if either fails to decode.
+    """
+    left_frame_data, right_frame_data = pair
+    left = cv2.imdecode(np.frombuffer(left_frame_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    right = cv2.imdecode(np.frombuffer(right_frame_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    # check if decoding fails
+    if left is None or right is None:
+        print(f"[INFO] Left or right image is None (left: {left is None}, right: {right is None})")
+        return None  # Skip if decoding fails
+    return left, right
+
+async def merge_stream(drone_ids: tuple[int, int], detector: DetectionService) -> None:
     """
     Merge video streams from two drones, detect objects, and save annotated output.
 
+    The work runs as a pipeline of decode, stitch, detect and publish stages on worker
+    threads. Each stage hands over to the next through a single-slot queue where a newer
+    frame replaces one that has not been picked up, so inference on one pair runs
+    concurrently with decoding and stitching of the next. Left and right frames are paired
+    by capture timestamp, so both halves of a stitched frame show the same moment.
+
+    With DETECT_DRONE_STREAMS each drone's frame is submitted as its own "droneN" stream
+    before the merged frame is detected, so the service infers all three in one batch,
+    and the annotated drone frames are stored under "frame_droneN_detected".
+
     Args:
         drone_ids (tuple): Tuple containing two drone IDs.
+        detector (DetectionService): Started detection service, the merged frames use the "merged" stream.
     """
     id1, id2 = drone_ids
 
-    # Create queues for frames
-    left_queue, right_queue = Queue(), Queue()
-    stop_event = threading.Event()
-
     # Create async generators to consume drone streams
     frameLeft = stream_drone_frames(id1)
     frameRight = stream_drone_frames(id2)
 
+    # Pairs frames by capture time, unpaired old frames are dropped and a missing drone's placeholder fills its side
+    synchronizer = FramePairSynchronizer(tolerance=SYNC_TOLERANCE)
+
     # Standard frame size
     frame_width = 600
-    frame_height = None
-    overlap_width = int(frame_width * 0.495) #Adjust if necessary
-
-    # Camera GPS positions and altitude
-    left_camera_location = (57.6900, 11.9800)  # example coordinates
-    right_camera_location = (57.6901, 11.9802)  # example coordinates
-    altitude = 30  # example height
-    fov = 83.0
-    resolution = (1920, 1080)
-
-    # Start async tasks to consume frames
-    asyncio.create_task(consume_async_generator(frameLeft, left_queue, stop_event))
-    asyncio.create_task(consume_async_generator(frameRight, right_queue, stop_event))
+    if STITCH_MODE == "homography":
+        stitcher = HomographyStitcher(frame_width=frame_width, overlap=0.495,
+                                      reestimate_interval=STITCH_REESTIMATE_INTERVAL)
+    else:
+        stitcher = OverlapStitcher(frame_width=frame_width, overlap=0.495) #Adjust overlap if necessary
+
+    # Camera poses (lat, lng, alt, heading) from the drone plan, the examples are used until one is published
+    default_poses = ((57.6900, 11.9800, 30, 0.0), (57.6901, 11.9802, 30, 0.0))
+    plan = PlanWatcher(redis_client(), drone_ids, default_poses)
+    ground = GroundLookup(fov=83.0)
+
+    def stitch(frames: tuple):
+        stitched_frame = stitcher.stitch(*frames)
+        poses = plan.current()
+        # The pixel to GPS grid only changes with the plan or the stitching geometry
+        return stitched_frame, ground.update(stitcher, poses), frames, poses
+
+    if DETECT_TARGET_FPS > 0:
+        adaptive = AdaptiveDetector(detector, "merged", target_fps=DETECT_TARGET_FPS)
+        detect_merged = adaptive.detect
+    else:
+        adaptive = None
+        detect_merged = lambda frame: detector.detect("merged", frame)
+
+    def submit_drone_frames(frames: tuple) -> list:
+        """Queues both drone frames, at the merged frame's input size so they share its batch."""
+        if not DETECT_DRONE_STREAMS:
+            return []
+        if adaptive is None:
+            imgsz = None
+        elif adaptive.infers_next():
+            imgsz = adaptive.levels[adaptive.level][0]
+        else:
+            return []  # The merged boxes are propagated, nothing is inferred for this pair
+        return [(drone_id, frame, detector.submit(f"drone{drone_id}", frame, imgsz))
+                for drone_id, frame in zip(drone_ids, frames)]
+
+    def detect(item: tuple):
+        stitched_frame, grid, frames, poses = item
+        drone_results = submit_drone_frames(frames)
+        detections = detect_merged(stitched_frame)
+        drone_detections = [(drone_id, frame, future.result()) for drone_id, frame, future in drone_results]
+        return stitched_frame, grid, detections, poses, drone_detections
+
+    annotator = Annotator(mode=ANNOTATE_MODE, labelInterval=ANNOTATE_LABEL_INTERVAL, budgetMs=ANNOTATE_BUDGET_MS)
+    # Label caches are per tracker id, so every drone stream has its own annotator
+    drone_annotators = {drone_id: Annotator(mode=ANNOTATE_MODE, labelInterval=ANNOTATE_LABEL_INTERVAL,
+                                            budgetMs=ANNOTATE_BUDGET_MS) for drone_id in drone_ids}
+
+    def publish_drone_frame(drone_id, frame: np.ndarray, detections, pose: tuple) -> None:
+        if detections.tracker_id is not None:
+            centers = (detections.xyxy[:, :2] + detections.xyxy[:, 2:]) / 2
+            latitudes, longitudes = camera_gps(pose, centers[:, 0], centers[:, 1],
+                                               (frame.shape[1], frame.shape[0]), ground.fov)
+            frame = drone_annotators[drone_id].annotate(frame, detections, latitudes, longitudes)
+        height = int(frame.shape[0] * 640 / frame.shape[1])
+        set_frame(cv2.resize(frame, (640, height)), f"frame_drone{drone_id}{DETECTED_SUFFIX}")
+
+    def annotate_and_publish(item: tuple) -> None:
+        stitched_frame, grid, detections, poses, drone_detections = item
+        for (drone_id, frame, drone_detection), pose in zip(drone_detections, poses):
+            publish_drone_frame(drone_id, frame, drone_detection, pose)
+
+        # ---- GPS-CALCULATION ----
+        if detections.tracker_id is not None:  # Check if tracker_id exists
+            centers = (detections.xyxy[:, :2] + detections.xyxy[:, 2:]) / 2
+            latitudes, longitudes = grid.lookup(centers[:, 0], centers[:, 1])
+
+            # ---- SHOW RESULTS ----
+            annotated_frame = annotator.annotate(stitched_frame, detections, latitudes, longitudes)
+        else:
+            annotated_frame = stitched_frame  # no detection, only show composite image
+
+        # Send the composite and annotated image to Redis
+        annotated_frame = cv2.resize(annotated_frame, (640, 380))
+        set_frame(annotated_frame)
+
+    extra_stats = {"sync": synchronizer.stats, "geolocation": ground.stats, "detection": detector.stats,
+                   "annotation": annotator.stats}
+    if isinstance(stitcher, HomographyStitcher):
+        extra_stats["stitcher"] = stitcher.stats
+    if adaptive is not None:
+        extra_stats["adaptive_detection"] = adaptive.stats
+    pipeline = Pipeline([
+        ("decode", decode_pair),
+        ("stitch", stitch),
+        ("detect", detect),
+        ("publish", annotate_and_publish),
+    ], extra_stats=extra_stats)
+    pipeline.start()
+
+    async def feed(side: str, frames) -> None:
+        """Push one drone's frames into the synchronizer and send completed pairs down the pipeline."""
+        async for frame_data, timestamp in frames:
+            for pair in synchronizer.push(side, timestamp, frame_data):
+                pipeline.put(pair)
 
     try:
-        while True:
-            left_frame_data = await asyncio.to_thread(left_queue.get)
-            right_frame_data = await asyncio.to_thread(right_queue.get)
-
-            if left_frame_data is None or right_frame_data is None:
-                print("[INFO] Slut på videoström.")
-                stop_event.set()
-                break
-            # Decode frames to OpenCV
-
-            left_frame_array = np.frombuffer(left_frame_data, dtype=np.uint8)
-            left = cv2.imdecode(left_frame_array, cv2.IMREAD_COLOR)
-
-            right_frame_array = np.frombuffer(right_frame_data, dtype=np.uint8)
-            right = cv2.imdecode(right_frame_array, cv2.IMREAD_COLOR)
-            
-            # check if decoding fails 
-            if left is None or right is None:
-                print("[INFO] Left or right image is None")
-                print(f"left: {left}")
-                print(f"right: {right}")
-                continue  # Skip if decoding fails
-            # Scale images
-            if frame_height is None:
-                frame_height = int(left.shape[0] * (frame_width / left.shape[1]))
-
-            left = imutils.resize(left, width=frame_width)
-            right = imutils.resize(right, width=frame_width)
-            right = cv2.resize(right, (frame_width, frame_height))
-            left = cv2.resize(left, (frame_width, frame_height))
-
-            # Create blank image for stitching
-            stitched_frame = np.zeros((frame_height, frame_width * 2, 3), dtype="uint8")
-            stitched_frame[:, :frame_width] = left
-
-            # Smooth transition between left and right image
-            for i in range(overlap_width):
-                alpha = i / overlap_width
-                stitched_frame[:, frame_width - overlap_width + i] = cv2.addWeighted(
-                    left[:, frame_width - overlap_width + i], 1 - alpha,
-                    right[:, i], alpha, 0)
-
-            # adjust the right image and put it to the end
-            right_fixed = cv2.resize(right[:, overlap_width:], (frame_width, frame_height))
-            stitched_frame[:, frame_width:] = right_fixed
-
-            # ---- OBJECT DETECTION ----
-            detections = detect_objects(stitched_frame)
-
-            # ---- GPS-CALCULATION ----
-            gps_positions = []
-            if detections.tracker_id is not None:  # Check if tracker_id exists
-                for i, box in enumerate(detections.xyxy):
-                    x_center = int((box[0] + box[2]) / 2)
-                    y_center = int((box[1] + box[3]) / 2)
-
-                    # Calculate GPS from left and right camera
-                    gps_left = coordinateMapping.pixelToGps((x_center, y_center), left_camera_location, altitude, fov=fov, resolution=resolution)
-                    gps_right = coordinateMapping.pixelToGps((x_center, y_center), right_camera_location, altitude, fov=fov, resolution=resolution)
-
-                    # Weighted average calculation
-                    best_gps = get_weighted_gps(x_center, frame_width * 2, gps_left, gps_right)
-                    gps_positions.append(best_gps)
-
-                # ---- SHOW RESULTS ----
-                labels = [f"ID: {d} GPS: {round(g[0], 6)}, {round(g[1], 6)}" for d, g in zip(detections.tracker_id, gps_positions)]
-                position_labels = [f"({int(d[0])}, {int(d[1])})" for d in detections.xyxy]
-
-                annotator = Annotator()  # Create an annotator
-                annotated_frame = annotator.annotateFrame(frame=stitched_frame, detections=detections, labels=labels, positionLabels=position_labels)
-            else:
-                annotated_frame = stitched_frame  # no detection, only show composite image
-
-            # Send the composite and annotated image to Redis
-            annotated_frame = cv2.resize(annotated_frame, (640, 380))
-            print(annotated_frame.shape)
-            await set_frame(annotated_frame)
-            print("Setting stitched video frame in Redis")
-            # Show the annotated image in OpenCV
-            # cv2.imshow("Stitched Frame with Detections", annotated_frame)
-            # if cv2.waitKey(1) & 0xFF == ord('q'):
-            #     break
+        await asyncio.gather(feed("left", frameLeft), feed("right", frameRight))
+        print("[INFO] Slut på videoström.")
     finally:
-        stop_event.set()
-        cv2.destroyAllWindows()
+        await asyncio.to_thread(pipeline.stop)
+        print(f"[INFO] Pipeline stopped: {pipeline.stats()}")
 
 async def main() -> None:
     print("[INFO] Startar drönarvideoprocessorer...")
-    while True:
-        await merge_stream((1, 2))  # Call with drone ID 1 and 2
+    detector = DetectionService(imgsz=DETECT_IMGSZ, max_batch=DETECT_MAX_BATCH, max_wait=DETECT_MAX_WAIT,
+                                out_of_process=DETECT_OUT_OF_PROCESS)
+    detector.start()
+    try:
+        while True:
+            await merge_stream((1, 2), detector)  # Call with drone ID 1 and 2
+    finally:
+        detector.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
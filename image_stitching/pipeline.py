@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """
+    Bounded, thread-safe queue between two pipeline stages.
+
+    When the queue is full, putting a new item drops the oldest one, so a slow stage
+    always works on the most recent frames and never builds a backlog.
+    """
+
+    def __init__(self, maxsize: int = 1) -> None:
+        self.items = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item) -> None:
+        with self.condition:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self):
+        """
+        Wait for the oldest item.
+
+        Returns:
+            The item, or None once the queue has been closed and emptied.
+        """
+        with self.condition:
+            while not self.items and not self.closed:
+                self.condition.wait()
+            return self.items.popleft() if self.items else None
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class Stage:
+    """
+    A pipeline step that runs a function on its own worker thread.
+
+    The function takes one item from the input queue and returns the item for the next
+    stage, or None to drop it (for example when a frame cannot be decoded).
+    """
+
+    def __init__(self, name: str, func, inbox: LatestQueue, outbox: LatestQueue = None) -> None:
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.thread = threading.Thread(target=self._run, name=f"stage-{name}", daemon=True)
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.fps = 0.0
+
+    def _run(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is None:
+                break
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] Pipeline stage '{self.name}' failed: {e}")
+                continue
+            self._record(time.perf_counter() - start)
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+        if self.outbox is not None:
+            self.outbox.close()  # Let the next stage finish too
+
+    def _record(self, elapsed: float) -> None:
+        self.processed += 1
+        self.busy_seconds += elapsed
+        self.window_count += 1
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self.fps = self.window_count / (now - self.window_start)
+            self.window_start = now
+            self.window_count = 0
+
+    def stats(self) -> dict:
+        return {
+            "fps": round(self.fps, 1),
+            "avg_ms": round(1000 * self.busy_seconds / self.processed, 2) if self.processed else 0.0,
+            "processed": self.processed,
+            "errors": self.errors,
+            "queue_depth": len(self.inbox),
+            "dropped": self.inbox.dropped,
+        }
+
+
+class Pipeline:
+    """
+    Chain of stages connected by LatestQueues, each stage running concurrently.
+
+    Example:
+        pipeline = Pipeline([("decode", decode), ("stitch", stitch)])
+        pipeline.start()
+        pipeline.put(item)
+    """
+
+    def __init__(self, steps: list, queue_size: int = 1, stats_interval: float = 10.0,
+                 extra_stats: dict = None) -> None:
+        """
+        Args:
+            steps (list): (name, function) tuples, in processing order.
+            queue_size (int): Capacity of the queue in front of each stage.
+            stats_interval (float): Seconds between statistics printouts, 0 disables them.
+            extra_stats (dict): Name to callable returning a stats dict, reported with the stages.
+        """
+        self.extra_stats = extra_stats or {}
+        queues = [LatestQueue(queue_size) for _ in steps]
+        self.stages = [
+            Stage(name, func, queues[i], queues[i + 1] if i + 1 < len(steps) else None)
+            for i, (name, func) in enumerate(steps)
+        ]
+        self.stats_interval = stats_interval
+        self.last_stats_log = time.monotonic()
+
+    def start(self) -> None:
+        for stage in self.stages:
+            stage.thread.start()
+
+    def put(self, item) -> None:
+        """Hand an item to the first stage, replacing the oldest waiting item if it is busy."""
+        self.stages[0].inbox.put(item)
+        self.maybe_log_stats()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Close the pipeline, every stage finishes the items already queued."""
+        self.stages[0].inbox.close()
+        for stage in self.stages:
+            stage.thread.join(timeout)
+
+    def stats(self) -> dict:
+        stats = {stage.name: stage.stats() for stage in self.stages}
+        stats.update({name: get_stats() for name, get_stats in self.extra_stats.items()})
+        return stats
+
+    def maybe_log_stats(self) -> None:
+        now = time.monotonic()
+        if not self.stats_interval or now - self.last_stats_log < self.stats_interval:
+            return
+        self.last_stats_log = now
+        for name, stats in self.stats().items():
+            print(f"[PIPELINE] {name}: {stats}")
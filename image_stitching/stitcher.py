@@ -0,0 +1,381 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class OverlapStitcher:
+    """
+    Stitch two frames side by side assuming a fixed horizontal overlap.
+
+    The left frame is scaled to frame_width. The first overlap_width columns of the
+    scaled right frame are blended into the right edge of the left frame with a linear
+    alpha ramp, and the remaining right columns are stretched to frame_width.
+
+    The remap tables and blend weights only depend on the frame sizes, so they are built
+    once and reused. Per frame the work is one resize of the left frame, one remap of the
+    right frame and one blend of the overlap region.
+    """
+
+    def __init__(self, frame_width: int = 600, overlap: float = 0.495) -> None:
+        """
+        Args:
+            frame_width (int): Width each input frame is scaled to.
+            overlap (float): Fraction of the frame width shared by the two frames.
+        """
+        self.frame_width = frame_width
+        self.overlap_width = int(frame_width * overlap)
+        self.frame_height = None
+        self._shapes = None
+        self._map_x = None
+        self._map_y = None
+        self._left_weights = None
+        self._right_weights = None
+
+    def _prepare(self, left_shape: tuple, right_shape: tuple) -> None:
+        """
+        Build the right frame remap tables and the blend weights for the given input sizes.
+
+        Args:
+            left_shape (tuple): Shape of the left input frame.
+            right_shape (tuple): Shape of the right input frame.
+        """
+        fw, ow = self.frame_width, self.overlap_width
+        fh = int(left_shape[0] * (fw / left_shape[1]))
+        src_h, src_w = right_shape[:2]
+        scale_x, scale_y = src_w / fw, src_h / fh
+
+        # Columns in the scaled right frame: the overlap part as-is, then the
+        # remaining part stretched from (fw - ow) to fw columns
+        scaled_x = np.concatenate([
+            np.arange(ow) + 0.5,
+            ow + (np.arange(fw) + 0.5) * ((fw - ow) / fw),
+        ])
+        # Map scaled columns and rows back to pixel centers of the source frame
+        map_x = (scaled_x * scale_x - 0.5).astype(np.float32)
+        map_y = ((np.arange(fh) + 0.5) * scale_y - 0.5).astype(np.float32)
+        self._map_x = np.tile(map_x, (fh, 1))
+        self._map_y = np.tile(map_y[:, None], (1, ow + fw))
+        # Source pixel of every stitched column and row, for pixel_sources
+        self._right_cols = np.concatenate([np.arange(ow - fw, 0) + 0.5, scaled_x]) * scale_x - 0.5
+        self._left_cols = (np.arange(2 * fw) + 0.5) * (left_shape[1] / fw) - 0.5
+        self._left_rows = (np.arange(fh) + 0.5) * (left_shape[0] / fh) - 0.5
+        self._right_rows = map_y
+
+        alpha = (np.arange(ow, dtype=np.float32) / ow) if ow else np.zeros(0, np.float32)
+        self._right_weights = np.ascontiguousarray(np.tile(alpha, (fh, 1)))
+        self._left_weights = 1.0 - self._right_weights
+
+        self.frame_height = fh
+        self._shapes = (left_shape, right_shape)
+
+    def stitch(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """
+        Stitch two BGR frames into one frame of size (frame_height, 2 * frame_width).
+
+        Args:
+            left (np.ndarray): Left camera frame.
+            right (np.ndarray): Right camera frame.
+
+        Returns:
+            np.ndarray: Stitched frame.
+        """
+        if self._shapes != (left.shape, right.shape):
+            self._prepare(left.shape, right.shape)
+        fw, fh, ow = self.frame_width, self.frame_height, self.overlap_width
+
+        stitched = np.empty((fh, fw * 2, 3), dtype=np.uint8)
+        stitched[:, :fw] = cv2.resize(left, (fw, fh))
+        right_remapped = cv2.remap(right, self._map_x, self._map_y, cv2.INTER_LINEAR,
+                                   borderMode=cv2.BORDER_REPLICATE)
+
+        # Smooth transition between left and right image, one call for the whole overlap
+        if ow:
+            stitched[:, fw - ow:fw] = cv2.blendLinear(
+                np.ascontiguousarray(stitched[:, fw - ow:fw]),
+                np.ascontiguousarray(right_remapped[:, :ow]),
+                self._left_weights, self._right_weights)
+        stitched[:, fw:] = right_remapped[:, ow:]
+        return stitched
+
+    def geometry_key(self):
+        """Value that changes whenever pixel_sources would return something different."""
+        return ("overlap", self._shapes)
+
+    def pixel_sources(self) -> dict:
+        """
+        Source pixel coordinates of every pixel of the last stitched frame.
+
+        Returns:
+            dict: "left_x", "left_y", "right_x", "right_y" in input frame pixels,
+            "right_weight", the share of the right frame in each output pixel, and the
+            (width, height) "left_resolution" and "right_resolution" of the inputs.
+        """
+        fw, fh, ow = self.frame_width, self.frame_height, self.overlap_width
+        shape = (fh, 2 * fw)
+        left_shape, right_shape = self._shapes
+        right_weight = np.zeros(2 * fw)
+        if ow:
+            right_weight[fw - ow:fw] = self._right_weights[0]
+        right_weight[fw:] = 1.0
+        return {
+            "left_resolution": (left_shape[1], left_shape[0]),
+            "right_resolution": (right_shape[1], right_shape[0]),
+            "left_x": np.broadcast_to(self._left_cols, shape),
+            "left_y": np.broadcast_to(self._left_rows[:, None], shape),
+            "right_x": np.broadcast_to(self._right_cols, shape),
+            "right_y": np.broadcast_to(self._right_rows[:, None], shape),
+            "right_weight": np.broadcast_to(right_weight, shape),
+        }
+
+
+class HomographyStitcher:
+    """
+    Stitch two frames using a homography estimated from matched ORB features.
+
+    The homography maps the right frame onto the plane of the left frame. It is
+    estimated once and cached together with the output canvas and the blend weights,
+    so per frame the work is one resize of the left frame, one perspective warp of the
+    right frame and one blend. The homography is estimated again every
+    reestimate_interval frames, or earlier when the overlap of the two warped frames
+    stops agreeing (drift, for example when a drone moves).
+
+    Until a homography has been found, frames are stitched with an OverlapStitcher.
+    """
+
+    def __init__(self, frame_width: int = 600, overlap: float = 0.495, reestimate_interval: int = 300,
+                 drift_check_interval: int = 15, drift_factor: float = 1.5, max_features: int = 1000,
+                 min_inliers: int = 25) -> None:
+        """
+        Args:
+            frame_width (int): Width the left frame is scaled to, the right frame is warped to match.
+            overlap (float): Overlap used by the fallback stitcher.
+            reestimate_interval (int): Frames between scheduled homography estimates.
+            drift_check_interval (int): Frames between drift checks.
+            drift_factor (float): Re-estimate when the overlap error grows by this factor.
+            max_features (int): ORB features detected per frame when estimating.
+            min_inliers (int): RANSAC inliers needed to accept a homography.
+        """
+        self.frame_width = frame_width
+        self.reestimate_interval = reestimate_interval
+        self.drift_check_interval = drift_check_interval
+        self.drift_factor = drift_factor
+        self.min_inliers = min_inliers
+        self.fallback = OverlapStitcher(frame_width=frame_width, overlap=overlap)
+        self.orb = cv2.ORB_create(nfeatures=max_features)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+
+        self._homography = None  # Right frame pixels to canvas pixels
+        self._canvas_size = None
+        self._left_origin = None
+        self._left_weights = None
+        self._right_weights = None
+        self._overlap_mask = None
+        self._shapes = None
+        self._estimated_shapes = None  # Input shapes of the last estimate attempt
+        self._baseline_error = None
+        self._frames_since_estimate = 0
+        self._needs_estimate = True
+
+        self.estimates = 0
+        self.failed_estimates = 0
+        self.drift_detections = 0
+        self.last_inliers = 0
+        self.last_estimate_ms = 0.0
+        self.last_error = 0.0
+
+    def _scaled_size(self, shape: tuple) -> tuple:
+        return self.frame_width, int(shape[0] * (self.frame_width / shape[1]))
+
+    def estimate(self, left: np.ndarray, right: np.ndarray) -> bool:
+        """
+        Estimate the homography between the frames and rebuild the cached canvas.
+
+        Args:
+            left (np.ndarray): Left camera frame.
+            right (np.ndarray): Right camera frame.
+
+        Returns:
+            bool: True if a homography was accepted.
+        """
+        start = time.perf_counter()
+        self._needs_estimate = False
+        self._frames_since_estimate = 0
+        self._estimated_shapes = (left.shape, right.shape)
+
+        left_size, right_size = self._scaled_size(left.shape), self._scaled_size(right.shape)
+        left_gray = cv2.cvtColor(cv2.resize(left, left_size), cv2.COLOR_BGR2GRAY)
+        right_gray = cv2.cvtColor(cv2.resize(right, right_size), cv2.COLOR_BGR2GRAY)
+        homography, inliers = self._match(left_gray, right_gray)
+        self.last_estimate_ms = (time.perf_counter() - start) * 1000
+        self.last_inliers = inliers
+
+        if homography is None or not self._build_canvas(homography, left.shape, right.shape):
+            self.failed_estimates += 1
+            return False
+        self.estimates += 1
+        self._baseline_error = None  # Measured on the next stitched frame
+        return True
+
+    def _match(self, left_gray: np.ndarray, right_gray: np.ndarray) -> tuple:
+        """Return the scaled right to scaled left homography and its inlier count."""
+        kp_left, desc_left = self.orb.detectAndCompute(left_gray, None)
+        kp_right, desc_right = self.orb.detectAndCompute(right_gray, None)
+        if desc_left is None or desc_right is None or len(kp_left) < 2 or len(kp_right) < 2:
+            return None, 0
+
+        # Lowe's ratio test keeps only distinctive matches
+        good = [pair[0] for pair in self.matcher.knnMatch(desc_right, desc_left, k=2)
+                if len(pair) == 2 and pair[0].distance < 0.75 * pair[1].distance]
+        if len(good) < self.min_inliers:
+            return None, len(good)
+
+        src = np.float32([kp_right[m.queryIdx].pt for m in good]).reshape(-1, 1, 2)
+        dst = np.float32([kp_left[m.trainIdx].pt for m in good]).reshape(-1, 1, 2)
+        homography, mask = cv2.findHomography(src, dst, cv2.RANSAC, 4.0)
+        inliers = int(mask.sum()) if mask is not None else 0
+        if homography is None or inliers < self.min_inliers:
+            return None, inliers
+        return homography, inliers
+
+    def _build_canvas(self, homography: np.ndarray, left_shape: tuple, right_shape: tuple) -> bool:
+        """
+        Cache the full-resolution warp, the canvas layout and the blend weights.
+
+        Args:
+            homography (np.ndarray): Homography from the scaled right frame to the scaled left frame.
+            left_shape (tuple): Shape of the left input frame.
+            right_shape (tuple): Shape of the right input frame.
+
+        Returns:
+            bool: False if the homography gives an implausible canvas.
+        """
+        left_w, left_h = self._scaled_size(left_shape)
+        right_w, right_h = self._scaled_size(right_shape)
+        # Scale the right input down to the size the homography was estimated on
+        scale_right = np.diag([right_w / right_shape[1], right_h / right_shape[0], 1.0])
+        to_left = homography @ scale_right
+
+        corners = np.float32([[0, 0], [right_shape[1], 0], [right_shape[1], right_shape[0]],
+                              [0, right_shape[0]]]).reshape(-1, 1, 2)
+        warped = cv2.perspectiveTransform(corners, to_left).reshape(-1, 2)
+        all_points = np.vstack([warped, [[0, 0], [left_w, left_h]]])
+        x_min, y_min = np.floor(all_points.min(axis=0)).astype(int)
+        x_max, y_max = np.ceil(all_points.max(axis=0)).astype(int)
+        width, height = x_max - x_min, y_max - y_min
+        # A degenerate homography blows the canvas up, the frames cannot be that far apart
+        if width > 3 * left_w or height > 3 * left_h or cv2.contourArea(warped) < 0.1 * left_w * left_h:
+            return False
+
+        translation = np.array([[1, 0, -x_min], [0, 1, -y_min], [0, 0, 1]], dtype=np.float64)
+        self._homography = translation @ to_left
+        self._canvas_size = (int(width), int(height))
+        self._left_origin = (int(-x_min), int(-y_min))
+
+        # Feathered weights: each pixel favours the frame whose border is further away
+        left_mask = np.zeros((height, width), np.uint8)
+        lx, ly = self._left_origin
+        left_mask[ly:ly + left_h, lx:lx + left_w] = 255
+        right_mask = cv2.warpPerspective(np.full(right_shape[:2], 255, np.uint8), self._homography,
+                                         self._canvas_size, flags=cv2.INTER_NEAREST)
+        left_dist = cv2.distanceTransform(left_mask, cv2.DIST_L2, 3)
+        right_dist = cv2.distanceTransform(right_mask, cv2.DIST_L2, 3)
+        self._left_weights = left_dist.astype(np.float32)
+        self._right_weights = right_dist.astype(np.float32)
+        self._overlap_mask = (left_mask > 0) & (right_mask > 0)
+        self._shapes = (left_shape, right_shape)
+        return True
+
+    def _measure_error(self, canvas_left: np.ndarray, right_warped: np.ndarray) -> float:
+        """Mean absolute grey level difference of the two frames inside the overlap."""
+        if not self._overlap_mask.any():
+            return 0.0
+        left_gray = cv2.cvtColor(canvas_left, cv2.COLOR_BGR2GRAY)
+        right_gray = cv2.cvtColor(right_warped, cv2.COLOR_BGR2GRAY)
+        return float(cv2.absdiff(left_gray, right_gray)[self._overlap_mask].mean())
+
+    def stitch(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """
+        Stitch two BGR frames onto the cached canvas.
+
+        Args:
+            left (np.ndarray): Left camera frame.
+            right (np.ndarray): Right camera frame.
+
+        Returns:
+            np.ndarray: Stitched frame.
+        """
+        if self._estimated_shapes != (left.shape, right.shape):
+            self._needs_estimate = True
+        if self._needs_estimate or self._frames_since_estimate >= self.reestimate_interval:
+            self.estimate(left, right)
+        self._frames_since_estimate += 1
+        if self._homography is None or self._shapes != (left.shape, right.shape):
+            return self.fallback.stitch(left, right)
+
+        width, height = self._canvas_size
+        lx, ly = self._left_origin
+        left_w, left_h = self._scaled_size(left.shape)
+        canvas_left = np.zeros((height, width, 3), np.uint8)
+        canvas_left[ly:ly + left_h, lx:lx + left_w] = cv2.resize(left, (left_w, left_h))
+        right_warped = cv2.warpPerspective(right, self._homography, self._canvas_size)
+
+        if self._frames_since_estimate % self.drift_check_interval == 1:
+            self.last_error = self._measure_error(canvas_left, right_warped)
+            if self._baseline_error is None:
+                self._baseline_error = max(self.last_error, 1.0)
+            elif self.last_error > self._baseline_error * self.drift_factor:
+                self.drift_detections += 1
+                self._needs_estimate = True  # Picked up on the next frame
+
+        return cv2.blendLinear(canvas_left, right_warped, self._left_weights, self._right_weights)
+
+    def geometry_key(self):
+        """Value that changes whenever pixel_sources would return something different."""
+        if self._homography is None:
+            return self.fallback.geometry_key()
+        return ("homography", self.estimates)
+
+    def pixel_sources(self) -> dict:
+        """
+        Source pixel coordinates of every pixel of the last stitched frame.
+
+        Returns:
+            dict: "left_x", "left_y", "right_x", "right_y" in input frame pixels,
+            "right_weight", the share of the right frame in each output pixel, and the
+            (width, height) "left_resolution" and "right_resolution" of the inputs.
+        """
+        if self._homography is None:
+            return self.fallback.pixel_sources()
+        width, height = self._canvas_size
+        lx, ly = self._left_origin
+        left_shape, right_shape = self._shapes
+        left_w, left_h = self._scaled_size(left_shape)
+        cols, rows = np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64)
+
+        # Canvas pixels back to right frame pixels through the inverse homography
+        grid = np.stack(np.meshgrid(cols, rows), axis=-1).reshape(-1, 1, 2)
+        right = cv2.perspectiveTransform(grid, np.linalg.inv(self._homography)).reshape(height, width, 2)
+
+        total = self._left_weights + self._right_weights
+        right_weight = np.divide(self._right_weights, total, out=np.zeros_like(total), where=total > 0)
+        return {
+            "left_resolution": (left_shape[1], left_shape[0]),
+            "right_resolution": (right_shape[1], right_shape[0]),
+            "left_x": np.broadcast_to((cols - lx + 0.5) * (left_shape[1] / left_w) - 0.5, (height, width)),
+            "left_y": np.broadcast_to(((rows - ly + 0.5) * (left_shape[0] / left_h) - 0.5)[:, None], (height, width)),
+            "right_x": right[..., 0],
+            "right_y": right[..., 1],
+            "right_weight": right_weight,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "estimates": self.estimates,
+            "failed_estimates": self.failed_estimates,
+            "drift_detections": self.drift_detections,
+            "last_inliers": self.last_inliers,
+            "last_estimate_ms": round(self.last_estimate_ms, 2),
+            "overlap_error": round(self.last_error, 2),
+            "using_homography": self._homography is not None,
+        }
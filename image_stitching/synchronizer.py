@@ -0,0 +1,116 @@
+from collections import deque
+
+
+class FramePairSynchronizer:
+    """
+    Pair left and right frames by capture timestamp.
+
+    Each side keeps at most max_buffer frames waiting for a partner. Two frames are
+    paired when their timestamps differ by at most tolerance seconds. A frame that is
+    older than the oldest frame on the other side by more than the tolerance can never
+    be paired, since timestamps on each side only increase, and is dropped.
+
+    A side without live frames does not hold back the other one. After a placeholder
+    (a drone that is not connected), or when a side has sent nothing for stale_after
+    seconds of the other side's capture time, live frames are paired with that side's
+    placeholder or last frame regardless of skew.
+    """
+
+    SIDES = ("left", "right")
+
+    def __init__(self, tolerance: float = 0.05, max_buffer: int = 5, stale_after: float = 0.5) -> None:
+        """
+        Args:
+            tolerance (float): Largest accepted timestamp difference in seconds.
+            max_buffer (int): Frames kept per side while waiting for a partner.
+            stale_after (float): Seconds a side may lag behind before its last frame is reused.
+        """
+        self.tolerance = tolerance
+        self.stale_after = stale_after
+        self.buffers = {side: deque(maxlen=max_buffer) for side in self.SIDES}
+        self.placeholders = {side: None for side in self.SIDES}  # Shown until the side sends a live frame
+        self.last = {side: None for side in self.SIDES}  # (timestamp, frame) of the side's newest live frame
+        self.dropped = {side: 0 for side in self.SIDES}
+        self.pairs = 0
+        self.fill_pairs = 0  # Pairs made with a placeholder or a stale frame
+        self.last_skew = 0.0
+        self.max_skew = 0.0
+        self.total_skew = 0.0
+
+    def push(self, side: str, timestamp: float, frame) -> list:
+        """
+        Add a frame and return the pairs it completes.
+
+        Args:
+            side (str): "left" or "right".
+            timestamp (float | None): Capture time of the frame in seconds, None for a placeholder.
+            frame: The frame payload.
+
+        Returns:
+            list: (left_frame, right_frame) tuples, oldest first.
+        """
+        buffer = self.buffers[side]
+        if timestamp is None:
+            self.placeholders[side] = frame
+            self.dropped[side] += len(buffer)
+            buffer.clear()
+            return self._match()
+        self.placeholders[side] = None
+        if buffer and timestamp <= buffer[-1][0]:
+            self.dropped[side] += 1  # Out of order or repeated frame
+            return []
+        if len(buffer) == buffer.maxlen:
+            self.dropped[side] += 1  # Oldest frame falls out of the buffer
+        buffer.append((timestamp, frame))
+        self.last[side] = (timestamp, frame)
+        return self._match()
+
+    def _match(self) -> list:
+        left, right = self.buffers["left"], self.buffers["right"]
+        pairs = []
+        while left and right:
+            skew = left[0][0] - right[0][0]
+            if abs(skew) <= self.tolerance:
+                pairs.append((left.popleft()[1], right.popleft()[1]))
+                self._record_skew(abs(skew))
+            elif skew < 0:
+                left.popleft()  # Left frame is too old for any right frame still to come
+                self.dropped["left"] += 1
+            else:
+                right.popleft()
+                self.dropped["right"] += 1
+
+        # Live frames on one side only, pair them with what the silent side last showed
+        for side, other in (("left", "right"), ("right", "left")):
+            waiting = self.buffers[side]
+            if not waiting or self.buffers[other]:
+                continue
+            fill = self.placeholders[other]
+            if fill is None and self.last[other] is not None and waiting[-1][0] - self.last[other][0] > self.stale_after:
+                fill = self.last[other][1]
+            if fill is None:
+                continue
+            while waiting:
+                frame = waiting.popleft()[1]
+                pairs.append((frame, fill) if side == "left" else (fill, frame))
+                self.fill_pairs += 1
+        return pairs
+
+    def _record_skew(self, skew: float) -> None:
+        self.pairs += 1
+        self.last_skew = skew
+        self.max_skew = max(self.max_skew, skew)
+        self.total_skew += skew
+
+    def stats(self) -> dict:
+        return {
+            "pairs": self.pairs,
+            "fill_pairs": self.fill_pairs,
+            "dropped_left": self.dropped["left"],
+            "dropped_right": self.dropped["right"],
+            "waiting_left": len(self.buffers["left"]),
+            "waiting_right": len(self.buffers["right"]),
+            "last_skew_ms": round(1000 * self.last_skew, 2),
+            "avg_skew_ms": round(1000 * self.total_skew / self.pairs, 2) if self.pairs else 0.0,
+            "max_skew_ms": round(1000 * self.max_skew, 2),
+        }
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The communication software is imported as the communication_software package and the
+# image stitching modules by their file names, as in their own containers
+sys.path.insert(0, os.path.join(ROOT, "communication_software"))
+sys.path.insert(0, os.path.join(ROOT, "image_stitching"))
+
+from communication_software.ConvexHullScalable import Coordinate, Trajectory  # noqa: E402
+
+# Plain scripts in this directory, not tests
+collect_ignore = [
+    "ConvexHullScalable_test.py",
+    "min_area_rectangle_benchmark.py",
+    "startup_benchmark.py",
+    "trajectory_benchmark.py",
+]
+
+ORIGIN = Coordinate(lat=57.685596, lng=11.978925, alt=0)
+
+
+def trajectory(lats, lngs):
+    """Trajectory in the local ATOS frame, lat holds x and lng holds y."""
+    trajectory = Trajectory.empty(len(lats))
+    trajectory.lat[:] = lats
+    trajectory.lng[:] = lngs
+    trajectory.alt[:] = 0
+    return trajectory
+
+
+@pytest.fixture
+def trajectories():
+    rng = np.random.default_rng(0)
+    return {i: trajectory(rng.uniform(-20, 20, 500), rng.uniform(-15, 15, 500)) for i in range(3)}
@@ -0,0 +1,131 @@
+"""
+Benchmarks the vectorized minimum-area rectangle in ConvexHullScalable against the
+previous edge-by-edge implementation, on trajectories of 10k to 1M points.
+
+The previous implementation is copied below. For every size the script checks that
+both give bit-identical rectangles and prints the time of the rectangle search and of
+the collinearity check, which are the parts of getDronesLoc that were rewritten.
+
+Usage:
+    python test/min_area_rectangle_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "communication_software"))
+from communication_software import ConvexHullScalable  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+# ---- Previous implementation ----
+
+class Rectangle:
+    def __init__(self):
+        self.center = np.array([0.0, 0.0])
+        self.axis = [np.array([0.0, 0.0]), np.array([0.0, 0.0])]
+        self.extent = [0.0, 0.0]
+        self.area = float('inf')
+
+def normalize(v):
+    if np.linalg.norm(v) == 0:
+        raise ValueError("Cannot normalize a zero vector.")
+    return v / np.linalg.norm(v)
+
+def perp(v):
+    if v.shape != (2,):
+        raise ValueError("Input vector must be 2D.")
+    return np.array([-v[1], v[0]])
+
+def dot(v1, v2):
+    if v1.shape != v2.shape:
+        raise ValueError("Vectors must have the same shape.")
+    return np.dot(v1, v2)
+
+def legacy_min_area_rectangle_of_hull(polygon):
+    min_rect = Rectangle()
+    n = len(polygon)
+    for i0 in range(n):
+        i1 = (i0 + 1) % n
+        origin = polygon[i0]
+        U0 = normalize(polygon[i1] - origin)
+        U1 = perp(U0)
+        min0, max0 = 0, 0
+        max1 = 0
+        for j in range(n):
+            D = polygon[j] - origin
+            dot0 = dot(U0, D)
+            min0 = min(min0, dot0)
+            max0 = max(max0, dot0)
+            dot1 = dot(U1, D)
+            max1 = max(max1, dot1)
+        area = (max0 - min0) * max1
+        if area < min_rect.area:
+            min_rect.center = origin + ((min0 + max0) / 2) * U0 + (max1 / 2) * U1
+            min_rect.axis[0] = U0
+            min_rect.axis[1] = U1
+            min_rect.extent[0] = (max0 - min0) / 2
+            min_rect.extent[1] = max1 / 2
+            min_rect.area = area
+    return min_rect
+
+def legacy_are_colinear(points, tol=1e-9):
+    if len(points) < 3:
+        return True
+    x0, y0 = points[0]
+    x1, y1 = points[1]
+    for x, y in points[2:]:
+        cp = (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0)
+        if abs(cp) > tol:
+            return False
+    return True
+
+
+# ---- Benchmark ----
+
+def make_trajectories(n_points, rng):
+    """Dense (lng, lat) trajectories of several vehicles driving loops around a test track."""
+    n_vehicles = 10
+    t = np.linspace(0, 2 * np.pi, n_points // n_vehicles)
+    points = []
+    for _ in range(n_vehicles):
+        radius = rng.uniform(0.0005, 0.002, 2)
+        center = np.array([11.978925, 57.685596]) + rng.normal(0, 0.0005, 2)
+        loop = center + np.column_stack([radius[0] * np.cos(t), radius[1] * np.sin(t)])
+        points.append(loop + rng.normal(0, 1e-6, loop.shape))
+    return np.vstack(points)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def same_rectangle(a, b):
+    return (a.area == b.area and np.array_equal(a.center, b.center) and np.array_equal(a.axis[0], b.axis[0])
+            and np.array_equal(a.axis[1], b.axis[1]) and a.extent == b.extent)
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>9} {'hull':>5} | {'rectangle old':>13} {'new':>9} {'speedup':>8} | "
+          f"{'colinear old':>12} {'new':>9} | identical")
+    for n_points in SIZES:
+        points = make_trajectories(n_points, rng)
+        hull = points[ConvexHull(points).vertices]
+
+        old_rect, old_rect_time = timed(legacy_min_area_rectangle_of_hull, list(hull))
+        new_rect, new_rect_time = timed(ConvexHullScalable.min_area_rectangle_of_hull, hull)
+        old_colinear, old_colinear_time = timed(legacy_are_colinear, points)
+        new_colinear, new_colinear_time = timed(ConvexHullScalable.are_colinear, points)
+
+        identical = same_rectangle(old_rect, new_rect) and old_colinear == new_colinear
+        print(f"{n_points:>9} {len(hull):>5} | {1000 * old_rect_time:>10.1f} ms {1000 * new_rect_time:>6.1f} ms "
+              f"{old_rect_time / new_rect_time:>7.1f}x | {1000 * old_colinear_time:>9.1f} ms "
+              f"{1000 * new_colinear_time:>6.1f} ms | {identical}")
+
+
+if __name__ == "__main__":
+    main()
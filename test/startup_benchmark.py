@@ -0,0 +1,68 @@
+"""
+Measures how long it takes to import the platform's modules.
+
+Every import runs in a fresh interpreter, so nothing is cached between runs. Importing
+must not connect to Redis or load the YOLO model, so this works without any services
+running. Modules whose dependencies are not installed are reported and skipped.
+
+Usage:
+    python test/startup_benchmark.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, directory added to sys.path)
+MODULES = [
+    ("communication_software.ConvexHullScalable", "communication_software"),
+    ("communication_software.DroneRegistry", "communication_software"),
+    ("communication_software.FramePublisher", "communication_software"),
+    ("communication_software.Communication", "communication_software"),
+    ("communication_software.frontendWebsocket", "communication_software"),
+    ("coordinateMapping", "image_stitching"),
+    ("stitcher", "image_stitching"),
+    ("detection", "image_stitching"),
+    ("image_stitching", "image_stitching"),
+]
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(module, path):
+    """Returns the import time in seconds, or the error if the import failed."""
+    snippet = IMPORT_SNIPPET.format(path=os.path.join(ROOT, path), module=module)
+    result = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True,
+                            cwd=os.path.join(ROOT, path), timeout=120)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return float(result.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Import time over {runs} fresh interpreters (median / max)")
+    for module, path in MODULES:
+        times = []
+        error = None
+        for _ in range(runs):
+            elapsed, error = time_import(module, path)
+            if elapsed is None:
+                break
+            times.append(elapsed)
+        if error:
+            print(f"  {module:45s} skipped: {error}")
+        else:
+            print(f"  {module:45s} {1000 * statistics.median(times):8.1f} ms / {1000 * max(times):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import coordinateMapping
+from coordinateMapping import CameraModel
+
+LOCATION = (57.6856, 11.9789)
+ALTITUDE = 50.0
+
+
+def test_image_center_is_below_the_camera():
+    camera = CameraModel(LOCATION, ALTITUDE)
+    assert tuple(camera.pixelsToGps(np.array([[960.0, 540.0]]))[0]) == pytest.approx(LOCATION)
+
+
+def test_batch_matches_single_pixels():
+    rng = np.random.default_rng(0)
+    pixels = rng.uniform([0, 0], [1920, 1080], (50, 2))
+    camera = CameraModel(LOCATION, ALTITUDE, orientation=30)
+    gps = camera.pixelsToGps(pixels)
+
+    assert gps.shape == (50, 2)
+    for pixel, (lat, lng) in zip(pixels, gps):
+        expected = coordinateMapping.pixelToGps(tuple(pixel), LOCATION, ALTITUDE, orientation=30)
+        assert (lat, lng) == pytest.approx(expected, abs=1e-12)
+
+
+def test_grids_keep_their_shape():
+    camera = CameraModel(LOCATION, ALTITUDE, resolution=(64, 36))
+    grid = np.stack(np.meshgrid(np.arange(64.0), np.arange(36.0)), axis=-1)
+    assert camera.pixelsToGps(grid).shape == (36, 64, 2)
+
+
+def test_offsets_round_trip_through_gps():
+    camera = CameraModel(LOCATION, ALTITUDE)
+    pixels = np.array([[0.0, 0.0], [1920.0, 1080.0], [100.0, 900.0]])
+    meters = coordinateMapping.gpsDeltasToMeters(LOCATION, camera.pixelsToGps(pixels))
+    np.testing.assert_allclose(meters, camera.offsetsFromDrone(pixels), rtol=1e-2)
+    for gps, expected in zip(camera.pixelsToGps(pixels), meters):
+        assert coordinateMapping.gpsDeltaToMeters(LOCATION, gps) == pytest.approx(tuple(expected))
+
+
+def test_orientation_rotates_the_image():
+    top = np.array([[960.0, 0.0]])
+    north = CameraModel(LOCATION, ALTITUDE, orientation=0).pixelsToGps(top)[0]
+    east = CameraModel(LOCATION, ALTITUDE, orientation=90).pixelsToGps(top)[0]
+    # The top of the image points north, then east
+    assert north[0] > LOCATION[0] and north[1] == pytest.approx(LOCATION[1])
+    assert east[1] > LOCATION[1] and east[0] == pytest.approx(LOCATION[0])
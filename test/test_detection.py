@@ -0,0 +1,140 @@
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("supervision")
+
+import detection  # noqa: E402
+from detection import AdaptiveDetector, DetectionService  # noqa: E402
+
+FRAME = np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Replaces YOLO with a model that finds one box per frame and records its batches."""
+    batches = []
+
+    def predict_batch(model, frames, imgsz, conf):
+        batches.append((len(frames), imgsz))
+        return [(np.array([[0.0, 0.0, 4.0, 4.0]]), np.array([0.9]), np.array([0])) for _ in frames]
+
+    monkeypatch.setattr(detection, "load_model", lambda model_path: object())
+    monkeypatch.setattr(detection, "predict_batch", predict_batch)
+    return batches
+
+
+@pytest.fixture
+def service(fake_model):
+    service = DetectionService(max_batch=4, max_wait=0.5)
+    service.start()
+    yield service
+    service.stop()
+
+
+def test_single_stream_does_not_wait_for_a_batch(service):
+    service.detect("merged", FRAME)  # The first frame makes the stream active
+    start = time.perf_counter()
+    for _ in range(5):
+        service.detect("merged", FRAME)
+    assert (time.perf_counter() - start) / 5 < service.max_wait / 2
+
+
+def test_frames_of_several_streams_are_batched(service, fake_model):
+    for stream in ("drone1", "drone2", "merged"):
+        service.detect(stream, FRAME)
+    fake_model.clear()
+
+    futures = [service.submit(stream, FRAME) for stream in ("drone1", "drone2", "merged")]
+    for future in futures:
+        future.result(timeout=5)
+    assert sum(size for size, _ in fake_model) == 3
+    assert len(fake_model) < 3
+
+
+def test_drone_frames_share_the_batch_of_the_merged_frame(service, fake_model):
+    # As in merge_stream with DETECT_DRONE_STREAMS: both drone frames are submitted, then the merged frame is detected
+    for _ in range(3):
+        futures = [service.submit(stream, FRAME) for stream in ("drone1", "drone2")]
+        service.detect("merged", FRAME)
+        for future in futures:
+            future.result(timeout=5)
+    assert fake_model[-1] == (3, service.imgsz)
+    assert service.stats()["last_batch_size"] == 3
+
+
+def test_every_stream_has_its_own_tracker(service):
+    service.detect("drone1", FRAME)
+    service.detect("drone2", FRAME)
+    assert set(service.trackers) == {"drone1", "drone2"}
+    assert service.trackers["drone1"] is not service.trackers["drone2"]
+
+
+def test_model_load_failure_in_the_child_process_is_raised():
+    service = DetectionService(model_path="/nonexistent/best.pt", out_of_process=True)
+    service.start()
+    try:
+        for _ in range(2):
+            with pytest.raises(Exception):
+                service.submit("merged", FRAME).result(timeout=60)
+    finally:
+        service.stop()
+
+
+class MovingBoxService:
+    """Stands in for DetectionService, one tracked box that moves 10 px right per detection."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = []
+
+    def detect(self, stream, frame, imgsz=None):
+        time.sleep(self.latency)
+        x = 10.0 * len(self.calls)
+        self.calls.append(imgsz)
+        return detection.sv.Detections(xyxy=np.array([[x, 0.0, x + 4.0, 4.0]]), confidence=np.array([0.9]),
+                                       class_id=np.array([0]), tracker_id=np.array([1]))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the detection module that only moves when the test advances it."""
+    now = [100.0]
+    monkeypatch.setattr(detection.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_adaptive_detector_drops_to_a_cheaper_level_when_slow(clock):
+    service = MovingBoxService(latency=0.02)
+    detector = AdaptiveDetector(service, "merged", target_fps=100, adjust_interval=0)
+    for _ in range(3):
+        detector.detect(FRAME)
+    # 20 ms per frame is over the 10 ms budget
+    assert detector.level > 0
+    assert service.calls[-1] < service.calls[0]
+
+
+def test_adaptive_detector_keeps_the_level_within_budget(clock):
+    service = MovingBoxService()
+    detector = AdaptiveDetector(service, "merged", target_fps=1, adjust_interval=0)
+    for _ in range(5):
+        detector.detect(FRAME)
+    assert detector.level == 0
+    assert detector.stats()["detected"] == 5
+
+
+def test_adaptive_detector_moves_boxes_on_skipped_frames(clock):
+    service = MovingBoxService()
+    detector = AdaptiveDetector(service, "merged", target_fps=0, levels=((640, 2),))
+    detector.detect(FRAME)  # x = 0
+    clock[0] += 1.0
+    detector.detect(FRAME)  # Skipped, no velocity yet
+    clock[0] += 1.0
+    detector.detect(FRAME)  # x = 10, 10 px over 2 s
+    clock[0] += 1.0
+    propagated = detector.detect(FRAME)
+
+    assert len(service.calls) == 2
+    assert detector.stats()["propagated"] == 2
+    np.testing.assert_allclose(propagated.xyxy, [[15.0, 0.0, 19.0, 4.0]])
@@ -0,0 +1,75 @@
+import pytest
+
+from communication_software.DroneRegistry import DroneRegistry
+
+
+def test_slots_are_assigned_from_one():
+    registry = DroneRegistry()
+    assert registry.register("a", "10.0.0.1") == 1
+    assert registry.register("b", "10.0.0.2") == 2
+    assert registry.register("a", "10.0.0.1") == 1  # Registering again keeps the slot
+    assert len(registry) == 2
+
+
+def test_connection_and_slot_map_both_ways():
+    registry = DroneRegistry()
+    registry.register("a")
+    registry.register("b")
+    assert registry.slot_of("b") == 2
+    assert registry.connection_of(2) == "b"
+    assert registry.snapshot() == {1: "a", 2: "b"}
+
+    assert registry.unregister("a") == 1
+    assert registry.slot_of("a") is None
+    assert registry.connection_of(1) is None
+    assert registry.unregister("a") is None
+
+
+def test_other_drones_are_not_renumbered():
+    registry = DroneRegistry()
+    registry.register("a")
+    registry.register("b")
+    registry.unregister("a")
+    assert registry.slot_of("b") == 2
+    # The lowest free slot is reused
+    assert registry.register("c") == 1
+
+
+def test_reconnecting_drone_gets_its_slot_back():
+    registry = DroneRegistry()
+    registry.register("a", "10.0.0.1")
+    registry.register("b", "10.0.0.2")
+    registry.unregister("a")
+    registry.unregister("b")
+
+    assert registry.register("b2", "10.0.0.2") == 2
+    assert registry.register("a2", "10.0.0.1") == 1
+
+
+def test_previous_slot_taken_by_another_drone():
+    registry = DroneRegistry()
+    registry.register("a", "10.0.0.1")
+    registry.unregister("a")
+    registry.register("b", "10.0.0.2")  # Takes slot 1
+
+    assert registry.register("a2", "10.0.0.1") == 2
+
+
+def test_view_is_read_only():
+    registry = DroneRegistry()
+    view = registry.view()
+    registry.register("a")
+
+    assert view.is_connected(1)
+    assert not view.is_connected(2)
+    assert view.slot_of("a") == 1
+    assert view.connection_of(1) == "a"
+    assert not hasattr(view, "register")
+    assert not hasattr(view, "unregister")
+
+    slots = view.slots()
+    with pytest.raises(TypeError):
+        slots[2] = "b"
+    registry.register("b")
+    assert 2 not in slots  # A copy taken when slots() was called
+    assert view.slots() == {1: "a", 2: "b"}
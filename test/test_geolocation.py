@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import coordinateMapping
+from geolocation import GroundLookup
+from stitcher import OverlapStitcher
+
+LEFT_POSE = (57.6856, 11.9789, 50.0, 0.0)
+RIGHT_POSE = (57.6856, 11.9795, 50.0, 0.0)
+
+
+@pytest.fixture
+def stitcher():
+    stitcher = OverlapStitcher(frame_width=200, overlap=0.5)
+    stitcher.stitch(np.zeros((360, 640, 3), np.uint8), np.zeros((360, 640, 3), np.uint8))
+    return stitcher
+
+
+def camera_gps(pose, x, y):
+    lat, lng, alt, heading = pose
+    camera = coordinateMapping.CameraModel((lat, lng), alt, orientation=heading, resolution=(640, 360))
+    return camera.pixelsToGps(np.array([[x, y]]))[0]
+
+
+def test_grid_covers_the_stitched_frame(stitcher):
+    grid = GroundLookup().update(stitcher, (LEFT_POSE, RIGHT_POSE))
+    assert grid.latitudes.shape == (stitcher.frame_height, 2 * stitcher.frame_width)
+    assert grid.longitudes.shape == grid.latitudes.shape
+
+
+def test_pixels_outside_the_overlap_use_their_own_camera(stitcher):
+    grid = GroundLookup().update(stitcher, (LEFT_POSE, RIGHT_POSE))
+    sources = stitcher.pixel_sources()
+    row = stitcher.frame_height // 2
+
+    col = 10  # Left frame only
+    expected = camera_gps(LEFT_POSE, sources["left_x"][row, col], sources["left_y"][row, col])
+    assert (grid.latitudes[row, col], grid.longitudes[row, col]) == pytest.approx(tuple(expected))
+
+    col = 2 * stitcher.frame_width - 10  # Right frame only
+    expected = camera_gps(RIGHT_POSE, sources["right_x"][row, col], sources["right_y"][row, col])
+    assert (grid.latitudes[row, col], grid.longitudes[row, col]) == pytest.approx(tuple(expected))
+
+    # East is to the right with heading 0
+    assert np.all(np.diff(grid.longitudes[row, :100]) > 0)
+
+
+def test_grid_is_rebuilt_only_when_the_geometry_or_poses_change(stitcher):
+    lookup = GroundLookup()
+    grid = lookup.update(stitcher, (LEFT_POSE, RIGHT_POSE))
+    assert lookup.update(stitcher, (LEFT_POSE, RIGHT_POSE)) is grid
+    assert lookup.rebuilds == 1
+
+    moved = (LEFT_POSE[0] + 0.001,) + LEFT_POSE[1:]
+    latitudes = grid.latitudes.copy()
+    new_grid = lookup.update(stitcher, (moved, RIGHT_POSE))
+    assert new_grid is not grid
+    assert lookup.rebuilds == 2
+    # A grid handed out earlier is not changed by a rebuild
+    np.testing.assert_array_equal(grid.latitudes, latitudes)
+
+
+def test_lookup_clips_to_the_frame(stitcher):
+    grid = GroundLookup().update(stitcher, (LEFT_POSE, RIGHT_POSE))
+    lats, lngs = grid.lookup(np.array([-5, 10_000]), np.array([-5, 10_000]))
+    assert lats[0] == grid.latitudes[0, 0]
+    assert lngs[1] == grid.longitudes[-1, -1]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+import redis.exceptions
+
+from communication_software.GnssAggregator import FIX_DTYPE, OBJECT_POSITIONS_KEY, GnssAggregator
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FailingPipeline:
+    """Pipeline whose execute() fails like a dropped Redis connection."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, *args, **kwargs):
+        pass
+
+    def publish(self, *args, **kwargs):
+        pass
+
+    async def execute(self):
+        raise redis.exceptions.ConnectionError("connection lost")
+
+
+class FailingRedis:
+    def pipeline(self):
+        return FailingPipeline()
+
+
+def test_update_ignores_unknown_objects():
+    gnss = GnssAggregator([1, 2])
+    gnss.update(1, 57.7, 11.9, 10.0, 100.0)
+    gnss.update(3, 0.0, 0.0, 0.0, 100.0)
+
+    assert gnss.version == 1
+    assert gnss.fixes["fixes"].tolist() == [1, 0]
+    assert gnss.fixes[0]["lat"] == 57.7
+    assert np.isnan(gnss.fixes[1]["lat"])
+
+
+def test_changed_since_returns_new_rows_once():
+    gnss = GnssAggregator([1, 2])
+    counts = np.zeros(2, dtype=FIX_DTYPE["fixes"])
+    gnss.update(2, 57.7, 11.9, 10.0, 100.0)
+
+    changed = gnss.changed_since(counts)
+    assert changed["lat"].tolist() == [57.7]
+    assert len(gnss.changed_since(counts)) == 0
+
+
+def test_snapshot_skips_objects_without_fixes():
+    gnss = GnssAggregator([1, 2])
+    gnss.update(1, 57.7, 11.9, float("nan"), 100.0)
+
+    objects = gnss.snapshot()["objects"]
+    assert list(objects) == ["1"]
+    # A missing altitude is sent as null, NaN is not valid JSON
+    assert objects["1"]["alt"] is None
+    json.dumps(objects, allow_nan=False)
+
+
+def test_publish_is_rate_limited():
+    gnss = GnssAggregator([1], rate=5.0)
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def run():
+        gnss.update(1, 57.7, 11.9, 10.0, 100.0)
+        assert await gnss.publish(client, now=0.0)
+        assert not await gnss.publish(client, now=0.1)  # Nothing new
+        gnss.update(1, 57.8, 11.9, 10.0, 101.0)
+        assert not await gnss.publish(client, now=0.1)  # Too soon
+        assert await gnss.publish(client, now=0.2)
+        return json.loads(await client.get(OBJECT_POSITIONS_KEY))
+
+    snapshot = asyncio.run(run())
+    assert snapshot["version"] == 2
+    assert snapshot["objects"]["1"]["lat"] == 57.8
+
+
+def test_failed_publish_is_retried():
+    gnss = GnssAggregator([1], rate=5.0)
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def run():
+        gnss.update(1, 57.7, 11.9, 10.0, 100.0)
+        assert not await gnss.publish(FailingRedis(), now=0.0)
+        assert gnss.published_version == 0
+        # No new fix, the snapshot is still sent once the interval has passed
+        assert not await gnss.publish(client, now=0.1)
+        assert await gnss.publish(client, now=0.2)
+        return await client.get(OBJECT_POSITIONS_KEY)
+
+    assert asyncio.run(run()) is not None
+    assert gnss.published_version == gnss.version
+    assert gnss.stats()["publish_errors"] == 1
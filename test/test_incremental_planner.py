@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from communication_software.ConvexHullScalable import HeightError, getDronesLoc
+from communication_software.IncrementalPlanner import IncrementalPlanner
+from conftest import ORIGIN, trajectory
+
+
+def gnss(planner, north, east):
+    """GNSS position of a point in the planning frame."""
+    return ORIGIN.lat + np.asarray(north) / planner.lat_scale, ORIGIN.lng + np.asarray(east) / planner.lng_scale
+
+
+def same_plan(a, b):
+    (a_coords, a_angle), (b_coords, b_angle) = a, b
+    return np.isclose(a_angle, b_angle) and all(
+        np.allclose((x.lat, x.lng, x.alt), (y.lat, y.lng, y.alt), rtol=0, atol=1e-9) for x, y in zip(a_coords, b_coords))
+
+
+def test_initial_plan_matches_getDronesLoc(trajectories):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN)
+    assert same_plan(planner.plan, getDronesLoc(trajectories, ORIGIN))
+    assert len(planner.points) < 50
+
+
+def test_positions_inside_the_hull_do_not_replan(trajectories):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN, min_interval=0)
+    hull_before = planner.points.copy()
+
+    assert planner.add_positions(*gnss(planner, [0, 5, -5], [0, 3, -3])) == 0
+    assert planner.update() is None
+    assert np.array_equal(planner.points, hull_before)
+
+
+def test_position_outside_the_hull_replans_like_getDronesLoc(trajectories):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN, min_interval=0)
+
+    assert planner.add_positions(*gnss(planner, [40], [0])) == 1
+    plan = planner.update()
+
+    expected = getDronesLoc({**trajectories, "new": trajectory([0], [40])}, ORIGIN)
+    assert same_plan(plan, expected)
+    assert planner.update() is None
+
+
+def test_replans_are_rate_limited(trajectories):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN, min_interval=2.0)
+    planner.add_positions(*gnss(planner, [40], [0]))
+
+    assert planner.update(now=planner.last_plan_time + 1.0) is None
+    assert planner.update(now=planner.last_plan_time + 2.0) is not None
+
+
+def test_collinear_points_are_reduced_to_the_segment_ends():
+    trajectories = {0: trajectory(np.zeros(1000), np.linspace(-10, 10, 1000))}
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN, min_interval=0)
+    assert same_plan(planner.plan, getDronesLoc(trajectories, ORIGIN))
+    assert len(planner.points) == 2
+
+    # Fixes on the segment are inside and do not grow the point set
+    assert planner.add_positions(*gnss(planner, [-5, 0, 9.5], [0, 0, 0])) == 0
+    assert len(planner.points) == 2
+    assert planner.update() is None
+
+    # Extending the line moves an end, leaving it gives a real hull
+    assert planner.add_positions(*gnss(planner, [15], [0])) == 1
+    assert len(planner.points) == 2 and planner.degenerate
+    assert planner.add_positions(*gnss(planner, [0], [5])) == 1
+    assert not planner.degenerate and len(planner.points) == 3
+
+
+def test_failing_plan_is_not_retried_until_the_hull_grows(trajectories, monkeypatch):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN, min_interval=0)
+    calls = []
+
+    def failing_plan(*args):
+        calls.append(args)
+        raise HeightError()
+
+    monkeypatch.setattr("communication_software.IncrementalPlanner.plan_drones", failing_plan)
+    planner.add_positions(*gnss(planner, [40], [0]))
+    with pytest.raises(HeightError):
+        planner.update()
+    assert planner.update() is None
+    assert len(calls) == 1
+
+    planner.add_positions(*gnss(planner, [50], [0]))
+    with pytest.raises(HeightError):
+        planner.update()
+    assert len(calls) == 2
@@ -0,0 +1,104 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from communication_software.ConvexHullScalable import Coordinate
+from communication_software.IncrementalPlanner import IncrementalPlanner
+from communication_software.PlanCache import PLAN_CACHE_PREFIX, PlanCache, delete_plans_async, scenario_key
+from conftest import ORIGIN, trajectory
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def cache():
+    return PlanCache(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_scenario_key_is_stable(trajectories):
+    key = scenario_key(trajectories, ORIGIN, 2, 0.5)
+    assert key.startswith(PLAN_CACHE_PREFIX)
+    # Insertion order and the trajectory representation do not matter
+    reordered = {i: trajectories[i] for i in reversed(list(trajectories))}
+    assert scenario_key(reordered, ORIGIN, 2, 0.5) == key
+    as_arrays = {i: t.points.copy() for i, t in trajectories.items()}
+    assert scenario_key(as_arrays, ORIGIN, 2, 0.5) == key
+    as_coordinates = {i: list(t) for i, t in trajectories.items()}
+    assert scenario_key(as_coordinates, ORIGIN, 2, 0.5) == key
+
+
+def test_scenario_key_changes_with_the_scenario(trajectories):
+    key = scenario_key(trajectories, ORIGIN, 2, 0.5)
+    assert scenario_key(trajectories, ORIGIN, 3, 0.5) != key
+    assert scenario_key(trajectories, ORIGIN, 2, 0.4) != key
+    assert scenario_key(trajectories, Coordinate(ORIGIN.lat, ORIGIN.lng, 1), 2, 0.5) != key
+    moved = {i: trajectory(t.lat.copy(), t.lng.copy()) for i, t in trajectories.items()}
+    moved[1].lat[7] += 1e-9
+    assert scenario_key(moved, ORIGIN, 2, 0.5) != key
+    renamed = {i + 10: t for i, t in trajectories.items()}
+    assert scenario_key(renamed, ORIGIN, 2, 0.5) != key
+
+
+def test_put_and_get_round_trip(cache, trajectories):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN)
+    key = scenario_key(trajectories, ORIGIN, 2, 0.5)
+    assert cache.get(key) is None
+
+    cache.put(key, planner.plan, planner.points)
+    (flyToList, angle), hull = cache.get(key)
+
+    assert angle == planner.plan[1]
+    assert [(c.lat, c.lng, c.alt) for c in flyToList] == [(c.lat, c.lng, c.alt) for c in planner.plan[0]]
+    assert np.array_equal(hull, planner.points)
+    assert cache.redis.ttl(key) > 0
+
+
+def test_collinear_scenario_stores_only_the_segment_ends(cache):
+    trajectories = {0: trajectory(np.zeros(5000), np.linspace(-10, 10, 5000))}
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN)
+    key = scenario_key(trajectories, ORIGIN, 2, 0.5)
+    cache.put(key, planner.plan, planner.points)
+
+    _, hull = cache.get(key)
+    assert hull.shape == (2, 2)
+
+
+def test_invalidate(cache, trajectories):
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN)
+    keys = [scenario_key(trajectories, ORIGIN, n_drones, 0.5) for n_drones in (2, 3, 4)]
+    for key in keys:
+        cache.put(key, planner.plan, planner.points)
+    cache.redis.set("unrelated", "kept")
+
+    assert cache.invalidate(keys[0]) == 1
+    assert cache.get(keys[0]) is None
+    assert cache.invalidate() == 2
+    assert all(cache.get(key) is None for key in keys)
+    assert cache.redis.get("unrelated") == "kept"
+
+
+def test_delete_plans_async(trajectories):
+    server = fakeredis.FakeServer()
+    cache = PlanCache(fakeredis.FakeRedis(server=server, decode_responses=True))
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN)
+    for n_drones in (2, 3):
+        cache.put(scenario_key(trajectories, ORIGIN, n_drones, 0.5), planner.plan, planner.points)
+    cache.redis.set("unrelated", "kept")
+
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    assert asyncio.run(delete_plans_async(client)) == 2
+    assert asyncio.run(delete_plans_async(client)) == 0
+    assert cache.redis.get("unrelated") == "kept"
+
+
+def test_redis_errors_are_a_miss(trajectories):
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = PlanCache(fakeredis.FakeRedis(server=server, decode_responses=True))
+    planner = IncrementalPlanner.from_trajectories(trajectories, ORIGIN)
+    key = scenario_key(trajectories, ORIGIN, 2, 0.5)
+
+    cache.put(key, planner.plan, planner.points)
+    assert cache.get(key) is None
+    assert cache.invalidate() == 0
@@ -0,0 +1,81 @@
+import cv2
+import numpy as np
+import pytest
+
+from stitcher import HomographyStitcher, OverlapStitcher
+
+SHIFT = 460  # Columns between the left and right camera in the test scene
+
+
+@pytest.fixture
+def frames():
+    """Left and right view of one textured scene, the right view starts SHIFT columns in."""
+    rng = np.random.default_rng(0)
+    scene = cv2.resize(rng.integers(0, 255, (120, 275, 3), dtype=np.uint8), (1100, 480),
+                       interpolation=cv2.INTER_NEAREST)
+    return scene[:, :640].copy(), scene[:, SHIFT:].copy()
+
+
+def test_overlap_stitcher_output_size(frames):
+    stitcher = OverlapStitcher(frame_width=320)
+    stitched = stitcher.stitch(*frames)
+    assert stitched.shape == (240, 640, 3)
+    assert stitched.dtype == np.uint8
+
+
+def test_overlap_stitcher_reuses_the_remap_tables(frames):
+    stitcher = OverlapStitcher(frame_width=320)
+    stitcher.stitch(*frames)
+    map_x, key = stitcher._map_x, stitcher.geometry_key()
+    stitcher.stitch(*frames)
+    assert stitcher._map_x is map_x
+    assert stitcher.geometry_key() == key
+
+    # A new input size rebuilds them
+    left, right = frames
+    stitcher.stitch(left[:240, :320], right[:240, :320])
+    assert stitcher._map_x is not map_x
+    assert stitcher.geometry_key() != key
+
+
+def test_overlap_stitcher_blends_only_the_overlap():
+    stitcher = OverlapStitcher(frame_width=100, overlap=0.5)
+    left = np.full((50, 100, 3), 200, np.uint8)
+    right = np.full((50, 100, 3), 100, np.uint8)
+    stitched = stitcher.stitch(left, right)
+    assert np.all(stitched[:, :50] == 200)
+    assert np.all(stitched[:, 100:] == 100)
+    # Linear ramp from the left frame to the right frame
+    assert np.all(np.diff(stitched[0, 50:100, 0].astype(int)) <= 0)
+
+    sources = stitcher.pixel_sources()
+    assert sources["right_weight"].shape == (50, 200)
+    assert np.all(sources["right_weight"][:, :50] == 0)
+    assert np.all(sources["right_weight"][:, 100:] == 1)
+
+
+def test_homography_stitcher_finds_the_camera_offset(frames):
+    stitcher = HomographyStitcher(frame_width=640)
+    stitched = stitcher.stitch(*frames)
+
+    assert stitcher.stats()["using_homography"]
+    assert stitcher._homography[0, 2] == pytest.approx(SHIFT, abs=3)
+    assert abs(stitched.shape[1] - 1100) <= 5
+    assert stitcher.geometry_key() == ("homography", 1)
+
+    # The homography is cached between scheduled estimates
+    stitcher.stitch(*frames)
+    assert stitcher.estimates == 1
+
+
+def test_homography_stitcher_falls_back_without_features():
+    stitcher = HomographyStitcher(frame_width=320)
+    blank = np.zeros((480, 640, 3), np.uint8)
+    stitched = stitcher.stitch(blank, blank)
+
+    assert not stitcher.stats()["using_homography"]
+    assert stitcher.failed_estimates == 1
+    assert stitched.shape == stitcher.fallback.stitch(blank, blank).shape
+    # Not retried on every frame for the same input size
+    stitcher.stitch(blank, blank)
+    assert stitcher.failed_estimates == 1
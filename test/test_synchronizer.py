@@ -0,0 +1,61 @@
+from synchronizer import FramePairSynchronizer
+
+
+def test_frames_within_the_tolerance_are_paired():
+    sync = FramePairSynchronizer(tolerance=0.05)
+    assert sync.push("left", 1.00, "L1") == []
+    assert sync.push("right", 1.03, "R1") == [("L1", "R1")]
+    assert sync.stats()["pairs"] == 1
+    assert sync.stats()["last_skew_ms"] == 30.0
+
+
+def test_frames_too_old_for_a_partner_are_dropped():
+    sync = FramePairSynchronizer(tolerance=0.05)
+    sync.push("left", 1.00, "L1")
+    sync.push("left", 1.10, "L2")
+    assert sync.push("right", 1.12, "R1") == [("L2", "R1")]
+    assert sync.dropped == {"left": 1, "right": 0}
+
+
+def test_out_of_order_frames_are_dropped():
+    sync = FramePairSynchronizer(tolerance=0.05)
+    sync.push("left", 1.00, "L1")
+    assert sync.push("left", 0.90, "L0") == []
+    assert sync.dropped["left"] == 1
+    assert sync.push("right", 1.00, "R1") == [("L1", "R1")]
+
+
+def test_buffer_overflow_drops_the_oldest_frame():
+    sync = FramePairSynchronizer(tolerance=0.05, max_buffer=2)
+    for i in range(3):
+        sync.push("left", 1.0 + 0.01 * i, f"L{i}")
+    assert sync.dropped["left"] == 1
+    assert sync.push("right", 1.01, "R") == [("L1", "R")]
+
+
+def test_placeholder_pairs_with_every_live_frame():
+    sync = FramePairSynchronizer(tolerance=0.05)
+    sync.push("left", 100.0, "L0")
+    assert sync.push("right", None, "missing") == [("L0", "missing")]
+    # One placeholder keeps the live side at its own frame rate
+    for i in range(1, 30):
+        assert sync.push("left", 100.0 + i / 30, f"L{i}") == [(f"L{i}", "missing")]
+    assert sync.stats()["fill_pairs"] == 30
+
+
+def test_live_frame_replaces_the_placeholder():
+    sync = FramePairSynchronizer(tolerance=0.05)
+    sync.push("right", None, "missing")
+    sync.push("right", 5.00, "R1")
+    assert sync.push("left", 5.01, "L1") == [("L1", "R1")]
+    assert sync.push("left", 5.04, "L2") == []  # Waits for a right frame again
+
+
+def test_stale_side_is_filled_with_its_last_frame():
+    sync = FramePairSynchronizer(tolerance=0.05, stale_after=0.5)
+    sync.push("left", 1.00, "L1")
+    sync.push("right", 1.00, "R1")
+    # Right stops sending, left frames wait until right is stale
+    assert sync.push("left", 1.20, "L2") == []
+    assert sync.push("left", 1.60, "L3") == [("L2", "R1"), ("L3", "R1")]
+    assert sync.push("left", 1.70, "L4") == [("L4", "R1")]
@@ -0,0 +1,101 @@
+"""
+Benchmarks trajectory ingestion and planning with getDronesLoc, comparing the previous
+list of Coordinate per trajectory with the array-backed Trajectory.
+
+ROS.py needs rclpy, so the conversion done in AtosCommunication.get_object_traj is
+copied below for both versions and fed with fake trajectory points shaped like the
+GetObjectTrajectory response. For every size the script prints the peak memory
+allocated while converting and planning (tracemalloc) and the time of each step, and
+checks that both versions give the same drone positions.
+
+Usage:
+    python test/trajectory_benchmark.py
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "communication_software"))
+from communication_software.ConvexHullScalable import Coordinate, Trajectory, getDronesLoc  # noqa: E402
+
+N_OBJECTS = 20
+SIZES = [1_000, 10_000, 50_000]  # Points per object
+ORIGIN = Coordinate(lat=57.685596, lng=11.978925, alt=0)
+
+
+def make_points(n_points, rng):
+    """Fake ROS trajectory points of one vehicle driving around the test area, in local meters."""
+    waypoints = rng.uniform(-40, 40, (12, 2))
+    t = np.linspace(0, len(waypoints) - 1, n_points)
+    xs = np.interp(t, np.arange(len(waypoints)), waypoints[:, 0]) + rng.normal(0, 0.05, n_points)
+    ys = np.interp(t, np.arange(len(waypoints)), waypoints[:, 1]) + rng.normal(0, 0.05, n_points)
+    return [SimpleNamespace(pose=SimpleNamespace(position=SimpleNamespace(x=x, y=y, z=0.0)))
+            for x, y in zip(xs.tolist(), ys.tolist())]
+
+
+# ---- Previous conversion ----
+
+def legacy_get_object_traj(points):
+    trajectories = []
+    for point in points:
+        trajectories.append(Coordinate(point.pose.position.x,
+                                       point.pose.position.y,
+                                       point.pose.position.z))
+    return trajectories
+
+
+# ---- Current conversion, as in ROS.trajectory_from_points ----
+
+def get_object_traj(points):
+    n_points = len(points)
+    trajectory = Trajectory.empty(n_points)
+    trajectory.lat[:] = np.fromiter((point.pose.position.x for point in points), np.float64, n_points)
+    trajectory.lng[:] = np.fromiter((point.pose.position.y for point in points), np.float64, n_points)
+    trajectory.alt[:] = np.fromiter((point.pose.position.z for point in points), np.float64, n_points)
+    return trajectory
+
+
+# ---- Benchmark ----
+
+def run(convert, responses):
+    """Converts every response and plans, returns (result, peak bytes, convert s, plan s)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    trajectoryList = {object_id: convert(points) for object_id, points in responses.items()}
+    converted = time.perf_counter()
+    result = getDronesLoc(trajectoryList, ORIGIN)
+    planned = time.perf_counter()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, peak, converted - start, planned - converted
+
+
+def same_plan(a, b):
+    (a_coords, a_angle), (b_coords, b_angle) = a, b
+    return a_angle == b_angle and all(
+        (x.lat, x.lng, x.alt) == (y.lat, y.lng, y.alt) for x, y in zip(a_coords, b_coords))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    getDronesLoc({0: Trajectory.empty(0), 1: [Coordinate(0, 0), Coordinate(1, 2), Coordinate(2, 1)]}, ORIGIN)  # Imports scipy
+    print(f"{N_OBJECTS} objects")
+    print(f"{'points':>9} {'version':>10} | {'peak MB':>8} {'convert':>10} {'plan':>10} | identical")
+    for n_points in SIZES:
+        responses = {object_id: make_points(n_points, rng) for object_id in range(N_OBJECTS)}
+        old = run(legacy_get_object_traj, responses)
+        new = run(get_object_traj, responses)
+        identical = same_plan(old[0], new[0])
+        for name, (_, peak, convert_time, plan_time) in (("coords", old), ("trajectory", new)):
+            print(f"{N_OBJECTS * n_points:>9} {name:>10} | {peak / 1e6:>8.1f} {1000 * convert_time:>7.1f} ms "
+                  f"{1000 * plan_time:>7.1f} ms | {identical}")
+
+
+if __name__ == "__main__":
+    main()